@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Email template render benchmark
+Times EmailFormatter renders per template type (templates are compiled once at first use)
+
+Usage: python benchmarks/email_render.py [iterations]
+"""
+
+import asyncio
+import os
+import sys
+import time
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.core.email_formatter import (
+    EmailFormatter, TradeExecutionData, PositionExitData, get_template_environment
+)
+
+
+NOW = datetime.now(timezone.utc)
+
+TRADE = TradeExecutionData(
+    symbol="BTCUSD", signal="BUY", price=67250.5, quantity=0.0123, leverage=5.0, margin_used=165.4,
+    capital_remaining=9000.0, investment_amount=165.4, leveraged_amount=827.0, trade_id="T-1",
+    position_id="P-1", strategy_name="EMAStrategy", confidence=81.2, trading_fee=0.41, timestamp=NOW,
+    account_balance_before=10000.0, account_balance_after=9834.2
+)
+
+EXIT = PositionExitData(
+    symbol="ETHUSD", position_type="SHORT", entry_price=3000.0, exit_price=2900.0, quantity=1.0,
+    leverage=3.0, pnl=96.4, pnl_percentage=3.2, investment_amount=1000.0, leveraged_amount=3000.0,
+    margin_used=1000.0, trading_fee=1.8, exit_fee=1.8, total_fees=3.6, position_id="P-2",
+    trade_duration="1h 12m", exit_reason="TARGET", account_balance_before=10000.0,
+    account_balance_after=10096.4, account_growth=96.4, account_growth_percentage=0.96,
+    total_portfolio_pnl=312.0, win_rate=58.0, timestamp=NOW
+)
+
+DIGEST_EVENTS = [
+    {"type": "trade_execution", "priority": "high", "title": f"Trade Executed: BUY S{i}",
+     "message": "Successfully executed BUY order", "timestamp": NOW.isoformat(), "symbol": f"S{i}",
+     "pnl": None if i % 2 else float(i)}
+    for i in range(25)
+]
+
+
+def cases(formatter: EmailFormatter):
+    return {
+        "trade_execution": lambda: formatter.format_trade_execution_email(TRADE),
+        "position_exit": lambda: formatter.format_position_exit_email(EXIT),
+        "risk_alert": lambda: formatter.format_risk_alert_email(
+            "BTCUSD", "Margin Call Risk", 67250.5, "high", {"alert_type": "Margin Call Risk", "risk_level": "high"}
+        ),
+        "system_error": lambda: formatter.format_system_error_email("Connection reset", "MongoDB", {"component": "MongoDB"}),
+        "system_startup": lambda: formatter.format_system_startup_email({
+            "system_config": {"mode": "paper", "websocket": "enabled"},
+            "trading_params": {"leverage": 5, "risk_per_trade": 0.02},
+            "active_strategies": ["EMAStrategy", "RSIStrategy"],
+            "trading_symbols": ["BTCUSD", "ETHUSD"],
+            "account_summary": {"balance": 10000.0}
+        }),
+        "system_shutdown": lambda: formatter.format_system_shutdown_email({
+            "uptime_seconds": 3725, "statistics": {"trades": 12}, "account_summary": {"balance": 10312.0},
+            "final_positions": [{"symbol": "BTCUSD", "position_type": "LONG"}]
+        }),
+        "notification_digest (25)": lambda: formatter.format_notification_digest_email(DIGEST_EVENTS, 60)
+    }
+
+
+def run(render, iterations: int) -> float:
+    """Return mean microseconds per render"""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        render()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+async def run_async(formatter: EmailFormatter, render, iterations: int) -> float:
+    """Mean microseconds per render through the render thread pool (16 concurrent requests)"""
+    start = time.perf_counter()
+    for _ in range(0, iterations, 16):
+        await asyncio.gather(*(formatter.render_async(render) for _ in range(16)))
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+
+    start = time.perf_counter()
+    get_template_environment()
+    compile_ms = (time.perf_counter() - start) * 1000
+    formatter = EmailFormatter()
+
+    print(f"Email render benchmark ({iterations} renders per template)")
+    print(f"  compile all templates : {compile_ms:>10.2f} ms (once per process)")
+    for name, render in cases(formatter).items():
+        run(render, 50)
+        sync_us = run(render, iterations)
+        async_us = asyncio.run(run_async(formatter, render, iterations))
+        print(f"  {name:<25}: {sync_us:>8.1f} us/render  ({async_us:>8.1f} us via render pool)")
+
+
+if __name__ == "__main__":
+    main()
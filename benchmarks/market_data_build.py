@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+MarketData construction benchmark (tick hot path)
+Compares the validated pydantic constructor with MarketData.from_feed
+
+Usage: python benchmarks/market_data_build.py [iterations]
+"""
+
+import os
+import sys
+import time
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.database.schemas import MarketData
+
+
+# Representative v2/ticker dict as produced by RealTimeMarketData
+SAMPLE_PRICE_DATA = {
+    "price": 67250.5, "mark_price": 67250.5, "spot_price": 67241.2, "volume": 1523.4,
+    "turnover": 102345678.0, "turnover_usd": 102345678.0, "high": 68010.0, "low": 66500.0,
+    "open": 66900.0, "close": 67250.5, "open_interest": 8123.0, "oi_value": 546000000.0,
+    "oi_contracts": 8123000.0, "oi_value_usd": 546000000.0, "oi_change_usd_6h": 1200000.0,
+    "funding_rate": 0.0001, "mark_basis": 0.02, "mark_change_24h": 0.52,
+    "underlying_asset_symbol": "BTC", "description": "Bitcoin Perpetual futures, quoted, settled & margined in USD",
+    "initial_margin": 0.5, "tick_size": 0.5, "price_band_lower": 63000.0, "price_band_upper": 71000.0,
+    "best_bid": 67250.0, "best_ask": 67251.0, "bid_size": 1200.0, "ask_size": 900.0,
+    "mark_iv": None, "size": 1.0,
+}
+
+
+def build_validated(symbol, price_data, timestamp):
+    """Previous tick-path construction: full pydantic validation"""
+    return MarketData(
+        symbol=symbol,
+        timestamp=timestamp,
+        **{field: price_data.get(field) for field in MarketData.model_fields if field not in ("symbol", "timestamp")}
+    )
+
+
+def run(builder, iterations: int) -> float:
+    """Return builds per second for a single core"""
+    timestamp = datetime.now(timezone.utc)
+    start = time.perf_counter()
+    for _ in range(iterations):
+        builder("BTCUSD", SAMPLE_PRICE_DATA, timestamp)
+    return iterations / (time.perf_counter() - start)
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    run(build_validated, 1000)
+    run(MarketData.from_feed, 1000)
+
+    validated = run(build_validated, iterations)
+    fast = run(MarketData.from_feed, iterations)
+
+    print(f"MarketData build benchmark ({iterations} ticks, 1 core)")
+    print(f"  validated constructor : {validated:>12,.0f} ticks/s")
+    print(f"  from_feed fast path   : {fast:>12,.0f} ticks/s")
+    print(f"  speedup               : {fast / validated:>12.2f}x")
+
+
+if __name__ == "__main__":
+    main()
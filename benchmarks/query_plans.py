@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Query plan check for the REST/signal filters
+Explains every filter shape the API builds against the configured MongoDB and fails
+if any of them resolves to a collection scan instead of an index
+
+Usage: python benchmarks/query_plans.py
+"""
+
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.database.mongodb_client import AsyncMongoDBClient
+from src.database.query_filters import closed_position_filter, signal_filter
+
+
+DATE_FROM = "2024-01-01T00:00:00Z"
+DATE_TO = "2024-12-31T23:59:59Z"
+
+POSITION_SORT = [("exit_time", -1)]
+SIGNAL_SORT = [("timestamp", -1)]
+
+CASES = {
+    "positions: closed": ("positions", closed_position_filter(), POSITION_SORT),
+    "positions: date range": ("positions", closed_position_filter(DATE_FROM, DATE_TO), POSITION_SORT),
+    "positions: symbol": ("positions", closed_position_filter(symbol="btc"), POSITION_SORT),
+    "positions: strategy": ("positions", closed_position_filter(strategy="EMAStrategy"), POSITION_SORT),
+    "positions: search": ("positions", closed_position_filter(search="eth"), POSITION_SORT),
+    "signals: all": ("signals", signal_filter({}), SIGNAL_SORT),
+    "signals: symbol": ("signals", signal_filter({"symbol": "btcusd"}), SIGNAL_SORT),
+    "signals: strategy + dates": ("signals", signal_filter(
+        {"strategy": "rsi", "date_from": DATE_FROM, "date_to": DATE_TO}), SIGNAL_SORT),
+    "signals: search": ("signals", signal_filter({"search": "buy"}), SIGNAL_SORT),
+}
+
+
+async def run() -> bool:
+    client = AsyncMongoDBClient()
+    if not await client.connect():
+        print("MongoDB unavailable")
+        return False
+    await client.create_indexes()
+
+    ok = True
+    print(f"{'query':<28}{'plan':<44}index")
+    for name, (collection, query, sort) in CASES.items():
+        plan = await client.explain_query(collection, query, sort)
+        ok &= not plan["collection_scan"]
+        print(f"{name:<28}{' > '.join(plan['stages']):<44}{', '.join(plan['indexes']) or '-'}")
+    await client.disconnect()
+    return ok
+
+
+def main():
+    ok = asyncio.run(run())
+    print("OK: every query uses an index" if ok else "FAIL: collection scan found")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
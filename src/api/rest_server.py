@@ -16,9 +16,12 @@ from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
 import uvicorn
 
+from src.broker.models import Order, OrderType, PositionStatus, DEFAULT_ACCOUNT_ID
 from src.config import get_settings
 from src.database.mongodb_client import AsyncMongoDBClient
+from src.database.query_filters import closed_position_filter, signal_filter
 from src.database.schemas import NotificationLog
+from src.utils.performance import get_latency_tracker
 
 
 class FilterRequest(BaseModel):
@@ -34,6 +37,26 @@ class FilterRequest(BaseModel):
     search: Optional[str] = None
 
 
+class OrderRequest(BaseModel):
+    """Request model for placing an order"""
+    symbol: str
+    side: str  # BUY/SELL
+    quantity: float
+    order_type: str = "LIMIT"  # MARKET/LIMIT/STOP/STOP_LIMIT
+    limit_price: Optional[float] = None
+    stop_price: Optional[float] = None
+    leverage: Optional[float] = None
+    reduce_only: bool = False
+    account_id: str = DEFAULT_ACCOUNT_ID
+    strategy_name: str = "Manual"
+
+
+class BracketRequest(BaseModel):
+    """Request model for bracket (OCO stop-loss / target) orders; defaults to the position's levels"""
+    stop_loss: Optional[float] = None
+    target: Optional[float] = None
+
+
 class NotificationFilter(BaseModel):
     """Request model for filtering notifications"""
     date_from: Optional[str] = None
@@ -55,6 +78,10 @@ class TradingRestAPI:
         self.logger = logging.getLogger("rest_api")
         self.mongodb_client = AsyncMongoDBClient()
         
+        # Live risk manager and broker (assigned by TradingSystem)
+        self.risk_manager = None
+        self.broker = None
+        
         # Initialize FastAPI app
         self.app = FastAPI(
             title="Trading Dashboard API",
@@ -139,60 +166,20 @@ class TradingRestAPI:
             position_type: Optional[str] = Query(None),
             page: int = Query(1, ge=1),
             limit: int = Query(50, ge=1, le=200),
-            search: Optional[str] = Query(None)
+            search: Optional[str] = Query(None),
+            cursor: Optional[str] = Query(None),
+            total: str = Query("estimated", pattern="^(estimated|exact|none)$"),
+            facet: bool = Query(False)
         ):
             """Get closed positions with filters and pagination"""
             try:
-                filters = {}
-                
-                # Add status filter for closed positions
-                filters["status"] = "CLOSED"
-                
-                # Date range filter
-                if date_from or date_to:
-                    date_filter = {}
-                    if date_from:
-                        date_filter["$gte"] = datetime.fromisoformat(date_from.replace('Z', '+00:00'))
-                    if date_to:
-                        date_filter["$lte"] = datetime.fromisoformat(date_to.replace('Z', '+00:00'))
-                    filters["exit_time"] = date_filter
-                
-                # Symbol filter
-                if symbol:
-                    filters["symbol"] = {"$regex": symbol, "$options": "i"}
-                
-                # Strategy filter
-                if strategy:
-                    filters["strategy_name"] = {"$regex": strategy, "$options": "i"}
-                
-                # Position type filter
-                if position_type:
-                    filters["position_type"] = position_type.upper()
-                
-                # Search filter
-                if search:
-                    search_filter = {
-                        "$or": [
-                            {"symbol": {"$regex": search, "$options": "i"}},
-                            {"strategy_name": {"$regex": search, "$options": "i"}},
-                            {"notes": {"$regex": search, "$options": "i"}}
-                        ]
-                    }
-                    filters.update(search_filter)
+                filters = closed_position_filter(date_from, date_to, symbol, strategy, position_type, search)
                 
-                # Calculate skip for pagination
-                skip = (page - 1) * limit
-                
-                # Get positions from database using available methods
-                if not await self.mongodb_client.connect():
-                    raise HTTPException(status_code=500, detail="Database connection failed")
-                
-                positions_collection = self.mongodb_client.db["positions"]
-                positions_cursor = positions_collection.find(filters).sort("exit_time", -1).skip(skip).limit(limit)
-                positions = await positions_cursor.to_list(length=limit)
-                
-                # Get total count for pagination
-                total_count = await positions_collection.count_documents(filters)
+                # Keyset page (cursor) or page-number fallback
+                result = await self.mongodb_client.find_page(
+                    "positions", filters, "exit_time", limit, cursor, page, total, facet
+                )
+                positions = result["items"]
                 
                 # Enhanced position data
                 enhanced_positions = []
@@ -202,12 +189,7 @@ class TradingRestAPI:
                 
                 return {
                     "positions": enhanced_positions,
-                    "pagination": {
-                        "page": page,
-                        "limit": limit,
-                        "total": total_count,
-                        "pages": (total_count + limit - 1) // limit
-                    },
+                    "pagination": self._page_info(result, page, limit, cursor),
                     "filters_applied": {
                         "date_from": date_from,
                         "date_to": date_to,
@@ -219,6 +201,10 @@ class TradingRestAPI:
                     "timestamp": datetime.now(timezone.utc).isoformat()
                 }
                 
+            except HTTPException:
+                raise
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
             except Exception as e:
                 self.logger.error(f"Error fetching closed positions: {e}")
                 raise HTTPException(status_code=500, detail=str(e))
@@ -227,10 +213,14 @@ class TradingRestAPI:
         async def get_closed_position(position_id: str):
             """Get specific closed position by ID"""
             try:
-                if not await self.mongodb_client.connect():
-                    raise HTTPException(status_code=500, detail="Database connection failed")
-                    
-                position = await self.mongodb_client.find_document("positions", {"id": position_id, "status": "CLOSED"})
+                if self.broker is not None:
+                    # Recent closes are served from the broker's memory, older ones from MongoDB
+                    found = await self.broker.get_position_async(position_id)
+                    position = found.to_dict() if found and found.status == PositionStatus.CLOSED else None
+                else:
+                    if not await self.mongodb_client.connect():
+                        raise HTTPException(status_code=500, detail="Database connection failed")
+                    position = await self.mongodb_client.find_document("positions", {"id": position_id, "status": "CLOSED"})
                 if not position:
                     raise HTTPException(status_code=404, detail="Position not found")
                 
@@ -259,9 +249,11 @@ class TradingRestAPI:
                 positions_cursor = positions_collection.find({"status": "OPEN"})
                 positions = await positions_cursor.to_list(length=None)
                 
-                # Get all positions for total count
-                all_positions_cursor = positions_collection.find({"status": "CLOSED"})
-                all_closed_positions = await all_positions_cursor.to_list(length=None)
+                # Closed total from the broker's aggregates (a count query when running standalone)
+                if self.broker is not None:
+                    total_closed = self.broker.get_closed_count()
+                else:
+                    total_closed = await positions_collection.count_documents({"status": "CLOSED"})
                 
                 # Process and enhance positions
                 enhanced_positions = []
@@ -275,7 +267,7 @@ class TradingRestAPI:
                 return {
                     "positions": enhanced_positions,
                     "total_open": len(enhanced_positions),
-                    "total_closed": len(all_closed_positions),
+                    "total_closed": total_closed,
                     "timestamp": datetime.now(timezone.utc).isoformat()
                 }
                 
@@ -284,6 +276,67 @@ class TradingRestAPI:
                 raise HTTPException(status_code=500, detail=str(e))
         
         
+        # Order Endpoints
+        @self.app.get("/api/orders")
+        async def get_orders(symbol: Optional[str] = Query(None)):
+            """Get active resting orders"""
+            if self.broker is None:
+                raise HTTPException(status_code=503, detail="Broker not available")
+            orders = self.broker.get_open_orders(symbol.upper() if symbol else None)
+            return {
+                "orders": [order.to_dict() for order in orders],
+                "total": len(orders),
+                "timestamp": datetime.now(timezone.utc).isoformat()
+            }
+        
+        @self.app.post("/api/orders")
+        async def place_order(request: OrderRequest):
+            """Place a market, limit, stop or stop-limit order"""
+            if self.broker is None:
+                raise HTTPException(status_code=503, detail="Broker not available")
+            try:
+                order_type = OrderType(request.order_type.upper())
+            except ValueError:
+                raise HTTPException(status_code=400, detail=f"Invalid order_type: {request.order_type}")
+            
+            account_config = self.broker.get_account_config(request.account_id)
+            order = Order(
+                account_id=request.account_id,
+                symbol=request.symbol,
+                side=request.side.upper(),
+                order_type=order_type,
+                quantity=request.quantity,
+                limit_price=request.limit_price,
+                stop_price=request.stop_price,
+                leverage=request.leverage or account_config.get("default_leverage", 1.0),
+                reduce_only=request.reduce_only,
+                strategy_name=request.strategy_name
+            )
+            if not await self.broker.place_order_async(order):
+                raise HTTPException(status_code=400, detail=order.notes or "Order rejected")
+            return {"order": order.to_dict(), "timestamp": datetime.now(timezone.utc).isoformat()}
+        
+        @self.app.delete("/api/orders/{order_id}")
+        async def cancel_order(order_id: str):
+            """Cancel a resting order"""
+            if self.broker is None:
+                raise HTTPException(status_code=503, detail="Broker not available")
+            if not await self.broker.cancel_order_async(order_id):
+                raise HTTPException(status_code=404, detail="Active order not found")
+            return {"cancelled": order_id, "timestamp": datetime.now(timezone.utc).isoformat()}
+        
+        @self.app.post("/api/positions/{position_id}/brackets")
+        async def place_brackets(position_id: str, request: BracketRequest):
+            """Rest stop-loss / target orders (OCO) for an open position, replacing existing brackets"""
+            if self.broker is None:
+                raise HTTPException(status_code=503, detail="Broker not available")
+            for order in self.broker.get_bracket_orders(position_id).values():
+                await self.broker.cancel_order_async(order.id, "Replaced by new bracket")
+            orders = await self.broker.place_bracket_orders_async(position_id, request.stop_loss, request.target)
+            if not orders:
+                raise HTTPException(status_code=400, detail="No open position or no valid bracket levels")
+            return {"orders": [order.to_dict() for order in orders], "timestamp": datetime.now(timezone.utc).isoformat()}
+        
         # Helper method to get current price
         async def _get_current_price(self, symbol: str) -> Optional[float]:
             """Get current price for a symbol from live prices"""
@@ -412,60 +465,20 @@ class TradingRestAPI:
             position_type: Optional[str] = Query(None),
             page: int = Query(1, ge=1),
             limit: int = Query(50, ge=1, le=200),
-            search: Optional[str] = Query(None)
+            search: Optional[str] = Query(None),
+            cursor: Optional[str] = Query(None),
+            total: str = Query("estimated", pattern="^(estimated|exact|none)$"),
+            facet: bool = Query(False)
         ):
             """Get all trades (closed positions) with filters and pagination"""
             try:
-                filters = {}
-                
-                # Add status filter for closed positions
-                filters["status"] = "CLOSED"
-                
-                # Date range filter
-                if date_from or date_to:
-                    date_filter = {}
-                    if date_from:
-                        date_filter["$gte"] = datetime.fromisoformat(date_from.replace('Z', '+00:00'))
-                    if date_to:
-                        date_filter["$lte"] = datetime.fromisoformat(date_to.replace('Z', '+00:00'))
-                    filters["exit_time"] = date_filter
+                filters = closed_position_filter(date_from, date_to, symbol, strategy, position_type, search)
                 
-                # Symbol filter
-                if symbol:
-                    filters["symbol"] = {"$regex": symbol, "$options": "i"}
-                
-                # Strategy filter
-                if strategy:
-                    filters["strategy_name"] = {"$regex": strategy, "$options": "i"}
-                
-                # Position type filter
-                if position_type:
-                    filters["position_type"] = position_type.upper()
-                
-                # Search filter
-                if search:
-                    search_filter = {
-                        "$or": [
-                            {"symbol": {"$regex": search, "$options": "i"}},
-                            {"strategy_name": {"$regex": search, "$options": "i"}},
-                            {"notes": {"$regex": search, "$options": "i"}}
-                        ]
-                    }
-                    filters.update(search_filter)
-                
-                # Calculate skip for pagination
-                skip = (page - 1) * limit
-                
-                # Get trades from database using available methods
-                if not await self.mongodb_client.connect():
-                    raise HTTPException(status_code=500, detail="Database connection failed")
-                
-                positions_collection = self.mongodb_client.db["positions"]
-                positions_cursor = positions_collection.find(filters).sort("exit_time", -1).skip(skip).limit(limit)
-                trades = await positions_cursor.to_list(length=limit)
-                
-                # Get total count for pagination
-                total_count = await positions_collection.count_documents(filters)
+                # Keyset page (cursor) or page-number fallback
+                result = await self.mongodb_client.find_page(
+                    "positions", filters, "exit_time", limit, cursor, page, total, facet
+                )
+                trades = result["items"]
                 
                 # Enhanced trade data
                 enhanced_trades = []
@@ -475,12 +488,7 @@ class TradingRestAPI:
                 
                 return {
                     "trades": enhanced_trades,
-                    "pagination": {
-                        "page": page,
-                        "limit": limit,
-                        "total": total_count,
-                        "pages": (total_count + limit - 1) // limit
-                    },
+                    "pagination": self._page_info(result, page, limit, cursor),
                     "filters_applied": {
                         "date_from": date_from,
                         "date_to": date_to,
@@ -492,6 +500,10 @@ class TradingRestAPI:
                     "timestamp": datetime.now(timezone.utc).isoformat()
                 }
                 
+            except HTTPException:
+                raise
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
             except Exception as e:
                 self.logger.error(f"Error fetching trades: {e}")
                 raise HTTPException(status_code=500, detail=str(e))
@@ -505,7 +517,10 @@ class TradingRestAPI:
             symbol: Optional[str] = Query(None),
             search: Optional[str] = Query(None),
             date_from: Optional[str] = Query(None),
-            date_to: Optional[str] = Query(None)
+            date_to: Optional[str] = Query(None),
+            cursor: Optional[str] = Query(None),
+            total: str = Query("estimated", pattern="^(estimated|exact|none)$"),
+            facet: bool = Query(False)
         ):
             """Get trading signals with filters and pagination"""
             try:
@@ -525,12 +540,11 @@ class TradingRestAPI:
                 if date_to:
                     filters['date_to'] = date_to
                 
-                # Calculate skip for pagination
-                skip = (page - 1) * limit
-                
-                # Get signals from database using new methods
-                signals = await self.mongodb_client.load_signals(limit=limit, skip=skip, filters=filters)
-                total_count = await self.mongodb_client.get_signals_count(filters=filters)
+                # Keyset page (cursor) or page-number fallback
+                result = await self.mongodb_client.find_page(
+                    "signals", signal_filter(filters), "timestamp", limit, cursor, page, total, facet
+                )
+                signals = result["items"]
                 
                 # Format signals
                 formatted_signals = []
@@ -550,12 +564,7 @@ class TradingRestAPI:
                 
                 return {
                     "signals": formatted_signals,
-                    "pagination": {
-                        "page": page,
-                        "limit": limit,
-                        "total": total_count,
-                        "pages": (total_count + limit - 1) // limit
-                    },
+                    "pagination": self._page_info(result, page, limit, cursor),
                     "filters_applied": {
                         "strategy": strategy,
                         "symbol": symbol,
@@ -565,6 +574,10 @@ class TradingRestAPI:
                     "timestamp": datetime.now(timezone.utc).isoformat()
                 }
                 
+            except HTTPException:
+                raise
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
             except Exception as e:
                 self.logger.error(f"Error fetching signals: {e}")
                 raise HTTPException(status_code=500, detail=str(e))
@@ -609,6 +622,61 @@ class TradingRestAPI:
                 }
             )
         
+        # Metrics Endpoints
+        @self.app.get("/api/metrics/latency")
+        async def get_latency_metrics():
+            """Get feed latency histograms per pipeline stage (microseconds)"""
+            try:
+                return {
+                    "unit": "microseconds",
+                    "stages": get_latency_tracker().snapshot(),
+                    "timestamp": datetime.now(timezone.utc).isoformat()
+                }
+            except Exception as e:
+                self.logger.error(f"Error fetching latency metrics: {e}")
+                raise HTTPException(status_code=500, detail=str(e))
+        
+        @self.app.get("/api/metrics/indexes")
+        async def get_index_metrics():
+            """Get declared vs. server indexes with $indexStats usage (missing/unused per collection)"""
+            try:
+                if not await self.mongodb_client.connect():
+                    raise HTTPException(status_code=500, detail="Database connection failed")
+                index_manager = self.mongodb_client.index_manager
+                return {
+                    "collections": await index_manager.usage_report(),
+                    "last_sync": index_manager.last_sync,
+                    "timestamp": datetime.now(timezone.utc).isoformat()
+                }
+            except HTTPException:
+                raise
+            except Exception as e:
+                self.logger.error(f"Error fetching index metrics: {e}")
+                raise HTTPException(status_code=500, detail=str(e))
+        
+        # Risk Endpoints
+        @self.app.get("/api/risk/summary")
+        async def get_risk_summary():
+            """Get risk summary with portfolio VaR/ES and stress scenarios"""
+            if self.risk_manager is None:
+                raise HTTPException(status_code=503, detail="Risk manager not available")
+            try:
+                return self.risk_manager.get_risk_summary()
+            except Exception as e:
+                self.logger.error(f"Error fetching risk summary: {e}")
+                raise HTTPException(status_code=500, detail=str(e))
+        
+        @self.app.get("/api/risk/correlation")
+        async def get_risk_correlation():
+            """Get the live cross-symbol correlation matrix and EWMA volatilities"""
+            if self.risk_manager is None:
+                raise HTTPException(status_code=503, detail="Risk manager not available")
+            try:
+                return self.risk_manager.get_correlation_snapshot()
+            except Exception as e:
+                self.logger.error(f"Error fetching correlation matrix: {e}")
+                raise HTTPException(status_code=500, detail=str(e))
+        
         # Analytics Endpoints
         @self.app.get("/api/analytics/summary")
         async def get_analytics_summary():
@@ -625,7 +693,7 @@ class TradingRestAPI:
                 positions_collection = self.mongodb_client.db["positions"]
                 positions_cursor = positions_collection.find({
                     "status": "CLOSED",
-                    "exit_time": {"$gte": start_date, "$lte": end_date}
+                    "exit_time": {"$gte": start_date.isoformat(), "$lte": end_date.isoformat()}
                 })
                 positions = await positions_cursor.to_list(length=None)
                 
@@ -675,6 +743,18 @@ class TradingRestAPI:
                 self.logger.error(f"Error fetching analytics: {e}")
                 raise HTTPException(status_code=500, detail=str(e))
     
+    def _page_info(self, result: Dict[str, Any], page: int, limit: int, cursor: Optional[str]) -> Dict[str, Any]:
+        """Pagination block for a find_page result (pages is None when the total was skipped)"""
+        total = result["total"]
+        return {
+            "page": None if cursor else page,
+            "limit": limit,
+            "total": total,
+            "pages": (total + limit - 1) // limit if total is not None else None,
+            "next_cursor": result["next_cursor"],
+            "has_more": result["has_more"]
+        }
+
     def _enhance_closed_position_api(self, position: Dict) -> Dict:
         """Enhance closed position data for API response"""
         entry_time = position.get('entry_time')
@@ -63,6 +63,7 @@ class ClientConnection:
     authenticated: bool = False
     browser_fingerprint: Optional[str] = None
     tab_id: Optional[str] = None
+    db_record: Optional[asyncio.Future] = None  # Resolves once the buffered connect record is written
 
     def is_alive(self) -> bool:
         """Check if connection is still alive"""
@@ -319,16 +320,22 @@ class WebSocketServer:
                 "user_agent": client.user_agent,
                 "status": "connected"
             }
-            await self.mongodb_client.insert_document("websocket_clients", client_doc)
+            # Batched with other inserts; the disconnect update waits on this record only
+            client.db_record = asyncio.ensure_future(
+                self.mongodb_client.insert_buffered("websocket_clients", client_doc, wait=True)
+            )
         except Exception as e:
             self.logger.debug(f"Failed to store client in DB: {e}")
     
-    async def _remove_client_from_db(self, client_id: str):
+    async def _remove_client_from_db(self, client: ClientConnection):
         """Remove client from MongoDB"""
         try:
+            # The connect record may still be buffered
+            if client.db_record is not None:
+                await client.db_record
             await self.mongodb_client.update_document(
                 "websocket_clients",
-                {"client_id": client_id},
+                {"client_id": client.client_id},
                 {"status": "disconnected", "disconnected_at": datetime.now(timezone.utc)}
             )
         except Exception as e:
@@ -769,6 +776,7 @@ class WebSocketServer:
 
     async def _remove_client(self, client_id: str):
         """Remove client from active connections"""
+        client = None
         async with self.client_lock:
             if client_id in self.clients:
                 client = self.clients[client_id]
@@ -790,12 +798,13 @@ class WebSocketServer:
                     if not self.ip_connections[client_ip]:
                         del self.ip_connections[client_ip]
                 
-                # Remove from MongoDB
-                await self._remove_client_from_db(client_id)
-                
                 del self.clients[client_id]
                 self.stats["active_connections"] = max(0, self.stats["active_connections"] - 1)
                 self.logger.info(f"🔌 Client {client_id[:8]} removed from {client_ip}")
+        
+        # Outside the lock: the connect record's batch may still be pending
+        if client is not None:
+            await self._remove_client_from_db(client)
 
     async def _close_all_clients(self):
         """Close all client connections"""
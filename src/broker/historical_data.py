@@ -67,6 +67,11 @@ class HistoricalDataProvider:
             self.logger.error(f"❌ No fallback data available for {symbol} ({timeframe})")
             return pd.DataFrame()
 
+    def get_cached_data(self, symbol: str, timeframe: str) -> Optional[pd.DataFrame]:
+        """Get cached candles without fetching (None when nothing is cached yet)"""
+        with self.lock:
+            return self.cache.get((symbol, timeframe))
+
     def _fetch_and_cache(self, symbol: str, timeframe: str) -> pd.DataFrame:
         key = (symbol, timeframe)
         df = self.fetch_historical_data_from_api(symbol, timeframe)
@@ -0,0 +1,384 @@
+"""
+Simulated matching engine for resting paper orders
+Per-symbol price-sorted heaps of limit and stop orders matched on every tick
+against the feed's best bid/ask and sizes (or the L2 book when available)
+"""
+
+import heapq
+import itertools
+import logging
+import math
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Deque, Dict, List, Optional, Set, Tuple, Any
+
+from src.broker.models import Order, OrderStatus, OrderType
+
+
+# Quantities below this are treated as fully filled
+QUANTITY_EPSILON = 1e-12
+
+
+@dataclass
+class Fill:
+    """A (possibly partial) execution of a resting order"""
+    order: Order
+    quantity: float
+    price: float
+    liquidity: str  # "maker" (resting limit) or "taker" (market / triggered stop)
+
+
+class SymbolOrderBook:
+    """Resting orders for one symbol
+
+    Every heap is ordered best-first so a tick only touches the orders it
+    triggers or fills: O((k + 1) log n) for k touched orders, no scans.
+    Cancelled orders are dropped lazily when they reach the top of a heap.
+    """
+
+    def __init__(self, symbol: str):
+        self.symbol = symbol
+        self.buy_limits: List[Tuple[float, int, str]] = []  # (-limit, seq, id): highest bid first
+        self.sell_limits: List[Tuple[float, int, str]] = []  # (limit, seq, id): lowest offer first
+        self.buy_stops: List[Tuple[float, int, str]] = []  # (stop, seq, id): fire when price >= stop
+        self.sell_stops: List[Tuple[float, int, str]] = []  # (-stop, seq, id): fire when price <= stop
+        self.buy_market: Deque[str] = deque()  # Market / triggered stop orders waiting for liquidity
+        self.sell_market: Deque[str] = deque()
+        self.active = 0
+        self.stale = 0
+
+    def entry_count(self) -> int:
+        return (len(self.buy_limits) + len(self.sell_limits) + len(self.buy_stops) +
+                len(self.sell_stops) + len(self.buy_market) + len(self.sell_market))
+
+
+class MatchingEngine:
+    """Price-time priority matching of resting orders against the live quote
+
+    ``match`` only proposes fills; the broker applies each fill to the account
+    and then calls ``record_fill`` (or ``reject_fill`` when it cannot be applied).
+    """
+
+    def __init__(self, use_feed_sizes: bool = True, history_size: int = 200):
+        self.use_feed_sizes = use_feed_sizes
+        self.logger = logging.getLogger("broker.matching_engine")
+
+        self.orders: Dict[str, Order] = {}  # Active orders only
+        self.books: Dict[str, SymbolOrderBook] = {}
+        self._by_position: Dict[str, Set[str]] = {}
+        self._oco_groups: Dict[str, Set[str]] = {}
+        self._sequence = itertools.count()
+        self.recent_orders: Deque[Order] = deque(maxlen=history_size)
+
+        # Statistics
+        self.stats = {
+            "submitted": 0,
+            "rejected": 0,
+            "cancelled": 0,
+            "filled": 0,
+            "fills": 0,
+            "partial_fills": 0,
+            "stops_triggered": 0
+        }
+
+    # Order management
+    def validate(self, order: Order) -> Optional[str]:
+        """Return an error message if the order cannot rest in the book"""
+        if order.side not in ("BUY", "SELL"):
+            return f"Invalid side: {order.side} (expected 'BUY' or 'SELL')"
+        if order.quantity <= 0:
+            return f"Invalid quantity: {order.quantity}"
+        if order.order_type in (OrderType.LIMIT, OrderType.STOP_LIMIT) and not (order.limit_price and order.limit_price > 0):
+            return f"{order.order_type.value} order requires a positive limit_price"
+        if order.order_type in (OrderType.STOP, OrderType.STOP_LIMIT) and not (order.stop_price and order.stop_price > 0):
+            return f"{order.order_type.value} order requires a positive stop_price"
+        return None
+
+    def submit(self, order: Order) -> bool:
+        """Add an order to its symbol's book; rejected orders get status REJECTED"""
+        error = self.validate(order)
+        if error:
+            order.status = OrderStatus.REJECTED
+            order.notes = error
+            self.stats["rejected"] += 1
+            return False
+
+        book = self.books.get(order.symbol)
+        if book is None:
+            book = self.books[order.symbol] = SymbolOrderBook(order.symbol)
+
+        self.orders[order.id] = order
+        book.active += 1
+        if order.position_id:
+            self._by_position.setdefault(order.position_id, set()).add(order.id)
+        if order.oco_group:
+            self._oco_groups.setdefault(order.oco_group, set()).add(order.id)
+        self._push(book, order)
+        self.stats["submitted"] += 1
+        return True
+
+    def attach_position(self, order: Order, position_id: str):
+        """Link an order to the position it opened or reduces"""
+        order.position_id = position_id
+        if order.id in self.orders:
+            self._by_position.setdefault(position_id, set()).add(order.id)
+
+    def cancel(self, order_id: str, reason: str = "Cancelled") -> Optional[Order]:
+        """Cancel an active order"""
+        order = self.orders.get(order_id)
+        if order is None:
+            return None
+        order.status = OrderStatus.CANCELLED
+        order.notes = reason
+        self.stats["cancelled"] += 1
+        self._finish(order, stale=True)
+        return order
+
+    def cancel_position_orders(self, position_id: str, reason: str = "Position closed") -> List[Order]:
+        """Cancel every active order linked to a position"""
+        return [order for order in (self.cancel(order_id, reason) for order_id in list(self._by_position.get(position_id, ())))
+                if order is not None]
+
+    def get_position_orders(self, position_id: str) -> List[Order]:
+        """Active orders linked to a position"""
+        return [self.orders[order_id] for order_id in self._by_position.get(position_id, ()) if order_id in self.orders]
+
+    def get_open_orders(self, symbol: Optional[str] = None) -> List[Order]:
+        """Active orders, optionally for one symbol"""
+        if symbol is None:
+            return list(self.orders.values())
+        return [order for order in self.orders.values() if order.symbol == symbol]
+
+    def has_orders(self, symbol: str) -> bool:
+        book = self.books.get(symbol)
+        return book is not None and book.active > 0
+
+    def clear(self):
+        """Drop all orders"""
+        self.orders.clear()
+        self.books.clear()
+        self._by_position.clear()
+        self._oco_groups.clear()
+        self.recent_orders.clear()
+
+    # Matching
+    def match(self, symbol: str, quote: Dict[str, Any], depth=None, contract_size: float = 1.0) -> List[Fill]:
+        """Trigger stops and propose fills for one symbol at the current quote
+
+        quote: price plus optional best_bid / best_ask / bid_size / ask_size.
+        depth: optional L2OrderBook; market fills then walk the book for slippage.
+        contract_size: order quantity per contract (feed and book sizes are in contracts).
+        """
+        book = self.books.get(symbol)
+        if book is None or book.active == 0:
+            return []
+
+        last_price = quote.get("price") or 0.0
+        best_bid = quote.get("best_bid") or last_price
+        best_ask = quote.get("best_ask") or last_price
+        if last_price <= 0:
+            if best_bid <= 0 or best_ask <= 0:
+                return []
+            last_price = (best_bid + best_ask) / 2
+
+        self._trigger_stops(book, last_price)
+
+        ask_size = (quote.get("ask_size") or 0.0) * contract_size
+        bid_size = (quote.get("bid_size") or 0.0) * contract_size
+        fills = self._match_side(book, True, best_ask, ask_size, depth, contract_size)
+        fills.extend(self._match_side(book, False, best_bid, bid_size, depth, contract_size))
+
+        if book.stale > 1024 and book.stale > book.active:
+            self._compact(book)
+        return fills
+
+    def record_fill(self, fill: Fill) -> List[Order]:
+        """Apply a fill to its order; returns OCO siblings cancelled as a result"""
+        order = fill.order
+        filled = order.filled_quantity + fill.quantity
+        order.average_fill_price = (order.average_fill_price * order.filled_quantity + fill.price * fill.quantity) / filled
+        order.filled_quantity = filled
+        order.updated_time = datetime.now(timezone.utc)
+        self.stats["fills"] += 1
+
+        if order.remaining_quantity <= QUANTITY_EPSILON:
+            order.status = OrderStatus.FILLED
+            self.stats["filled"] += 1
+            self._finish(order)
+        else:
+            order.status = OrderStatus.PARTIALLY_FILLED
+            self.stats["partial_fills"] += 1
+
+        cancelled = []
+        if order.oco_group:
+            for sibling_id in list(self._oco_groups.get(order.oco_group, ())):
+                if sibling_id != order.id:
+                    sibling = self.cancel(sibling_id, f"OCO: {order.id} filled")
+                    if sibling is not None:
+                        cancelled.append(sibling)
+        return cancelled
+
+    def reject_fill(self, fill: Fill, reason: str):
+        """Undo a recorded fill the broker could not apply and reject the order"""
+        order = fill.order
+        filled = order.filled_quantity - fill.quantity
+        if filled > QUANTITY_EPSILON:
+            order.average_fill_price = (order.average_fill_price * order.filled_quantity - fill.price * fill.quantity) / filled
+        else:
+            filled, order.average_fill_price = 0.0, 0.0
+        order.filled_quantity = filled
+        self.stats["fills"] -= 1
+
+        was_active = order.is_active
+        order.status = OrderStatus.REJECTED
+        order.notes = reason
+        order.updated_time = datetime.now(timezone.utc)
+        self.stats["rejected"] += 1
+        if was_active:
+            self._finish(order, stale=True)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get matching engine statistics"""
+        return {
+            **self.stats,
+            "open_orders": len(self.orders),
+            "books": {symbol: book.active for symbol, book in self.books.items() if book.active}
+        }
+
+    # Internals
+    def _push(self, book: SymbolOrderBook, order: Order):
+        """Place an order in the structure matching its type and trigger state"""
+        is_buy = order.side == "BUY"
+        triggered = order.status != OrderStatus.OPEN or order.order_type in (OrderType.MARKET, OrderType.LIMIT)
+        seq = next(self._sequence)
+
+        if order.order_type in (OrderType.STOP, OrderType.STOP_LIMIT) and not triggered:
+            if is_buy:
+                heapq.heappush(book.buy_stops, (order.stop_price, seq, order.id))
+            else:
+                heapq.heappush(book.sell_stops, (-order.stop_price, seq, order.id))
+        elif order.order_type in (OrderType.LIMIT, OrderType.STOP_LIMIT):
+            if is_buy:
+                heapq.heappush(book.buy_limits, (-order.limit_price, seq, order.id))
+            else:
+                heapq.heappush(book.sell_limits, (order.limit_price, seq, order.id))
+        else:
+            (book.buy_market if is_buy else book.sell_market).append(order.id)
+
+    def _trigger_stops(self, book: SymbolOrderBook, last_price: float):
+        """Move stop orders crossed by the last price into the market queue / limit heap"""
+        for heap, sign in ((book.buy_stops, 1.0), (book.sell_stops, -1.0)):
+            while heap and heap[0][0] <= last_price * sign:
+                _, _, order_id = heapq.heappop(heap)
+                order = self.orders.get(order_id)
+                if order is None:
+                    book.stale = max(book.stale - 1, 0)
+                    continue
+                order.status = OrderStatus.TRIGGERED
+                order.updated_time = datetime.now(timezone.utc)
+                self.stats["stops_triggered"] += 1
+                self._push(book, order)
+
+    def _match_side(self, book: SymbolOrderBook, is_buy: bool, best_price: float,
+                    top_size: Optional[float], depth, contract_size: float = 1.0) -> List[Fill]:
+        """Fill market orders first, then marketable limits, until the touch is exhausted"""
+        fills: List[Fill] = []
+        if not best_price or best_price <= 0:
+            return fills
+
+        liquidity = top_size if self.use_feed_sizes and top_size and top_size > 0 else math.inf
+        signal = "BUY" if is_buy else "SELL"
+
+        # Market and triggered stop orders (takers)
+        queue = book.buy_market if is_buy else book.sell_market
+        depth_taken = 0.0
+        while queue:
+            order = self.orders.get(queue[0])
+            if order is None:
+                queue.popleft()
+                book.stale = max(book.stale - 1, 0)
+                continue
+            remaining = order.remaining_quantity
+            if depth is not None:
+                quantity, price = self._depth_fill(depth, signal, depth_taken, remaining, contract_size)
+                depth_taken += quantity
+            else:
+                quantity, price = min(remaining, liquidity), best_price
+            if quantity <= QUANTITY_EPSILON or price is None:
+                break
+            fills.append(Fill(order, quantity, price, "taker"))
+            liquidity = max(liquidity - quantity, 0.0)
+            if quantity < remaining - QUANTITY_EPSILON:
+                break
+            queue.popleft()
+
+        # Resting limit orders (makers) fill at the touch when it is at or better than their limit
+        heap = book.buy_limits if is_buy else book.sell_limits
+        while heap and liquidity > QUANTITY_EPSILON:
+            key, _, order_id = heap[0]
+            order = self.orders.get(order_id)
+            if order is None:
+                heapq.heappop(heap)
+                book.stale = max(book.stale - 1, 0)
+                continue
+            limit_price = -key if is_buy else key
+            if (best_price > limit_price) if is_buy else (best_price < limit_price):
+                break
+            remaining = order.remaining_quantity
+            quantity = min(remaining, liquidity)
+            fills.append(Fill(order, quantity, best_price, "maker"))
+            liquidity -= quantity
+            if quantity < remaining - QUANTITY_EPSILON:
+                break
+            heapq.heappop(heap)
+
+        return fills
+
+    @staticmethod
+    def _depth_fill(depth, signal: str, taken: float, quantity: float,
+                    contract_size: float = 1.0) -> Tuple[float, Optional[float]]:
+        """Fill ``quantity`` after ``taken`` was already consumed this tick; returns (size, VWAP)"""
+        # The book walks in contracts; sizes are converted back to order quantity
+        before = depth.vwap_for_size(signal, taken / contract_size) if taken > 0 else {"vwap": 0.0, "filled_size": 0.0}
+        after = depth.vwap_for_size(signal, (taken + quantity) / contract_size)
+        if after["vwap"] is None:
+            return 0.0, None
+        filled = (after["filled_size"] - before["filled_size"]) * contract_size
+        if filled <= QUANTITY_EPSILON:
+            return 0.0, None
+        cost = (after["vwap"] * after["filled_size"] - (before["vwap"] or 0.0) * before["filled_size"]) * contract_size
+        return filled, cost / filled
+
+    def _finish(self, order: Order, stale: bool = False):
+        """Remove a completed / cancelled order from the active indexes"""
+        if self.orders.pop(order.id, None) is None:
+            return
+        book = self.books.get(order.symbol)
+        if book is not None:
+            book.active -= 1
+            if stale:
+                book.stale += 1
+        if order.position_id:
+            position_orders = self._by_position.get(order.position_id)
+            if position_orders is not None:
+                position_orders.discard(order.id)
+                if not position_orders:
+                    del self._by_position[order.position_id]
+        if order.oco_group:
+            group = self._oco_groups.get(order.oco_group)
+            if group is not None:
+                group.discard(order.id)
+                if not group:
+                    del self._oco_groups[order.oco_group]
+        self.recent_orders.append(order)
+
+    def _compact(self, book: SymbolOrderBook):
+        """Rebuild a book's heaps without cancelled entries"""
+        for name in ("buy_limits", "sell_limits", "buy_stops", "sell_stops"):
+            heap = [entry for entry in getattr(book, name) if entry[2] in self.orders]
+            heapq.heapify(heap)
+            setattr(book, name, heap)
+        book.buy_market = deque(order_id for order_id in book.buy_market if order_id in self.orders)
+        book.sell_market = deque(order_id for order_id in book.sell_market if order_id in self.orders)
+        book.stale = 0
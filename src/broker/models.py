@@ -9,6 +9,10 @@ from dataclasses import dataclass, field
 from enum import Enum
 
 
+# Account used when callers do not name one (single-account deployments)
+DEFAULT_ACCOUNT_ID = "main"
+
+
 class PositionType(Enum):
     """Position type enumeration"""
     LONG = "LONG"
@@ -80,6 +84,7 @@ class Account:
 class Position:
     """Trading position model"""
     id: str = field(default_factory=lambda: str(uuid.uuid4()))
+    account_id: str = DEFAULT_ACCOUNT_ID
     symbol: str = ""
     position_type: PositionType = PositionType.LONG
     status: PositionStatus = PositionStatus.OPEN
@@ -95,6 +100,7 @@ class Position:
     target: Optional[float] = None
     pnl: float = 0.0
     pnl_percentage: float = 0.0
+    realized_pnl: float = 0.0  # Realized by partial reduce-only fills (not part of pnl)
     entry_time: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
     exit_time: Optional[datetime] = None
     notes: Optional[str] = None
@@ -182,6 +188,7 @@ class Position:
         """Convert position to dictionary"""
         return {
             "id": self.id,
+            "account_id": self.account_id,
             "symbol": self.symbol,
             "position_type": self.position_type.value,
             "status": self.status.value,
@@ -197,6 +204,7 @@ class Position:
             "target": self.target,
             "pnl": self.pnl,
             "pnl_percentage": self.pnl_percentage,
+            "realized_pnl": self.realized_pnl,
             "entry_time": self.entry_time.isoformat() if self.entry_time else None,
             "exit_time": self.exit_time.isoformat() if self.exit_time else None,
             "notes": self.notes,
@@ -236,4 +244,107 @@ class Position:
             if hasattr(position, key) and key not in ['position_type', 'status', 'entry_time', 'exit_time']:
                 setattr(position, key, value)
         
-        return position 
\ No newline at end of file
+        return position 
+
+class OrderType(Enum):
+    """Order type enumeration"""
+    MARKET = "MARKET"
+    LIMIT = "LIMIT"
+    STOP = "STOP"
+    STOP_LIMIT = "STOP_LIMIT"
+
+
+class OrderStatus(Enum):
+    """Order status enumeration"""
+    OPEN = "OPEN"
+    TRIGGERED = "TRIGGERED"  # Stop reached; now working as a market or limit order
+    PARTIALLY_FILLED = "PARTIALLY_FILLED"
+    FILLED = "FILLED"
+    CANCELLED = "CANCELLED"
+    REJECTED = "REJECTED"
+
+
+@dataclass
+class Order:
+    """Resting order model (limit, stop, stop-limit, reduce-only, OCO legs)"""
+    id: str = field(default_factory=lambda: str(uuid.uuid4()))
+    account_id: str = DEFAULT_ACCOUNT_ID
+    symbol: str = ""
+    side: str = "BUY"  # BUY/SELL
+    order_type: OrderType = OrderType.LIMIT
+    quantity: float = 0.0
+    limit_price: Optional[float] = None
+    stop_price: Optional[float] = None
+    leverage: float = 1.0
+    strategy_name: str = ""
+    confidence: float = 100.0
+    reduce_only: bool = False
+    position_id: Optional[str] = None  # Position opened by / reduced by this order
+    oco_group: Optional[str] = None  # Filling one order cancels the others in the group
+    status: OrderStatus = OrderStatus.OPEN
+    filled_quantity: float = 0.0
+    average_fill_price: float = 0.0
+    created_time: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+    updated_time: Optional[datetime] = None
+    notes: Optional[str] = None
+    
+    @property
+    def remaining_quantity(self) -> float:
+        return max(self.quantity - self.filled_quantity, 0.0)
+    
+    @property
+    def is_active(self) -> bool:
+        return self.status in (OrderStatus.OPEN, OrderStatus.TRIGGERED, OrderStatus.PARTIALLY_FILLED)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert order to dictionary"""
+        return {
+            "id": self.id,
+            "account_id": self.account_id,
+            "symbol": self.symbol,
+            "side": self.side,
+            "order_type": self.order_type.value,
+            "quantity": self.quantity,
+            "limit_price": self.limit_price,
+            "stop_price": self.stop_price,
+            "leverage": self.leverage,
+            "strategy_name": self.strategy_name,
+            "confidence": self.confidence,
+            "reduce_only": self.reduce_only,
+            "position_id": self.position_id,
+            "oco_group": self.oco_group,
+            "status": self.status.value,
+            "filled_quantity": self.filled_quantity,
+            "average_fill_price": self.average_fill_price,
+            "created_time": self.created_time.isoformat() if self.created_time else None,
+            "updated_time": self.updated_time.isoformat() if self.updated_time else None,
+            "notes": self.notes,
+            "last_updated": datetime.now(timezone.utc).isoformat()
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'Order':
+        """Create order from dictionary"""
+        filtered_data = {k: v for k, v in data.items() if not k.startswith('_')}
+        
+        order = cls()
+        
+        if 'order_type' in filtered_data:
+            order.order_type = OrderType(filtered_data['order_type'])
+        
+        if 'status' in filtered_data:
+            order.status = OrderStatus(filtered_data['status'])
+        
+        for key in ('created_time', 'updated_time'):
+            value = filtered_data.get(key)
+            if isinstance(value, str):
+                setattr(order, key, datetime.fromisoformat(value.replace('Z', '+00:00')))
+            elif value:
+                setattr(order, key, value)
+        
+        for key, value in filtered_data.items():
+            if hasattr(order, key) and key not in ['order_type', 'status', 'created_time', 'updated_time',
+                                                   'remaining_quantity', 'is_active']:
+                setattr(order, key, value)
+        
+        return order
@@ -3,18 +3,28 @@ Simplified Async Broker System
 Basic trading execution with dummy data and essential functionality
 """
 
+import asyncio
 import logging
+import time
 import uuid
 import json
-from typing import Dict, List, Optional, Any, Tuple
+from typing import Dict, List, Optional, Any, Set, Tuple
 from datetime import datetime, timezone
 from dataclasses import dataclass, field
 from enum import Enum
 from collections import OrderedDict
 
-from src.broker.models import Account, Position, PositionType, PositionStatus
+import numpy as np
+
+from src.broker.models import (
+    Account, Position, PositionType, PositionStatus, Order, OrderType, OrderStatus, DEFAULT_ACCOUNT_ID
+)
+from src.broker.matching_engine import MatchingEngine, Fill, QUANTITY_EPSILON
+from src.broker.position_arrays import PositionArrays
+from src.broker.state_store import BrokerStateStore
 from src.config import get_settings, get_trading_config
 from src.database.mongodb_client import AsyncMongoDBClient
+from src.database.write_behind import WriteBehindQueue
 
 
 class ExecutionStatus(Enum):
@@ -41,11 +51,15 @@ class TradeRequest:
     status: ExecutionStatus = ExecutionStatus.PENDING
     error_message: Optional[str] = None
     position_id: Optional[str] = None
+    account_id: str = DEFAULT_ACCOUNT_ID
+    slippage_bps: Optional[float] = None  # Market fill VWAP vs best price, when priced off the L2 book
+    realized_pnl: Optional[float] = None  # Set on partial reduce-only fills
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary"""
         return {
             "id": self.id,
+            "account_id": self.account_id,
             "symbol": self.symbol,
             "signal": self.signal,
             "price": self.price,
@@ -56,10 +70,35 @@ class TradeRequest:
             "timestamp": self.timestamp.isoformat(),
             "status": self.status.value,
             "error_message": self.error_message,
-            "position_id": self.position_id
+            "position_id": self.position_id,
+            "slippage_bps": self.slippage_bps,
+            "realized_pnl": self.realized_pnl
         }
 
 
+@dataclass
+class AccountState:
+    """One isolated paper account hosted by the broker with its own trading config"""
+    account: Account
+    trading_config: Dict[str, Any]
+    index: int  # Column of this account's totals in PositionArrays
+    strategies: Optional[Set[str]] = None  # None = trades every strategy
+    open_by_symbol: Dict[str, Dict[str, Position]] = field(default_factory=dict)
+    closed_count: int = 0
+    closed_positive_pnl: float = 0.0
+    closed_negative_pnl: float = 0.0
+    # UTC day -> (closed trades, profitable trades)
+    daily_closed: Dict[str, Tuple[int, int]] = field(default_factory=dict)
+    
+    def reset_aggregates(self):
+        """Reset realized aggregates"""
+        self.open_by_symbol.clear()
+        self.closed_count = 0
+        self.closed_positive_pnl = 0.0
+        self.closed_negative_pnl = 0.0
+        self.daily_closed.clear()
+
+
 class AsyncBroker:
     """Simplified async broker with dummy data and MongoDB persistence"""
     
@@ -82,13 +121,41 @@ class AsyncBroker:
             "avg_execution_time": 0.0
         }
         
-        # MongoDB client
+        # MongoDB client (reads) and write-behind queue (writes)
         self.mongodb_client = AsyncMongoDBClient()
+        self.persistence = WriteBehindQueue(self.mongodb_client)
         
-        # Account and positions
-        self.account: Optional[Account] = None
+        # Accounts (the default account is also exposed as ``self.account``) and positions of all accounts
+        self.accounts: Dict[str, AccountState] = {}
         self.positions: Dict[str, Position] = {}
         
+        # Open-position index (updated on open/close) so per-tick checks skip closed history
+        self._open_positions: Dict[str, Position] = {}
+        self._open_by_symbol: Dict[str, Dict[str, Position]] = {}
+        self.position_index_version = 0  # Bumped on every open/close so dependents can resync
+        
+        # Running PnL aggregates for O(1) account summaries
+        self._reset_aggregates()
+        
+        # Bounded window of recently closed positions; older ones live only in MongoDB
+        self._recent_closed: OrderedDict[str, Position] = OrderedDict()
+        self._max_closed_in_memory = self.settings.MAX_CLOSED_POSITIONS_IN_MEMORY
+        self._closed_total = 0
+        
+        # L2 order books (assigned by TradingSystem when the l2_updates feed is enabled)
+        self.order_book_manager = None
+        
+        # Resting limit/stop orders, matched on every price update
+        self.matching_engine = MatchingEngine(use_feed_sizes=self.settings.MATCHING_USE_FEED_SIZES)
+        self._order_lock = asyncio.Lock()
+        
+        # Local snapshot + write-ahead log so restarts do not wait on MongoDB
+        self.state_store = BrokerStateStore()
+        self._snapshot_task: Optional[asyncio.Task] = None
+        self._db_connect_task: Optional[asyncio.Task] = None
+        self.trailing_state_provider = None  # Set by the risk manager, returns its trailing-stop states
+        self.recovered_trailing_states: Dict[str, Dict[str, Any]] = {}
+        
         self.logger.info("Simplified async broker initialized")
     
     async def start(self) -> bool:
@@ -96,15 +163,35 @@ class AsyncBroker:
         try:
             self.logger.info("Starting simplified async broker system")
             
-            # Connect to MongoDB
-            if not await self.mongodb_client.connect():
-                self.logger.warning("Failed to connect to MongoDB, using in-memory storage")
-            
-            # Initialize account
-            await self._initialize_account()
+            if self._recover_local_state():
+                # Journaled writes and the database connection catch up in the background
+                await self.persistence.start(flush_pending=False)
+                self._db_connect_task = asyncio.create_task(self._connect_database())
+                await self.state_store.start()
+                await self._initialize_extra_accounts()
+            else:
+                # Connect to MongoDB
+                if not await self.mongodb_client.connect():
+                    self.logger.warning("Failed to connect to MongoDB, using in-memory storage")
+                
+                # Start write-behind persistence (replays any journaled writes from a previous run)
+                await self.persistence.start()
+                await self.state_store.start()
+                
+                # Initialize accounts
+                await self._initialize_account()
+                await self._initialize_extra_accounts()
+                
+                # Load positions
+                await self._load_positions()
+                
+                # Load resting orders
+                await self._load_orders()
+                
+                # Snapshot right away so the next restart can skip the database
+                await self._write_snapshot()
             
-            # Load positions
-            await self._load_positions()
+            self._snapshot_task = asyncio.create_task(self._snapshot_loop())
             
             self.logger.info("Simplified async broker system started successfully")
             return True
@@ -117,11 +204,163 @@ class AsyncBroker:
         """Stop async broker system"""
         self.logger.info("Stopping simplified async broker system")
         
+        for task in (self._snapshot_task, self._db_connect_task):
+            if task and not task.done():
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._snapshot_task = None
+        self._db_connect_task = None
+        
+        # Final snapshot so the next start recovers without replaying the log
+        await self._write_snapshot()
+        await self.state_store.stop()
+        
+        # Flush pending writes before disconnecting
+        await self.persistence.stop()
+        
         # Disconnect from MongoDB
         await self.mongodb_client.disconnect()
         
         self.logger.info("Simplified async broker system stopped")
     
+    async def _connect_database(self):
+        """Connect to MongoDB after a local recovery; the write-behind flusher drains once connected"""
+        if await self.mongodb_client.connect():
+            self.logger.info("✅ MongoDB connected, syncing recovered state in the background")
+            await self.persistence.flush()
+        else:
+            self.logger.warning("⚠️ MongoDB unavailable, trading from recovered local state")
+    
+    # Local snapshot + write-ahead log
+    def _recover_local_state(self) -> bool:
+        """Restore accounts, positions, orders and trailing stops from the local snapshot and log"""
+        if not self.settings.STATE_RECOVERY_ENABLED:
+            return False
+        started = time.perf_counter()
+        try:
+            state = self.state_store.load()
+            if not state or DEFAULT_ACCOUNT_ID not in state["accounts"]:
+                return False
+            self._restore_state(state)
+        except Exception as e:
+            self.logger.error(f"❌ Local state recovery failed, loading from MongoDB: {e}")
+            self._clear_in_memory_state()
+            return False
+        
+        self.logger.info(
+            f"✅ Recovered {len(self.accounts)} accounts, {len(self._open_positions)} open positions and "
+            f"{len(self.matching_engine.orders)} resting orders from local state "
+            f"in {(time.perf_counter() - started) * 1000:.1f}ms"
+        )
+        return True
+    
+    def _restore_state(self, state: Dict[str, Any]):
+        """Rebuild in-memory broker state from a loaded snapshot"""
+        for account_id, record in state["accounts"].items():
+            account_state = self._register_account(account_id, Account.from_dict(record["account"]))
+            account_state.closed_count = record["closed_count"]
+            account_state.closed_positive_pnl = record["closed_positive_pnl"]
+            account_state.closed_negative_pnl = record["closed_negative_pnl"]
+            account_state.daily_closed = {day: tuple(counts) for day, counts in record["daily_closed"].items()}
+        self._closed_total = sum(account_state.closed_count for account_state in self.accounts.values())
+        
+        positions = [Position.from_dict(position_data) for position_data in state["positions"].values()]
+        for position in positions:
+            if position.status == PositionStatus.OPEN:
+                self.positions[position.id] = position
+                self._position_cache[position.id] = position
+                self._index_position(position)
+        # Oldest first so the window evicts in exit order
+        closed = [position for position in positions if position.status != PositionStatus.OPEN]
+        closed.sort(key=lambda position: position.exit_time or position.entry_time)
+        for position in closed:
+            self._retain_closed_position(position)
+        
+        for order_data in state["orders"].values():
+            order = Order.from_dict(order_data)
+            if order.is_active:
+                self.matching_engine.submit(order)
+        
+        self.recovered_trailing_states = {
+            position_id: trailing for position_id, trailing in state["trailing"].items()
+            if position_id in self._open_positions
+        }
+    
+    def _clear_in_memory_state(self):
+        """Drop all in-memory positions, orders and aggregates"""
+        self.positions.clear()
+        self._open_positions.clear()
+        self._open_by_symbol.clear()
+        self._reset_aggregates()
+        self._recent_closed.clear()
+        self._closed_total = 0
+        self._position_cache.clear()
+        self.matching_engine.clear()
+        self.recovered_trailing_states = {}
+        self.position_index_version += 1
+    
+    def _account_record(self, state: AccountState) -> Dict[str, Any]:
+        """Account plus its realized aggregates, as stored in the snapshot and log"""
+        return {
+            "account": state.account.to_dict(),
+            "closed_count": state.closed_count,
+            "closed_positive_pnl": state.closed_positive_pnl,
+            "closed_negative_pnl": state.closed_negative_pnl,
+            "daily_closed": dict(state.daily_closed)
+        }
+    
+    async def _write_snapshot(self):
+        """Write a local snapshot of the full broker state (truncates the log)
+        
+        The state is copied here on the event loop; serializing and writing it happen in a worker thread.
+        """
+        try:
+            self._position_arrays.sync()
+            tracked = list(self._open_positions.values()) + list(self._recent_closed.values())
+            trailing = self.trailing_state_provider() if self.trailing_state_provider else {}
+            await self.state_store.write_snapshot({
+                "accounts": {account_id: self._account_record(state) for account_id, state in self.accounts.items()},
+                "positions": {position.id: position.to_dict() for position in tracked},
+                "orders": {order.id: order.to_dict() for order in self.matching_engine.orders.values()},
+                "trailing": {position_id: dict(state) for position_id, state in trailing.items()}
+            })
+        except Exception as e:
+            self.logger.error(f"❌ Failed to write state snapshot: {e}")
+    
+    async def _snapshot_loop(self):
+        """Snapshot on interval, or sooner once the log grows past its record limit"""
+        interval = self.settings.STATE_SNAPSHOT_INTERVAL
+        elapsed = 0.0
+        while True:
+            await asyncio.sleep(1.0)
+            elapsed += 1.0
+            if elapsed >= interval or self.state_store.snapshot_due:
+                if self.state_store.has_changes:
+                    await self._write_snapshot()
+                elapsed = 0.0
+    
+    async def _save_account(self, account: Account):
+        """Log an account change locally and queue it for MongoDB"""
+        state = self.accounts.get(account.id)
+        if state is not None and state.account is account:
+            self.state_store.append("accounts", account.id, self._account_record(state))
+        await self.persistence.save_account(account.to_dict())
+    
+    async def _save_position(self, position: Position):
+        """Log a position change locally and queue it for MongoDB"""
+        position_data = position.to_dict()
+        self.state_store.append("positions", position.id, position_data)
+        await self.persistence.save_position(position_data)
+    
+    async def _save_order(self, order: Order):
+        """Log an order change locally and queue it for MongoDB"""
+        order_data = order.to_dict()
+        self.state_store.append("orders", order.id, order_data)
+        await self.persistence.save_order(order_data)
+    
     async def _initialize_account(self):
         """Initialize or load trading account"""
         try:
@@ -151,7 +390,7 @@ class AsyncBroker:
                 self.account.last_trade_date = datetime.now(timezone.utc).strftime('%Y-%m-%d')
                 
                 # Save new account to MongoDB
-                await self.mongodb_client.save_account(self.account.to_dict())
+                await self._save_account(self.account)
                 
                 self.logger.info(f"✅ Created new account: {self.account.id}")
             
@@ -171,25 +410,186 @@ class AsyncBroker:
         self.account.max_leverage = self.trading_config["max_leverage"]
         self.account.last_trade_date = datetime.now(timezone.utc).strftime('%Y-%m-%d')
     
+    @property
+    def account(self) -> Optional[Account]:
+        """Default account"""
+        state = self.accounts.get(DEFAULT_ACCOUNT_ID)
+        return state.account if state else None
+    
+    @account.setter
+    def account(self, account: Account):
+        self._register_account(DEFAULT_ACCOUNT_ID, account)
+    
+    async def _initialize_extra_accounts(self):
+        """Register the additional accounts configured in PAPER_ACCOUNTS"""
+        for account_id, account_settings in self.settings.PAPER_ACCOUNTS.items():
+            overrides = dict(account_settings)
+            await self.add_account_async(
+                account_id,
+                name=overrides.pop("name", None),
+                strategies=overrides.pop("strategies", None),
+                config_overrides=overrides
+            )
+    
+    async def add_account_async(self, account_id: str, name: Optional[str] = None,
+                                config_overrides: Optional[Dict[str, Any]] = None,
+                                strategies: Optional[List[str]] = None) -> Account:
+        """Host another isolated account on this broker (shares the price feed and mark-to-market)
+        
+        config_overrides replace trading config keys (e.g. default_leverage, balance_per_trade_pct);
+        strategies limits which strategies' signals the account trades.
+        """
+        trading_config = {**self.trading_config, **(config_overrides or {})}
+        
+        created = False
+        state = self.accounts.get(account_id)
+        if state is not None:
+            # Already hosted (e.g. recovered from local state): only refresh config and strategies
+            account = state.account
+        else:
+            # After a local recovery the database may still be connecting: a load racing it reads nothing
+            if self._db_connect_task is not None:
+                await asyncio.shield(self._db_connect_task)
+            account_data = await self.mongodb_client.load_account(account_id)
+            if account_data:
+                account = Account.from_dict(account_data)
+            else:
+                account = self._new_account(account_id, name or f"Trading Account {account_id}", trading_config)
+                # A miss only means "new" when the database answered; otherwise never overwrite its copy
+                created = self.mongodb_client.is_connected
+                if not created:
+                    self.logger.warning(f"⚠️ MongoDB unavailable, created account {account_id} is kept in memory only until it changes")
+        
+        self._register_account(account_id, account, config_overrides, strategies)
+        if created:
+            await self._save_account(account)
+        self.logger.info(f"✅ Account ready: {account_id} (balance ${account.current_balance:.2f})")
+        return account
+    
+    def _new_account(self, account_id: str, name: str, trading_config: Dict[str, Any]) -> Account:
+        """Create a fresh account from a trading config"""
+        account = Account()
+        account.id = account_id
+        account.name = name
+        account.initial_balance = trading_config["initial_balance"]
+        account.current_balance = trading_config["initial_balance"]
+        account.daily_trades_limit = trading_config["daily_trades_limit"]
+        account.max_leverage = trading_config["max_leverage"]
+        account.last_trade_date = datetime.now(timezone.utc).strftime('%Y-%m-%d')
+        return account
+    
+    def _register_account(self, account_id: str, account: Account,
+                          config_overrides: Optional[Dict[str, Any]] = None,
+                          strategies: Optional[List[str]] = None) -> AccountState:
+        """Add or refresh an account's state"""
+        state = self.accounts.get(account_id)
+        if state is None:
+            state = AccountState(
+                account=account,
+                trading_config={**self.trading_config, **(config_overrides or {})},
+                index=len(self.accounts)
+            )
+            self.accounts[account_id] = state
+        else:
+            state.account = account
+            if config_overrides:
+                state.trading_config = {**self.trading_config, **config_overrides}
+        if strategies is not None:
+            state.strategies = set(strategies)
+        return state
+    
+    def _account_state(self, account_id: Optional[str] = None) -> Optional[AccountState]:
+        return self.accounts.get(account_id or DEFAULT_ACCOUNT_ID)
+    
+    def _state_for(self, account_id: str) -> AccountState:
+        """State for an account id, registering a default-config account for unknown ids"""
+        state = self.accounts.get(account_id)
+        if state is None:
+            self.logger.warning(f"⚠️ Unknown account {account_id}, registering it with the default config")
+            state = self._register_account(
+                account_id, self._new_account(account_id, f"Trading Account {account_id}", self.trading_config)
+            )
+        return state
+    
+    def get_account(self, account_id: Optional[str] = None) -> Optional[Account]:
+        """Get an account (default account when no id is given)"""
+        state = self._account_state(account_id)
+        return state.account if state else None
+    
+    def get_account_config(self, account_id: Optional[str] = None) -> Dict[str, Any]:
+        """Get an account's effective trading config"""
+        state = self._account_state(account_id)
+        return state.trading_config if state else self.trading_config
+    
+    def get_account_ids(self) -> List[str]:
+        """Ids of all hosted accounts"""
+        return list(self.accounts)
+    
+    def get_accounts_for_strategy(self, strategy_name: str) -> List[str]:
+        """Accounts that trade signals from a strategy"""
+        return [account_id for account_id, state in self.accounts.items()
+                if state.strategies is None or strategy_name in state.strategies]
+    
     async def _load_positions(self):
-        """Load positions from MongoDB"""
+        """Load open positions and the recent closed window from MongoDB"""
         try:
-            # Load all positions from MongoDB
-            positions_data = await self.mongodb_client.load_positions()
-            
-            for position_data in positions_data:
+            for position_data in await self.mongodb_client.load_positions(status=PositionStatus.OPEN.value):
                 position = Position.from_dict(position_data)
                 self.positions[position.id] = position
                 self._position_cache[position.id] = position
+                self._index_position(position)
             
-            self.logger.info(f"✅ Loaded {len(self.positions)} positions from MongoDB")
+            # Oldest first so the window evicts in exit order
+            recent_closed = await self.mongodb_client.load_recent_closed_positions(self._max_closed_in_memory)
+            for position_data in reversed(recent_closed):
+                self._retain_closed_position(Position.from_dict(position_data))
+            
+            # Closed aggregates cover the full history, computed in the database
+            stats = await self.mongodb_client.get_closed_position_stats()
+            if stats is not None:
+                for account_id, account_stats in stats.items():
+                    state = self._state_for(account_id)
+                    state.closed_count = account_stats["count"]
+                    state.closed_positive_pnl = account_stats["positive_pnl"]
+                    state.closed_negative_pnl = account_stats["negative_pnl"]
+                    state.daily_closed = dict(account_stats["daily"])
+                self._closed_total = sum(account_stats["count"] for account_stats in stats.values())
+            else:
+                for position in self._recent_closed.values():
+                    self._record_closed_position(position)
+                self._closed_total = len(self._recent_closed)
+            
+            self.logger.info(
+                f"✅ Loaded {len(self._open_positions)} open and {len(self._recent_closed)} recent closed positions "
+                f"from MongoDB ({self._closed_total} closed in total)"
+            )
             
         except Exception as e:
             self.logger.error(f"❌ Failed to load positions: {e}")
             # Continue with empty positions
     
-    async def execute_trade_async(self, trade_request: TradeRequest) -> bool:
-        """Execute trade asynchronously with dummy data and MongoDB persistence"""
+    async def _load_orders(self):
+        """Load active resting orders from MongoDB back into the matching engine"""
+        try:
+            active_statuses = [OrderStatus.OPEN.value, OrderStatus.TRIGGERED.value, OrderStatus.PARTIALLY_FILLED.value]
+            orders_data = await self.mongodb_client.find_documents(
+                self.mongodb_client.orders_collection, {"status": {"$in": active_statuses}}
+            )
+            for order_data in orders_data:
+                self.matching_engine.submit(Order.from_dict(order_data))
+            
+            if orders_data:
+                self.logger.info(f"✅ Loaded {len(self.matching_engine.orders)} resting orders from MongoDB")
+            
+        except Exception as e:
+            self.logger.error(f"❌ Failed to load orders: {e}")
+    
+    async def execute_trade_async(self, trade_request: TradeRequest, walk_book: bool = True) -> bool:
+        """Execute trade asynchronously with dummy data and MongoDB persistence
+        
+        Market trades are priced at the L2 book VWAP for their size when a book is available;
+        ``walk_book=False`` keeps the given price (fills already priced by the matching engine).
+        """
         try:
             self.logger.info(f"🚀 Executing trade: {trade_request.signal} {trade_request.symbol} at ${trade_request.price:.2f}")
             
@@ -202,6 +602,9 @@ class AsyncBroker:
                 self.logger.error(f"❌ Trade validation failed: {trade_request.error_message}")
                 return False
             
+            if walk_book:
+                self._apply_book_fill(trade_request)
+            
             # Check risk limits
             if not self._check_risk_limits(trade_request):
                 trade_request.status = ExecutionStatus.FAILED
@@ -215,10 +618,10 @@ class AsyncBroker:
                 trade_request.status = ExecutionStatus.COMPLETED
                 
                 # Save trade to MongoDB
-                await self.mongodb_client.save_trade(trade_request.to_dict())
+                await self.persistence.save_trade(trade_request.to_dict())
                 
                 # Save updated account to MongoDB
-                await self.mongodb_client.save_account(self.account.to_dict())
+                await self._save_account(self.get_account(trade_request.account_id))
                 
                 self._trade_stats["successful_trades"] += 1
                 self.logger.info(f"✅ Trade executed successfully")
@@ -243,6 +646,8 @@ class AsyncBroker:
             position = self.positions.get(position_id)
             if not position or position.status != PositionStatus.OPEN:
                 return False
+            state = self._state_for(position.account_id)
+            account = state.account
             
             # Store position data before closing for notification
             position_data = {
@@ -254,7 +659,7 @@ class AsyncBroker:
                 "investment_amount": position.invested_amount,
                 "leveraged_amount": position.invested_amount * position.leverage,
                 "margin_used": position.margin_used,
-                "account_balance_before": self.account.current_balance,
+                "account_balance_before": account.current_balance,
                 "entry_time": position.entry_time
             }
             
@@ -263,7 +668,7 @@ class AsyncBroker:
             
             if success:
                 # Calculate exit fees and final PnL
-                exit_fee = position.trading_fee * self.trading_config["exit_fee_multiplier"]
+                exit_fee = position.trading_fee * state.trading_config["exit_fee_multiplier"]
                 total_fees = position.trading_fee + exit_fee
                 
                 # Calculate trade duration
@@ -273,7 +678,7 @@ class AsyncBroker:
                 trade_duration = f"{hours}h {minutes}m"
                 
                 # Calculate account growth
-                account_balance_after = self.account.current_balance
+                account_balance_after = account.current_balance
                 account_growth = account_balance_after - position_data["account_balance_before"]
                 account_growth_pct = (account_growth / position_data["account_balance_before"]) * 100 if position_data["account_balance_before"] > 0 else 0
                 
@@ -281,10 +686,10 @@ class AsyncBroker:
                 pnl_percentage = (position.pnl / position_data["margin_used"]) * 100 if position_data["margin_used"] > 0 else 0
                 
                 # Save updated position to MongoDB
-                await self.mongodb_client.save_position(position.to_dict())
+                await self._save_position(position)
                 
                 # Save updated account to MongoDB
-                await self.mongodb_client.save_account(self.account.to_dict())
+                await self._save_account(account)
                 
                 # Send position close notification if notification manager is available
                 if hasattr(self, 'notification_manager') and self.notification_manager:
@@ -311,8 +716,8 @@ class AsyncBroker:
                             account_balance_after=account_balance_after,
                             account_growth=account_growth,
                             account_growth_percentage=account_growth_pct,
-                            total_portfolio_pnl=self.account.realized_pnl,
-                            win_rate=self.account.win_rate
+                            total_portfolio_pnl=account.realized_pnl,
+                            win_rate=account.win_rate
                         )
                     except Exception as e:
                         self.logger.error(f"Failed to send position close notification: {e}")
@@ -337,113 +742,341 @@ class AsyncBroker:
             # Update position PnLs
             self._update_position_pnls(prices)
             
+            # Match resting orders against the new quotes
+            for symbol, price_dict in prices.items():
+                if self.matching_engine.has_orders(symbol):
+                    await self._match_orders_async(symbol, price_dict)
+            
         except Exception as e:
             self.logger.error(f"Error updating prices: {e}")
     
-    async def get_account_summary_async(self) -> Dict[str, Any]:
-        """Get account summary asynchronously with live PnL calculations"""
-        if not self.account:
-            return {}
+    async def place_order_async(self, order: Order) -> bool:
+        """Place a market, limit, stop or stop-limit order (reduce_only orders only shrink a position)"""
+        try:
+            order.symbol = order.symbol.upper() if order.symbol else order.symbol
+            
+            state = self._account_state(order.account_id)
+            if state is None:
+                order.status = OrderStatus.REJECTED
+                order.notes = f"Unknown account: {order.account_id}"
+            elif order.reduce_only:
+                position = self._resolve_reduce_position(order)
+                if position is None:
+                    order.status = OrderStatus.REJECTED
+                    order.notes = f"No open position to reduce for {order.symbol}"
+                else:
+                    order.position_id = position.id
+            elif state.open_by_symbol.get(order.symbol):
+                order.status = OrderStatus.REJECTED
+                order.notes = f"Position already open for {order.symbol}"
+            
+            if order.status == OrderStatus.REJECTED or not self.matching_engine.submit(order):
+                self.logger.error(f"❌ Order rejected: {order.notes}")
+                await self._save_order(order)
+                return False
+            
+            await self._save_order(order)
+            self.logger.info(
+                f"📝 Order placed: {order.order_type.value} {order.side} {order.quantity} {order.symbol}"
+                f"{f' limit ${order.limit_price:.2f}' if order.limit_price else ''}"
+                f"{f' stop ${order.stop_price:.2f}' if order.stop_price else ''}"
+            )
+            
+            # Marketable orders fill immediately against the last known quote
+            quote = self._price_cache.get(order.symbol)
+            if quote:
+                await self._match_orders_async(order.symbol, quote)
+            return True
+            
+        except Exception as e:
+            order.status = OrderStatus.REJECTED
+            order.notes = str(e)
+            self.logger.error(f"❌ Failed to place order: {e}")
+            return False
+    
+    async def place_bracket_orders_async(self, position_id: str, stop_loss: Optional[float] = None,
+                                         target: Optional[float] = None) -> List[Order]:
+        """Place reduce-only stop-loss / take-profit orders for a position as an OCO pair"""
+        position = self.positions.get(position_id)
+        if not position or position.status != PositionStatus.OPEN:
+            return []
         
-        # Calculate live unrealized PnL from open positions
-        open_positions = [p for p in self.positions.values() if p.status == PositionStatus.OPEN]
-        total_unrealized_pnl = 0.0
+        exit_side = "SELL" if position.position_type == PositionType.LONG else "BUY"
+        oco_group = str(uuid.uuid4())
+        stop_loss = stop_loss if stop_loss is not None else position.stop_loss
+        target = target if target is not None else position.target
         
-        # Update PnL with latest prices for each open position
-        for position in open_positions:
-            if position.symbol in self._price_cache:
-                current_price = self._price_cache[position.symbol].get("price", 0.0)
-                if current_price > 0:
-                    position.calculate_pnl(current_price)
-            total_unrealized_pnl += position.pnl
+        orders = []
+        if stop_loss:
+            orders.append(Order(account_id=position.account_id, symbol=position.symbol, side=exit_side, order_type=OrderType.STOP,
+                                quantity=position.quantity, stop_price=stop_loss, reduce_only=True,
+                                position_id=position.id, oco_group=oco_group, strategy_name=position.strategy_name,
+                                notes="Stop Loss Hit"))
+        if target:
+            orders.append(Order(account_id=position.account_id, symbol=position.symbol, side=exit_side, order_type=OrderType.LIMIT,
+                                quantity=position.quantity, limit_price=target, reduce_only=True,
+                                position_id=position.id, oco_group=oco_group, strategy_name=position.strategy_name,
+                                notes="Target Hit"))
+        
+        placed = []
+        for order in orders:
+            if await self.place_order_async(order):
+                placed.append(order)
+        return placed
+    
+    async def cancel_order_async(self, order_id: str, reason: str = "Cancelled by user") -> bool:
+        """Cancel a resting order"""
+        async with self._order_lock:
+            order = self.matching_engine.cancel(order_id, reason)
+        if order is None:
+            return False
+        await self._save_order(order)
+        return True
+    
+    def get_open_orders(self, symbol: Optional[str] = None) -> List[Order]:
+        """Get active resting orders, optionally for one symbol"""
+        return self.matching_engine.get_open_orders(symbol)
+    
+    def get_bracket_orders(self, position_id: str) -> Dict[str, Order]:
+        """Resting bracket legs of a position: {"stop_loss": order, "target": order} (either may be missing)"""
+        brackets = {}
+        for order in self.matching_engine.get_position_orders(position_id):
+            if not (order.reduce_only and order.oco_group):
+                continue
+            if order.order_type == OrderType.STOP:
+                brackets["stop_loss"] = order
+            elif order.order_type == OrderType.LIMIT:
+                brackets["target"] = order
+        return brackets
+    
+    async def _match_orders_async(self, symbol: str, quote: Dict[str, Any]):
+        """Match resting orders for a symbol and apply the resulting fills"""
+        async with self._order_lock:
+            fills = self.matching_engine.match(
+                symbol, quote, depth=self.get_order_book(symbol), contract_size=self.get_contract_size(symbol)
+            )
+            for fill in fills:
+                order = fill.order
+                if not order.is_active:
+                    continue  # Cancelled by an earlier fill in this batch (OCO / position closed)
+                
+                cancelled = self.matching_engine.record_fill(fill)
+                if not await self._apply_fill_async(fill):
+                    self.matching_engine.reject_fill(fill, order.notes or "Fill could not be applied")
+                    self.logger.error(f"❌ Order {order.id} rejected on fill: {order.notes}")
+                
+                await self._save_order(order)
+                for sibling in cancelled:
+                    await self._save_order(sibling)
+    
+    async def _apply_fill_async(self, fill: Fill) -> bool:
+        """Turn an order fill into a position open, increase, reduce or close"""
+        order = fill.order
+        self.logger.info(
+            f"⚡ Order fill: {order.order_type.value} {order.side} {fill.quantity} {order.symbol} "
+            f"at ${fill.price:.2f} ({fill.liquidity})"
+        )
+        
+        if order.reduce_only:
+            position = self._resolve_reduce_position(order)
+            if position is None:
+                order.notes = "No open position to reduce"
+                return False
+            if fill.quantity >= position.quantity - QUANTITY_EPSILON:
+                return await self.close_position_async(position.id, fill.price, order.notes or "Order Filled")
+            return await self._reduce_position_async(position, fill.quantity, fill.price)
+        
+        position = self.positions.get(order.position_id) if order.position_id else None
+        if position and position.status == PositionStatus.OPEN:
+            return await self._increase_position_async(position, fill.quantity, fill.price)
+        
+        trade_request = TradeRequest(
+            symbol=order.symbol,
+            signal=order.side,
+            price=fill.price,
+            quantity=fill.quantity,
+            leverage=order.leverage,
+            strategy_name=order.strategy_name,
+            confidence=order.confidence,
+            account_id=order.account_id
+        )
+        if await self.execute_trade_async(trade_request, walk_book=False):
+            self.matching_engine.attach_position(order, trade_request.position_id)
+            return True
+        order.notes = trade_request.error_message
+        return False
+    
+    def _resolve_reduce_position(self, order: Order) -> Optional[Position]:
+        """Open position a reduce-only order applies to (must be on the opposite side)"""
+        position = self.positions.get(order.position_id) if order.position_id else None
+        if position is None or position.status != PositionStatus.OPEN:
+            position = self.get_open_position_for_symbol(order.symbol, order.account_id)
+        if position is None:
+            return None
+        reduces = PositionType.LONG if order.side == "SELL" else PositionType.SHORT
+        return position if position.position_type == reduces else None
+    
+    async def _increase_position_async(self, position: Position, quantity: float, price: float) -> bool:
+        """Add a partial fill to the position its order opened (average entry price)"""
+        state = self._state_for(position.account_id)
+        account = state.account
+        margin_required = quantity * price / position.leverage
+        trading_fee = margin_required * state.trading_config["trading_fee_pct"]
+        if margin_required + trading_fee > account.current_balance:
+            return False
+        
+        total_quantity = position.quantity + quantity
+        position.entry_price = (position.entry_price * position.quantity + price * quantity) / total_quantity
+        position.quantity = total_quantity
+        position.invested_amount += quantity * price
+        position.margin_used += margin_required
+        position.trading_fee += trading_fee
+        
+        account.current_balance -= margin_required + trading_fee
+        account.total_margin_used += margin_required
+        account.brokerage_charges += trading_fee
+        
+        self._refresh_position_state(position, price)
+        await self._save_position(position)
+        await self._save_account(account)
+        return True
+    
+    async def _reduce_position_async(self, position: Position, quantity: float, price: float) -> bool:
+        """Close part of a position, realizing PnL and releasing margin pro rata"""
+        state = self._state_for(position.account_id)
+        account = state.account
+        fraction = quantity / position.quantity
+        direction = 1.0 if position.position_type == PositionType.LONG else -1.0
+        realized_pnl = (price - position.entry_price) * quantity * direction
+        margin_released = position.margin_used * fraction
+        entry_fee_share = position.trading_fee * fraction
+        exit_fee = entry_fee_share * state.trading_config["exit_fee_multiplier"]
+        
+        position.quantity -= quantity
+        position.invested_amount -= position.invested_amount * fraction
+        position.margin_used -= margin_released
+        position.trading_fee -= entry_fee_share
+        
+        account.current_balance += margin_released + realized_pnl - exit_fee
+        account.total_margin_used -= margin_released
+        account.brokerage_charges += exit_fee
+        account.realized_pnl += realized_pnl
+        position.realized_pnl += realized_pnl
+        self._record_realized_pnl(state, realized_pnl, datetime.now(timezone.utc))
+        
+        # The fill is journaled as a trade so the database aggregates can rebuild its PnL
+        trade_request = TradeRequest(
+            symbol=position.symbol,
+            signal="SELL" if direction > 0 else "BUY",
+            price=price,
+            quantity=quantity,
+            leverage=position.leverage,
+            strategy_name=position.strategy_name,
+            status=ExecutionStatus.COMPLETED,
+            position_id=position.id,
+            account_id=position.account_id,
+            realized_pnl=realized_pnl
+        )
+        
+        self._refresh_position_state(position, price)
+        await self._save_position(position)
+        await self.persistence.save_trade(trade_request.to_dict())
+        await self._save_account(account)
+        return True
+    
+    def _refresh_position_state(self, position: Position, price: float):
+        """Re-register a position whose size or entry changed with the columnar state"""
+        self._position_arrays.remove(position.id)
+        position.calculate_pnl(self._price_cache.get(position.symbol, {}).get("price") or price)
+        self._position_arrays.add(position, self._state_for(position.account_id).index)
+        self.position_index_version += 1
+    
+    async def get_account_summary_async(self, account_id: Optional[str] = None) -> Dict[str, Any]:
+        """Get account summary asynchronously with live PnL calculations (default account when no id)"""
+        state = self._account_state(account_id)
+        if not state:
+            return {}
+        account = state.account
+        
+        # Unrealized PnL is kept current by update_prices_async
+        total_unrealized_pnl, open_positive_pnl, open_negative_pnl = self._position_arrays.totals(state.index)
+        open_positions_count = sum(len(symbol_positions) for symbol_positions in state.open_by_symbol.values())
         
         # Calculate total portfolio value (balance + unrealized PnL)
-        total_portfolio_value = self.account.current_balance + total_unrealized_pnl
+        total_portfolio_value = account.current_balance + total_unrealized_pnl
         
         # Calculate total PnL (realized + unrealized)
-        total_pnl = self.account.realized_pnl + total_unrealized_pnl
+        total_pnl = account.realized_pnl + total_unrealized_pnl
         
         # Calculate total return percentage
         total_return_pct = 0.0
-        if self.account.initial_balance > 0:
-            total_return_pct = ((total_portfolio_value - self.account.initial_balance) / self.account.initial_balance) * 100
+        if account.initial_balance > 0:
+            total_return_pct = ((total_portfolio_value - account.initial_balance) / account.initial_balance) * 100
         
         # Calculate account growth (can be negative)
-        account_growth = total_portfolio_value - self.account.initial_balance
+        account_growth = total_portfolio_value - account.initial_balance
         account_growth_pct = 0.0
-        if self.account.initial_balance > 0:
-            account_growth_pct = (account_growth / self.account.initial_balance) * 100
-        
-        # Calculate daily win rate from today's closed positions
-        today_date = datetime.now(timezone.utc).strftime('%Y-%m-%d')
-        today_closed_positions = []
-        daily_profitable_trades = 0
-        daily_total_trades = 0
-        
-        for position in self.positions.values():
-            if (position.status == PositionStatus.CLOSED and 
-                position.exit_time and 
-                position.exit_time.strftime('%Y-%m-%d') == today_date):
-                today_closed_positions.append(position)
-                daily_total_trades += 1
-                if position.pnl > 0:
-                    daily_profitable_trades += 1
+        if account.initial_balance > 0:
+            account_growth_pct = (account_growth / account.initial_balance) * 100
+        
+        # Daily win rate from today's UTC bucket
+        daily_total_trades, daily_profitable_trades = state.daily_closed.get(
+            datetime.now(timezone.utc).strftime('%Y-%m-%d'), (0, 0)
+        )
         
         daily_win_rate = 0.0
         if daily_total_trades > 0:
             daily_win_rate = (daily_profitable_trades / daily_total_trades) * 100
         
-        # Calculate total positive and negative P&L from all positions
-        total_positive_pnl = 0.0
-        total_negative_pnl = 0.0
-        
-        for position in self.positions.values():
-            pnl = position.pnl
-            if pnl > 0:
-                total_positive_pnl += pnl
-            elif pnl < 0:
-                total_negative_pnl += pnl
+        # Total positive and negative P&L across all positions (closed + open)
+        total_positive_pnl = state.closed_positive_pnl + open_positive_pnl
+        total_negative_pnl = state.closed_negative_pnl + open_negative_pnl
         
         summary = {
-            "account_id": self.account.id,
-            "name": self.account.name,
-            "initial_balance": self.account.initial_balance,
-            "current_balance": self.account.current_balance,
-            "available_balance": self.account.current_balance,  # For frontend compatibility
+            "account_id": account.id,
+            "name": account.name,
+            "initial_balance": account.initial_balance,
+            "current_balance": account.current_balance,
+            "available_balance": account.current_balance,  # For frontend compatibility
             "total_balance": total_portfolio_value,  # Balance + unrealized PnL
-            "total_trades": self.account.total_trades,
-            "profitable_trades": self.account.profitable_trades,
-            "losing_trades": self.account.losing_trades,
-            "win_rate": self.account.win_rate,
+            "total_trades": account.total_trades,
+            "profitable_trades": account.profitable_trades,
+            "losing_trades": account.losing_trades,
+            "win_rate": account.win_rate,
             "daily_win_rate": daily_win_rate,
             "daily_profitable_trades": daily_profitable_trades,
             "daily_losing_trades": daily_total_trades - daily_profitable_trades,
-            "realized_pnl": self.account.realized_pnl,
+            "realized_pnl": account.realized_pnl,
             "unrealized_pnl": total_unrealized_pnl,
             "total_pnl": total_pnl,  # Realized + Unrealized
             "total_return_percentage": total_return_pct,
             "account_growth": account_growth,  # Can be negative
             "account_growth_percentage": account_growth_pct,  # Can be negative
-            "daily_trades_count": self.account.daily_trades_count,
-            "daily_trades_limit": self.account.daily_trades_limit,
-            "total_margin_used": self.account.total_margin_used,
+            "daily_trades_count": account.daily_trades_count,
+            "daily_trades_limit": account.daily_trades_limit,
+            "total_margin_used": account.total_margin_used,
             "total_positive_pnl": total_positive_pnl,
             "total_negative_pnl": total_negative_pnl,
-            "brokerage_charges": self.account.brokerage_charges,
-            "open_positions": len(open_positions),  # Frontend compatible
-            "open_positions_count": len(open_positions),
+            "brokerage_charges": account.brokerage_charges,
+            "open_positions": open_positions_count,  # Frontend compatible
+            "open_positions_count": open_positions_count,
             "last_updated": datetime.now(timezone.utc).isoformat()
         }
         
         return summary
     
-    async def get_positions_summary_async(self) -> Dict[str, Any]:
-        """Get positions summary asynchronously with enhanced position data"""
+    async def get_positions_summary_async(self, account_id: Optional[str] = None) -> Dict[str, Any]:
+        """Get positions summary asynchronously with enhanced position data (default account when no id)"""
+        state = self._account_state(account_id)
+        if not state:
+            return {}
+        account_id = account_id or DEFAULT_ACCOUNT_ID
         open_positions = []
         closed_positions = []
         total_unrealized_pnl = 0.0
         
-        for position in self.positions.values():
+        recent_closed = await self.get_closed_positions_async(limit=10, account_id=account_id)
+        for position in self.get_open_positions(account_id) + recent_closed:
             pos_data = position.to_dict()
             
             # Add current price and recalculate PnL for live positions
@@ -454,6 +1087,7 @@ class AsyncBroker:
                 # Recalculate PnL with current price for open positions
                 if position.status == PositionStatus.OPEN and current_price > 0:
                     position.calculate_pnl(current_price)
+                    self._position_arrays.set_pnl(position)
                     pos_data["pnl"] = position.pnl
                     pos_data["pnl_percentage"] = position.pnl_percentage
                     total_unrealized_pnl += position.pnl
@@ -469,7 +1103,7 @@ class AsyncBroker:
                 "open_time": position.entry_time.isoformat() if position.entry_time else None,
                 "exit_time": position.exit_time.isoformat() if position.exit_time else None,
                 "running_time": self._calculate_running_time(position) if position.status == PositionStatus.OPEN else None,
-                "margin_usage_pct": position.calculate_margin_usage(pos_data["current_price"], self.account.current_balance) if position.status == PositionStatus.OPEN else 0.0
+                "margin_usage_pct": position.calculate_margin_usage(pos_data["current_price"], state.account.current_balance) if position.status == PositionStatus.OPEN else 0.0
             })
             
             if position.status == PositionStatus.OPEN:
@@ -483,9 +1117,9 @@ class AsyncBroker:
         
         return {
             "open_positions": open_positions,
-            "closed_positions": closed_positions[:10],  # Last 10
+            "closed_positions": closed_positions,  # Last 10
             "total_open": len(open_positions),
-            "total_closed": len(closed_positions),
+            "total_closed": state.closed_count,
             "total_unrealized_pnl": total_unrealized_pnl
         }
     
@@ -508,49 +1142,213 @@ class AsyncBroker:
         else:
             return f"{minutes}m"
     
-    def has_open_position_for_symbol(self, symbol: str) -> bool:
-        """Check if there's already an open position for the given symbol"""
-        try:
-            for position in self.positions.values():
-                if position.symbol == symbol and position.status == PositionStatus.OPEN:
-                    return True
-            return False
-        except Exception as e:
-            self.logger.error(f"Error checking open position for {symbol}: {e}")
-            return False
+    def _index_position(self, position: Position):
+        """Add an open position to the open-position indexes"""
+        if position.status == PositionStatus.OPEN:
+            state = self._state_for(position.account_id)
+            self._open_positions[position.id] = position
+            self._open_by_symbol.setdefault(position.symbol, {})[position.id] = position
+            state.open_by_symbol.setdefault(position.symbol, {})[position.id] = position
+            self._position_arrays.add(position, state.index)
+            self.position_index_version += 1
+    
+    def _unindex_position(self, position: Position):
+        """Remove a position from the open-position indexes"""
+        self._open_positions.pop(position.id, None)
+        for open_by_symbol in (self._open_by_symbol, self._state_for(position.account_id).open_by_symbol):
+            symbol_positions = open_by_symbol.get(position.symbol)
+            if symbol_positions is not None:
+                symbol_positions.pop(position.id, None)
+                if not symbol_positions:
+                    del open_by_symbol[position.symbol]
+        
+        # Drop the open contribution from running aggregates
+        self._position_arrays.remove(position.id)
+        self.position_index_version += 1
+    
+    def _retain_closed_position(self, position: Position):
+        """Keep a closed position in the recent window, evicting the oldest beyond the limit"""
+        self.positions[position.id] = position
+        self._recent_closed[position.id] = position
+        self._recent_closed.move_to_end(position.id)
+        while len(self._recent_closed) > self._max_closed_in_memory:
+            evicted_id, _ = self._recent_closed.popitem(last=False)
+            self.positions.pop(evicted_id, None)
+            self._position_cache.pop(evicted_id, None)
     
-    def get_open_position_for_symbol(self, symbol: str) -> Optional[Position]:
-        """Get the open position for a specific symbol if it exists"""
+    async def get_position_async(self, position_id: str) -> Optional[Position]:
+        """Get a position by id, falling back to MongoDB for archived closed positions"""
+        position = self.positions.get(position_id)
+        if position is not None:
+            return position
         try:
-            for position in self.positions.values():
-                if position.symbol == symbol and position.status == PositionStatus.OPEN:
-                    return position
-            return None
+            position_data = await self.mongodb_client.find_document(
+                self.mongodb_client.positions_collection, {"id": position_id}
+            )
+            return Position.from_dict(position_data) if position_data else None
         except Exception as e:
-            self.logger.error(f"Error getting open position for {symbol}: {e}")
+            self.logger.error(f"Error fetching archived position {position_id}: {e}")
             return None
     
-    def get_open_positions_count_by_symbol(self) -> Dict[str, int]:
-        """Get count of open positions grouped by symbol"""
+    async def get_closed_positions_async(self, limit: int = 50, skip: int = 0,
+                                         account_id: Optional[str] = None) -> List[Position]:
+        """Get closed positions newest first (optionally of one account); served from memory when inside the recent window"""
+        window = [
+            position for position in reversed(self._recent_closed.values())
+            if account_id is None or position.account_id == account_id
+        ]
+        if skip + limit <= len(window) or len(window) >= self.get_closed_count(account_id):
+            return window[skip:skip + limit]
         try:
-            symbol_counts = {}
-            for position in self.positions.values():
-                if position.status == PositionStatus.OPEN:
-                    symbol = position.symbol
-                    symbol_counts[symbol] = symbol_counts.get(symbol, 0) + 1
-            return symbol_counts
+            positions_data = await self.mongodb_client.load_recent_closed_positions(skip + limit, account_id)
+            return [Position.from_dict(data) for data in positions_data[skip:]]
         except Exception as e:
-            self.logger.error(f"Error getting position counts by symbol: {e}")
+            self.logger.error(f"Error fetching closed positions: {e}")
+            return []
+    
+    def get_closed_count(self, account_id: Optional[str] = None) -> int:
+        """Closed positions over the full history, of one account or of all accounts"""
+        if account_id is None:
+            return self._closed_total
+        state = self._account_state(account_id)
+        return state.closed_count if state else 0
+    
+    def _reset_aggregates(self):
+        """Reset running PnL aggregates"""
+        # Columnar open-position state of all accounts; also tracks open PnL totals per account
+        self._position_arrays = PositionArrays()
+        for state in self.accounts.values():
+            state.reset_aggregates()
+    
+    def _record_closed_position(self, position: Position):
+        """Add a closed position to its account's realized aggregates and UTC day bucket"""
+        state = self._state_for(position.account_id)
+        state.closed_count += 1
+        self._record_realized_pnl(state, position.pnl, position.exit_time)
+    
+    def _record_realized_pnl(self, state: AccountState, pnl: float, closed_at: Optional[datetime]):
+        """Add realized PnL (a close or a partial fill) to the PnL aggregates and its UTC day bucket"""
+        if pnl > 0:
+            state.closed_positive_pnl += pnl
+        elif pnl < 0:
+            state.closed_negative_pnl += pnl
+        
+        if closed_at:
+            day = closed_at.strftime('%Y-%m-%d')
+            closed, profitable = state.daily_closed.get(day, (0, 0))
+            state.daily_closed[day] = (closed + 1, profitable + (1 if pnl > 0 else 0))
+            # Keep only the most recent day buckets
+            if len(state.daily_closed) > 7:
+                state.daily_closed.pop(min(state.daily_closed))
+    
+    def get_open_positions(self, account_id: Optional[str] = None) -> List[Position]:
+        """Get open positions of one account, or of all accounts when no id is given"""
+        self._position_arrays.sync()
+        if account_id is None:
+            return list(self._open_positions.values())
+        state = self._account_state(account_id)
+        if not state:
+            return []
+        return [position for symbol_positions in state.open_by_symbol.values() for position in symbol_positions.values()]
+    
+    def get_account_exposure(self, account_id: Optional[str] = None) -> Dict[str, Any]:
+        """Open margin, open position count and unrealized PnL of an account from running aggregates"""
+        state = self._account_state(account_id)
+        if state is None:
+            return {"margin_used": 0.0, "open_positions": 0, "unrealized_pnl": 0.0}
+        margin_used, open_count = self._position_arrays.exposure(state.index)
+        unrealized_pnl, _, _ = self._position_arrays.totals(state.index)
+        return {"margin_used": margin_used, "open_positions": open_count, "unrealized_pnl": unrealized_pnl}
+    
+    def get_notional_exposures(self) -> Tuple[np.ndarray, List[str], List[str]]:
+        """Signed notional matrix of open positions (accounts x symbols) with its account ids and symbols"""
+        matrix, symbols = self._position_arrays.notional_matrix(len(self.accounts))
+        return matrix, list(self.accounts), symbols
+    
+    def get_open_positions_for_symbol(self, symbol: str, account_id: Optional[str] = None) -> List[Position]:
+        """Get open positions for a symbol (all accounts when no id is given)"""
+        self._position_arrays.sync()
+        if account_id is None:
+            return list(self._open_by_symbol.get(symbol, {}).values())
+        state = self._account_state(account_id)
+        return list(state.open_by_symbol.get(symbol, {}).values()) if state else []
+    
+    def has_open_position_for_symbol(self, symbol: str, account_id: str = DEFAULT_ACCOUNT_ID) -> bool:
+        """Check if there's already an open position for the given symbol in an account"""
+        state = self._account_state(account_id)
+        return bool(state and state.open_by_symbol.get(symbol))
+    
+    def get_open_position_for_symbol(self, symbol: str, account_id: str = DEFAULT_ACCOUNT_ID) -> Optional[Position]:
+        """Get an account's open position for a specific symbol if it exists"""
+        state = self._account_state(account_id)
+        symbol_positions = state.open_by_symbol.get(symbol) if state else None
+        if not symbol_positions:
+            return None
+        position = next(iter(symbol_positions.values()))
+        self._position_arrays.sync(position.id)
+        return position
+    
+    def get_order_book(self, symbol: str):
+        """Get the in-sync L2 order book for a symbol, if the book feed is enabled"""
+        if self.order_book_manager is None:
+            return None
+        return self.order_book_manager.get_book(symbol)
+    
+    def get_contract_size(self, symbol: str) -> float:
+        """Coins per contract (L2 and quote sizes are in contracts): configured, from the ticker, or 1"""
+        configured = self.settings.L2_CONTRACT_SIZES.get(symbol)
+        if configured:
+            return configured
+        quote = self._price_cache.get(symbol) or {}
+        if quote.get("contract_value"):
+            return quote["contract_value"]
+        # Ticker open interest is reported both in coins and in contracts
+        if quote.get("open_interest") and quote.get("oi_contracts"):
+            return quote["open_interest"] / quote["oi_contracts"]
+        return 1.0
+    
+    def estimate_fill(self, symbol: str, signal: str, quantity: float) -> Optional[Dict[str, Any]]:
+        """Estimate market-order fill price (VWAP) and slippage from the L2 book (quantity in coins)"""
+        book = self.get_order_book(symbol)
+        if book is None:
+            return None
+        contract_size = self.get_contract_size(symbol)
+        estimate = book.vwap_for_size(signal, quantity / contract_size)
+        estimate["filled_size"] *= contract_size
+        estimate["requested_size"] = quantity
+        return estimate
+    
+    def _apply_book_fill(self, trade_request: TradeRequest):
+        """Price a market trade at the book VWAP for its size, capped at the size the book holds"""
+        estimate = self.estimate_fill(trade_request.symbol, trade_request.signal, trade_request.quantity)
+        if not estimate or estimate["vwap"] is None:
+            return
+        if not estimate["fully_filled"]:
+            self.logger.warning(
+                f"⚠️ Book too thin for {trade_request.quantity:.6f} {trade_request.symbol}, "
+                f"filling {estimate['filled_size']:.6f}"
+            )
+            trade_request.quantity = estimate["filled_size"]
+        trade_request.price = estimate["vwap"]
+        trade_request.slippage_bps = estimate["slippage_bps"]
+    
+    def get_open_positions_count_by_symbol(self, account_id: str = DEFAULT_ACCOUNT_ID) -> Dict[str, int]:
+        """Get count of an account's open positions grouped by symbol"""
+        state = self._account_state(account_id)
+        if not state:
             return {}
+        return {symbol: len(symbol_positions) for symbol, symbol_positions in state.open_by_symbol.items()}
     
     async def delete_all_data(self) -> bool:
         """Delete all trading data from MongoDB"""
         try:
+            await self.persistence.clear()
             success = await self.mongodb_client.delete_all_data()
             if success:
-                # Reset in-memory data
-                self.positions.clear()
-                self._position_cache.clear()
+                # Reset in-memory and local state
+                await self.state_store.reset()
+                self._clear_in_memory_state()
+                self.accounts.clear()
                 self._price_cache.clear() # Clear price cache as well
                 self._trade_stats = {
                     "total_requests": 0,
@@ -559,8 +1357,10 @@ class AsyncBroker:
                     "avg_execution_time": 0.0
                 }
                 
-                # Reinitialize account
+                # Reinitialize accounts
                 await self._initialize_account()
+                await self._initialize_extra_accounts()
+                await self._write_snapshot()
                 
                 self.logger.info("✅ All trading data deleted successfully")
                 return True
@@ -589,7 +1389,7 @@ class AsyncBroker:
             trade_request.error_message = f"Invalid quantity: {trade_request.quantity}"
             return False
         
-        min_conf = self.trading_config["min_confidence"]
+        min_conf = self.get_account_config(trade_request.account_id)["min_confidence"]
         if trade_request.confidence < min_conf:
             trade_request.error_message = f"Low confidence: {trade_request.confidence}% (minimum: {min_conf}%)"
             return False
@@ -599,80 +1399,87 @@ class AsyncBroker:
     
     def _check_risk_limits(self, trade_request: TradeRequest) -> bool:
         """Check risk management limits"""
-        if not self.account:
-            trade_request.error_message = "No account available"
+        state = self._account_state(trade_request.account_id)
+        if not state:
+            trade_request.error_message = f"No account available: {trade_request.account_id}"
             return False
+        account = state.account
         
         # Check daily trade limits
         today = datetime.now(timezone.utc).strftime('%Y-%m-%d')
-        if self.account.last_trade_date != today:
-            self.account.daily_trades_count = 0
-            self.account.last_trade_date = today
+        if account.last_trade_date != today:
+            account.daily_trades_count = 0
+            account.last_trade_date = today
         
-        if self.account.daily_trades_count >= self.account.daily_trades_limit:
-            trade_request.error_message = f"Daily trade limit reached: {self.account.daily_trades_count}/{self.account.daily_trades_limit}"
+        if account.daily_trades_count >= account.daily_trades_limit:
+            trade_request.error_message = f"Daily trade limit reached: {account.daily_trades_count}/{account.daily_trades_limit}"
             return False
         
         # Position value calculation (no size limits, handled by risk manager)
         position_value = trade_request.price * trade_request.quantity
         
         # Check if position already exists for symbol
-        for position in self.positions.values():
-            if position.symbol == trade_request.symbol and position.status == PositionStatus.OPEN:
-                trade_request.error_message = f"Position already open for {trade_request.symbol}"
-                return False
+        if state.open_by_symbol.get(trade_request.symbol):
+            trade_request.error_message = f"Position already open for {trade_request.symbol}"
+            return False
         
         return True
     
     async def _execute_trade_simple(self, trade_request: TradeRequest) -> bool:
         """Execute trade with dummy data and MongoDB persistence"""
         try:
+            state = self._account_state(trade_request.account_id)
+            account = state.account
+            trading_config = state.trading_config
+            
             # Calculate position details
             position_value = trade_request.price * trade_request.quantity
             margin_required = position_value / trade_request.leverage
-            trading_fee = margin_required * self.trading_config["trading_fee_pct"]
+            trading_fee = margin_required * trading_config["trading_fee_pct"]
             
             # Check if we have enough balance
             total_required = margin_required + trading_fee
-            if total_required > self.account.current_balance:
-                trade_request.error_message = f"Insufficient balance: need ${total_required:.2f}, have ${self.account.current_balance:.2f}"
+            if total_required > account.current_balance:
+                trade_request.error_message = f"Insufficient balance: need ${total_required:.2f}, have ${account.current_balance:.2f}"
                 return False
             
             # Create position
             position = Position()
+            position.account_id = trade_request.account_id
             position.symbol = trade_request.symbol
             position.position_type = PositionType.LONG if trade_request.signal == 'BUY' else PositionType.SHORT
             position.entry_price = trade_request.price
             position.quantity = trade_request.quantity
             position.invested_amount = position_value
             position.strategy_name = trade_request.strategy_name
-            position.leverage = trade_request.leverage if trade_request.leverage and trade_request.leverage > 0 else self.trading_config["default_leverage"]
+            position.leverage = trade_request.leverage if trade_request.leverage and trade_request.leverage > 0 else trading_config["default_leverage"]
             position.margin_used = margin_required
             position.trading_fee = trading_fee
             
             # Calculate risk levels using config settings
             if position.position_type == PositionType.LONG:
-                position.stop_loss = trade_request.price * (1 - self.trading_config["stop_loss_pct"])
-                position.target = trade_request.price * (1 + self.trading_config["target_pct"])
+                position.stop_loss = trade_request.price * (1 - trading_config["stop_loss_pct"])
+                position.target = trade_request.price * (1 + trading_config["target_pct"])
             else:
-                position.stop_loss = trade_request.price * (1 + self.trading_config["stop_loss_pct"])
-                position.target = trade_request.price * (1 - self.trading_config["target_pct"])
+                position.stop_loss = trade_request.price * (1 + trading_config["stop_loss_pct"])
+                position.target = trade_request.price * (1 - trading_config["target_pct"])
             
             # Calculate initial PnL
             position.calculate_pnl(trade_request.price)
             
             # Update account
-            self.account.current_balance -= total_required
-            self.account.total_margin_used += margin_required
-            self.account.brokerage_charges += trading_fee
-            self.account.total_trades += 1
-            self.account.daily_trades_count += 1
+            account.current_balance -= total_required
+            account.total_margin_used += margin_required
+            account.brokerage_charges += trading_fee
+            account.total_trades += 1
+            account.daily_trades_count += 1
             
             # Save position to MongoDB
-            await self.mongodb_client.save_position(position.to_dict())
+            await self._save_position(position)
             
             # Save position to memory
             self.positions[position.id] = position
+            self._index_position(position)
             trade_request.position_id = position.id
             
             return True
@@ -688,31 +1495,43 @@ class AsyncBroker:
             if not position or position.status != PositionStatus.OPEN:
                 return False
             
+            state = self._state_for(position.account_id)
+            account = state.account
+            trading_config = state.trading_config
+            
             # Close position
             position.close_position(exit_price)
             position.notes = reason
+            self._unindex_position(position)
+            self._record_closed_position(position)
+            self._closed_total += 1
+            self._retain_closed_position(position)
+            
+            # Resting orders tied to the position (brackets, unfilled entry remainder) go with it
+            for order in self.matching_engine.cancel_position_orders(position_id, f"Position closed: {reason}"):
+                await self._save_order(order)
             
             # Calculate exit fee
-            exit_fee = position.trading_fee * self.trading_config["exit_fee_multiplier"]
+            exit_fee = position.trading_fee * trading_config["exit_fee_multiplier"]
             
             # Update account
-            self.account.current_balance += position.margin_used + position.pnl - exit_fee
-            self.account.total_margin_used -= position.margin_used
+            account.current_balance += position.margin_used + position.pnl - exit_fee
+            account.total_margin_used -= position.margin_used
             
             if exit_fee > 0:
-                self.account.brokerage_charges += exit_fee
+                account.brokerage_charges += exit_fee
             
             # Update realized P&L and statistics
-            self.account.realized_pnl += position.pnl
+            account.realized_pnl += position.pnl
             
             if position.pnl > 0:
-                self.account.profitable_trades += 1
+                account.profitable_trades += 1
             else:
-                self.account.losing_trades += 1
+                account.losing_trades += 1
             
             # Calculate win rate
-            if self.account.total_trades > 0:
-                self.account.win_rate = (self.account.profitable_trades / self.account.total_trades) * 100
+            if account.total_trades > 0:
+                account.win_rate = (account.profitable_trades / account.total_trades) * 100
             
             return True
             
@@ -721,12 +1540,10 @@ class AsyncBroker:
             return False
     
     def _update_position_pnls(self, prices: Dict[str, Dict]):
-        """Update position PnLs with new prices"""
-        for position in self.positions.values():
-            if position.symbol in prices and position.status == PositionStatus.OPEN:
-                current_price = prices[position.symbol].get("price", 0.0)
-                if current_price > 0:
-                    position.calculate_pnl(current_price)
+        """Update position PnLs with new prices (one vectorized pass over open positions)"""
+        self._position_arrays.mark_to_market(
+            {symbol: price_dict.get("price", 0.0) for symbol, price_dict in prices.items()}
+        )
     
     def _update_cache(self, cache, key, value):
         cache[key] = value
@@ -737,8 +1554,12 @@ class AsyncBroker:
         """Get performance statistics"""
         return {
             **self._trade_stats,
-            "total_positions": len(self.positions),
-            "open_positions": len([p for p in self.positions.values() if p.status == PositionStatus.OPEN]),
+            "total_positions": len(self._open_positions) + self._closed_total,
+            "positions_in_memory": len(self.positions),
+            "open_positions": len(self._open_positions),
             "account_balance": self.account.current_balance if self.account else 0.0,
-            "mongodb_connected": self.mongodb_client.is_connected
+            "accounts": len(self.accounts),
+            "mongodb_connected": self.mongodb_client.is_connected,
+            "orders": self.matching_engine.get_stats(),
+            "persistence": self.persistence.get_stats()
         } 
\ No newline at end of file
@@ -0,0 +1,221 @@
+"""
+Columnar open-position state for vectorized mark-to-market
+Keeps entry price, quantity, side, invested amount and leverage of open positions in
+parallel NumPy arrays so one price update re-marks every affected position in a single pass
+(across all broker accounts, with running PnL, margin and open-count totals kept per account)
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.broker.models import Position, PositionType
+
+
+class PositionArrays:
+    """Dense parallel arrays of open positions (swap-remove keeps slots contiguous)
+
+    ``Position`` objects stay the public view: PnL computed in the arrays is written
+    back lazily by ``sync`` before positions are handed to callers.
+    """
+
+    def __init__(self, capacity: int = 256):
+        self.capacity = capacity
+        self.size = 0
+        self.entry_price = np.zeros(capacity, dtype=np.float64)
+        self.quantity = np.zeros(capacity, dtype=np.float64)
+        self.side = np.zeros(capacity, dtype=np.float64)  # +1 long, -1 short
+        self.invested_amount = np.zeros(capacity, dtype=np.float64)
+        self.leverage = np.zeros(capacity, dtype=np.float64)
+        self.margin_used = np.zeros(capacity, dtype=np.float64)
+        self.symbol_id = np.zeros(capacity, dtype=np.int32)
+        self.account_id = np.zeros(capacity, dtype=np.int32)
+        self.pnl = np.zeros(capacity, dtype=np.float64)
+        self.pnl_percentage = np.zeros(capacity, dtype=np.float64)
+        self.dirty = np.zeros(capacity, dtype=bool)
+
+        self.positions: List[Optional[Position]] = [None] * capacity
+        self.slot_of: Dict[str, int] = {}
+        self.symbol_ids: Dict[str, int] = {}
+
+        # Running aggregates over open positions: rows are unrealized / positive / negative PnL,
+        # margin used and open count; columns are account indexes
+        self.account_totals = np.zeros((5, 4), dtype=np.float64)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def _symbol_id(self, symbol: str) -> int:
+        sid = self.symbol_ids.get(symbol)
+        if sid is None:
+            sid = self.symbol_ids[symbol] = len(self.symbol_ids)
+        return sid
+
+    def _grow(self):
+        new_capacity = self.capacity * 2
+        for name in ("entry_price", "quantity", "side", "invested_amount", "leverage", "margin_used",
+                     "symbol_id", "account_id", "pnl", "pnl_percentage", "dirty"):
+            old = getattr(self, name)
+            new = np.zeros(new_capacity, dtype=old.dtype)
+            new[:self.size] = old[:self.size]
+            setattr(self, name, new)
+        self.positions.extend([None] * (new_capacity - self.capacity))
+        self.capacity = new_capacity
+
+    def _ensure_account(self, account_index: int):
+        columns = self.account_totals.shape[1]
+        if account_index >= columns:
+            grown = np.zeros((5, max(columns * 2, account_index + 1)), dtype=np.float64)
+            grown[:, :columns] = self.account_totals
+            self.account_totals = grown
+
+    def _apply_aggregate_delta(self, account_index: int, old: float, new: float):
+        totals = self.account_totals
+        totals[0, account_index] += new - old
+        totals[1, account_index] += max(new, 0.0) - max(old, 0.0)
+        totals[2, account_index] += min(new, 0.0) - min(old, 0.0)
+
+    def add(self, position: Position, account_index: int = 0):
+        """Add an open position owned by the account at ``account_index``"""
+        if position.id in self.slot_of:
+            self.set_pnl(position)
+            return
+        if self.size == self.capacity:
+            self._grow()
+        slot = self.size
+        self.entry_price[slot] = position.entry_price
+        self.quantity[slot] = position.quantity
+        self.side[slot] = 1.0 if position.position_type == PositionType.LONG else -1.0
+        self.invested_amount[slot] = position.invested_amount
+        self.leverage[slot] = position.leverage
+        self.margin_used[slot] = position.margin_used
+        self.symbol_id[slot] = self._symbol_id(position.symbol)
+        self.account_id[slot] = account_index
+        self.pnl[slot] = position.pnl
+        self.pnl_percentage[slot] = position.pnl_percentage
+        self.dirty[slot] = False
+        self.positions[slot] = position
+        self.slot_of[position.id] = slot
+        self.size += 1
+        self._ensure_account(account_index)
+        self._apply_aggregate_delta(account_index, 0.0, position.pnl)
+        self.account_totals[3, account_index] += position.margin_used
+        self.account_totals[4, account_index] += 1
+
+    def remove(self, position_id: str):
+        """Remove a position, moving the last slot into its place"""
+        slot = self.slot_of.pop(position_id, None)
+        if slot is None:
+            return
+        account_index = int(self.account_id[slot])
+        self._apply_aggregate_delta(account_index, float(self.pnl[slot]), 0.0)
+        self.account_totals[3, account_index] -= self.margin_used[slot]
+        self.account_totals[4, account_index] -= 1
+        last = self.size - 1
+        if slot != last:
+            for array in (self.entry_price, self.quantity, self.side, self.invested_amount, self.leverage,
+                          self.margin_used, self.symbol_id, self.account_id, self.pnl, self.pnl_percentage, self.dirty):
+                array[slot] = array[last]
+            moved = self.positions[last]
+            self.positions[slot] = moved
+            self.slot_of[moved.id] = slot
+        self.positions[last] = None
+        self.size = last
+
+    def set_pnl(self, position: Position):
+        """Record a PnL computed on the Position object itself"""
+        slot = self.slot_of.get(position.id)
+        if slot is None:
+            return
+        self._apply_aggregate_delta(int(self.account_id[slot]), float(self.pnl[slot]), position.pnl)
+        self.pnl[slot] = position.pnl
+        self.pnl_percentage[slot] = position.pnl_percentage
+        self.dirty[slot] = False
+
+    def mark_to_market(self, prices: Dict[str, float]) -> int:
+        """Re-mark every open position whose symbol has a price; returns positions updated"""
+        n = self.size
+        if n == 0:
+            return 0
+        price_by_symbol = np.full(len(self.symbol_ids), np.nan)
+        for symbol, price in prices.items():
+            sid = self.symbol_ids.get(symbol)
+            if sid is not None and price > 0:
+                price_by_symbol[sid] = price
+        if np.isnan(price_by_symbol).all():
+            return 0
+
+        current = price_by_symbol[self.symbol_id[:n]]
+        mask = ~np.isnan(current)
+        slots = np.flatnonzero(mask)
+        if slots.size == 0:
+            return 0
+
+        old_pnl = self.pnl[slots]
+        new_pnl = (current[slots] - self.entry_price[slots]) * self.quantity[slots] * self.side[slots]
+        invested = self.invested_amount[slots]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            new_pct = np.where(invested > 0, new_pnl / invested * 100, 0.0)
+
+        # Per-account running totals in one bincount per aggregate
+        accounts = self.account_id[slots]
+        columns = self.account_totals.shape[1]
+        self.account_totals[0] += np.bincount(accounts, weights=new_pnl - old_pnl, minlength=columns)
+        self.account_totals[1] += np.bincount(
+            accounts, weights=np.maximum(new_pnl, 0.0) - np.maximum(old_pnl, 0.0), minlength=columns)
+        self.account_totals[2] += np.bincount(
+            accounts, weights=np.minimum(new_pnl, 0.0) - np.minimum(old_pnl, 0.0), minlength=columns)
+
+        self.pnl[slots] = new_pnl
+        self.pnl_percentage[slots] = new_pct
+        self.dirty[slots] = True
+        return int(slots.size)
+
+    def sync(self, position_id: Optional[str] = None):
+        """Write array PnL back to Position objects (one position or all dirty slots)"""
+        if position_id is not None:
+            slot = self.slot_of.get(position_id)
+            slots = [slot] if slot is not None and self.dirty[slot] else []
+        else:
+            slots = np.flatnonzero(self.dirty[:self.size]).tolist()
+        for slot in slots:
+            position = self.positions[slot]
+            position.pnl = float(self.pnl[slot])
+            position.pnl_percentage = float(self.pnl_percentage[slot])
+            self.dirty[slot] = False
+
+    def totals(self, account_index: Optional[int] = None) -> Tuple[float, float, float]:
+        """(unrealized, positive, negative) PnL over open positions of one account (or all)"""
+        if account_index is None:
+            unrealized, positive, negative = self.account_totals[:3].sum(axis=1)
+        elif account_index < self.account_totals.shape[1]:
+            unrealized, positive, negative = self.account_totals[:3, account_index]
+        else:
+            return 0.0, 0.0, 0.0
+        return float(unrealized), float(positive), float(negative)
+
+    def exposure(self, account_index: int) -> Tuple[float, int]:
+        """(margin used, open positions) of one account"""
+        if account_index >= self.account_totals.shape[1]:
+            return 0.0, 0
+        return float(self.account_totals[3, account_index]), int(round(self.account_totals[4, account_index]))
+
+    def notional_matrix(self, accounts: int) -> Tuple[np.ndarray, List[str]]:
+        """Signed notional at the latest mark per (account, symbol), with the symbol of each column"""
+        n = self.size
+        matrix = np.zeros((accounts, len(self.symbol_ids)))
+        if n:
+            quantity = self.quantity[:n]
+            side = self.side[:n]
+            # Latest mark recovered from array PnL: pnl = (mark - entry) * quantity * side
+            with np.errstate(divide="ignore", invalid="ignore"):
+                mark = self.entry_price[:n] + np.where(quantity > 0, self.pnl[:n] / (quantity * side), 0.0)
+            np.add.at(matrix, (self.account_id[:n], self.symbol_id[:n]), side * quantity * mark)
+        return matrix, list(self.symbol_ids)
+
+    def clear(self):
+        """Remove all positions"""
+        self.size = 0
+        self.positions = [None] * self.capacity
+        self.slot_of.clear()
+        self.account_totals[:] = 0.0
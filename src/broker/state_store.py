@@ -0,0 +1,256 @@
+"""
+Local snapshot + write-ahead log of broker state
+Lets the broker restart in milliseconds without MongoDB: the latest snapshot is
+loaded and every change logged since then is replayed on top of it
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional
+
+from src.config import get_settings
+
+
+SNAPSHOT_VERSION = 1
+
+# Record kinds (top-level sections of the snapshot)
+STATE_SECTIONS = ("accounts", "positions", "orders", "trailing")
+
+
+class BrokerStateStore:
+    """Compact JSON snapshot plus a JSONL write-ahead log of keyed upserts
+
+    - ``append`` buffers one change (``None`` data deletes the key); buffered records are
+      written and fsynced together every ``sync_interval`` seconds off the event loop
+      (group commit, as in WriteBehindQueue)
+    - ``mark_changed`` notes a high-frequency change (e.g. a trailing-stop ratchet) that is
+      kept in memory and only carried by the next snapshot, without a log write
+    - ``write_snapshot`` serializes a copied state and atomically replaces the snapshot and
+      truncates the log in a worker thread
+    - ``load`` returns the snapshot with the log replayed over it (torn last lines are skipped)
+    """
+
+    def __init__(self, snapshot_path: Optional[str] = None, wal_path: Optional[str] = None):
+        self.settings = get_settings()
+        self.logger = logging.getLogger("broker.state_store")
+
+        self.snapshot_path = snapshot_path or self.settings.STATE_SNAPSHOT_PATH
+        self.wal_path = wal_path or self.settings.STATE_WAL_PATH
+        self.fsync = self.settings.PERSISTENCE_JOURNAL_FSYNC
+        self.max_wal_records = self.settings.STATE_SNAPSHOT_MAX_WAL_RECORDS
+        self.sync_interval = self.settings.PERSISTENCE_JOURNAL_SYNC_INTERVAL
+
+        self._wal = None
+        self._buffer: List[str] = []
+        self._lock: Optional[asyncio.Lock] = None
+        self._sync_task: Optional[asyncio.Task] = None
+        self.records_since_snapshot = 0
+        self.unlogged_changes = 0
+
+        # Statistics
+        self.stats = {
+            "snapshots": 0,
+            "wal_records": 0,
+            "wal_syncs": 0,
+            "last_snapshot_ms": 0.0,
+            "last_snapshot_bytes": 0,
+            "last_recovery_ms": 0.0
+        }
+
+    @property
+    def snapshot_due(self) -> bool:
+        return self.records_since_snapshot >= self.max_wal_records
+
+    @property
+    def has_changes(self) -> bool:
+        """Whether anything changed since the last snapshot"""
+        return bool(self.records_since_snapshot or self.unlogged_changes)
+
+    async def start(self):
+        """Open the log for appending and start the group-commit task"""
+        self._lock = asyncio.Lock()
+        self._open()
+        self._sync_task = asyncio.create_task(self._sync_loop())
+
+    async def stop(self):
+        """Write what is still buffered and close the log"""
+        if self._sync_task:
+            self._sync_task.cancel()
+            try:
+                await self._sync_task
+            except asyncio.CancelledError:
+                pass
+            self._sync_task = None
+        await self.sync()
+        self._close()
+        self._lock = None
+
+    def append(self, section: str, key: str, data: Optional[Dict[str, Any]]):
+        """Buffer an upsert (or delete when data is None) of ``section[key]`` for the next sync"""
+        if self._lock is None:
+            return
+        self._buffer.append(json.dumps({"s": section, "k": key, "d": data}, separators=(",", ":"), default=str) + "\n")
+        self.records_since_snapshot += 1
+        self.stats["wal_records"] += 1
+
+    async def sync(self):
+        """Write buffered records and fsync them in one batch, off the event loop"""
+        if self._lock is None:
+            return
+        async with self._lock:
+            if not self._buffer or not self._wal:
+                return
+            lines, self._buffer = self._buffer, []
+            await asyncio.to_thread(self._append_lines, lines)
+            self.stats["wal_syncs"] += 1
+
+    def mark_changed(self):
+        """Note an in-memory change that the next periodic snapshot must pick up"""
+        self.unlogged_changes += 1
+
+    async def write_snapshot(self, state: Dict[str, Any]):
+        """Atomically write a snapshot of ``state`` and start a new, empty log
+
+        ``state`` must already be a copy: it is serialized in a worker thread while
+        trading continues. Records buffered up to this call are covered by it and dropped;
+        records appended while the snapshot is written go to the new log.
+        """
+        if self._lock is None:
+            return
+        started = time.perf_counter()
+        async with self._lock:
+            self._buffer = []
+            covered_records = self.records_since_snapshot
+            covered_changes = self.unlogged_changes
+            size = await asyncio.to_thread(self._replace_snapshot, state)
+            self.records_since_snapshot -= covered_records
+            self.unlogged_changes -= covered_changes
+
+        self.stats["snapshots"] += 1
+        self.stats["last_snapshot_bytes"] = size
+        self.stats["last_snapshot_ms"] = round((time.perf_counter() - started) * 1000, 2)
+
+    def load(self) -> Optional[Dict[str, Any]]:
+        """Snapshot with the log replayed over it, or None when there is no local state"""
+        started = time.perf_counter()
+        state: Dict[str, Any] = {section: {} for section in STATE_SECTIONS}
+        found = False
+
+        if os.path.exists(self.snapshot_path):
+            try:
+                with open(self.snapshot_path, "r", encoding="utf-8") as f:
+                    snapshot = json.load(f)
+                if snapshot.get("version") == SNAPSHOT_VERSION:
+                    for section in STATE_SECTIONS:
+                        state[section] = snapshot.get(section) or {}
+                    found = True
+                else:
+                    self.logger.warning(f"⚠️ Ignoring snapshot with unsupported version {snapshot.get('version')}")
+            except (OSError, json.JSONDecodeError) as e:
+                self.logger.error(f"❌ Failed to read state snapshot: {e}")
+
+        replayed = 0
+        if os.path.exists(self.wal_path):
+            with open(self.wal_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        # Torn final write from a crash
+                        continue
+                    section = state.get(record.get("s"))
+                    if section is None:
+                        continue
+                    if record.get("d") is None:
+                        section.pop(record["k"], None)
+                    else:
+                        section[record["k"]] = record["d"]
+                    replayed += 1
+
+        self.records_since_snapshot = replayed
+        self.stats["last_recovery_ms"] = round((time.perf_counter() - started) * 1000, 2)
+        return state if found or replayed else None
+
+    async def reset(self):
+        """Delete the snapshot and log (used when all trading data is wiped)"""
+        if self._lock is None:
+            self._delete_files()
+        else:
+            async with self._lock:
+                self._buffer = []
+                await asyncio.to_thread(self._delete_files)
+        self.records_since_snapshot = 0
+        self.unlogged_changes = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get snapshot / WAL statistics"""
+        return {
+            **self.stats,
+            "records_since_snapshot": self.records_since_snapshot,
+            "unlogged_changes": self.unlogged_changes
+        }
+
+    # Internals
+    def _open(self):
+        if self._wal is None:
+            os.makedirs(os.path.dirname(self.wal_path) or ".", exist_ok=True)
+            self._wal = open(self.wal_path, "a", encoding="utf-8")
+
+    def _close(self):
+        if self._wal:
+            self._wal.close()
+            self._wal = None
+
+    def _append_lines(self, lines: List[str]):
+        self._wal.write("".join(lines))
+        self._wal.flush()
+        if self.fsync:
+            os.fsync(self._wal.fileno())
+
+    def _replace_snapshot(self, state: Dict[str, Any]) -> int:
+        """Write the snapshot file and truncate the log (worker thread); returns the snapshot size"""
+        document = {
+            "version": SNAPSHOT_VERSION,
+            "created": datetime.now(timezone.utc).isoformat(),
+            **{section: state.get(section, {}) for section in STATE_SECTIONS}
+        }
+        payload = json.dumps(document, separators=(",", ":"), default=str)
+
+        os.makedirs(os.path.dirname(self.snapshot_path) or ".", exist_ok=True)
+        tmp_path = f"{self.snapshot_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(payload)
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+        os.replace(tmp_path, self.snapshot_path)
+
+        # Everything in the log is now part of the snapshot
+        reopen = self._wal is not None
+        self._close()
+        with open(self.wal_path, "w", encoding="utf-8"):
+            pass
+        if reopen:
+            self._open()
+        return len(payload)
+
+    def _delete_files(self):
+        reopen = self._wal is not None
+        self._close()
+        for path in (self.snapshot_path, self.wal_path):
+            if os.path.exists(path):
+                os.remove(path)
+        if reopen:
+            self._open()
+
+    async def _sync_loop(self):
+        while True:
+            await asyncio.sleep(self.sync_interval)
+            try:
+                await self.sync()
+            except Exception as e:
+                self.logger.error(f"❌ State log sync error: {e}")
@@ -3,7 +3,7 @@ Simplified Configuration settings using Pydantic
 """
 
 import os
-from typing import List
+from typing import Any, Dict, List
 from pydantic_settings import BaseSettings
 from pydantic import Field
 
@@ -15,6 +15,24 @@ class Settings(BaseSettings):
     MONGODB_URI: str = Field(default="mongodb://0.0.0.0:27017")
     DATABASE_NAME: str = Field(default="trading_system")
     MONGODB_TIMEOUT: int = Field(default=5)
+    MONGODB_BATCH_MAX_SIZE: int = Field(default=1000)  # Documents per batched insert_many
+    MONGODB_BATCH_FLUSH_INTERVAL: float = Field(default=0.2)  # Max seconds a buffered insert waits
+    MONGODB_BATCH_MAX_PENDING: int = Field(default=50000)  # Producers flush inline past this many buffered
+    PAGINATION_COUNT_CACHE_TTL: float = Field(default=30.0)  # Seconds an "estimated" page total is reused per filter
+    PAGINATION_COUNT_CACHE_SIZE: int = Field(default=256)  # Filters with a cached total
+    
+    # Retention (TTL indexes, see src/database/index_manager.py; 0 = keep forever)
+    SIGNAL_RETENTION_DAYS: int = Field(default=90)
+    NOTIFICATION_RETENTION_DAYS: int = Field(default=90)
+    WEBSOCKET_CLIENT_RETENTION_DAYS: int = Field(default=7)
+    
+    # Live Price Storage (--livesaveon: every tick in per-minute buckets, plus 1m/1h bars)
+    LIVE_PRICE_BUCKET_FIELDS: List[str] = Field(default=["price", "mark_price", "best_bid", "best_ask",
+                                                         "volume", "open_interest", "funding_rate"])
+    LIVE_PRICE_FLUSH_INTERVAL: float = Field(default=2.0)  # Seconds between bucket flushes
+    LIVE_PRICE_TICK_RETENTION_HOURS: int = Field(default=24)  # Raw tick buckets (TTL index)
+    LIVE_PRICE_1M_RETENTION_DAYS: int = Field(default=30)  # 1m bars (TTL index)
+    LIVE_PRICE_1H_RETENTION_DAYS: int = Field(default=365)  # 1h bars (TTL index)
     
     # Core Trading Settings - Recommended Optimized Settings
     INITIAL_BALANCE: float = Field(default=17500.0)  # $15,000-20,000 recommended range (₹14.6L-16.7L)
@@ -61,13 +79,66 @@ class Settings(BaseSettings):
     STRATEGY_EXECUTION_INTERVAL: int = Field(default=600)  # 10 minutes
     HISTORICAL_DATA_UPDATE_INTERVAL: int = Field(default=900)  # 15 minutes
     RISK_CHECK_INTERVAL: int = Field(default=60)  # 1 minute
+    RISK_EVAL_MIN_INTERVAL: float = Field(default=0.25)  # Min seconds between per-tick risk evaluations (trigger crossings run immediately)
     LIVE_PRICE_UPDATE: str = Field(default="realtime")
-    LIVE_SAVE_RATE_LIMIT_SECONDS: int = Field(default=20)  # Rate limit for live save: once per 20 seconds
+    
+    # Portfolio VaR / Stress Testing (returns from the candle cache)
+    RISK_VAR_TIMEFRAME: str = Field(default="15m")
+    RISK_VAR_LOOKBACK: int = Field(default=500)  # Candles of return history
+    RISK_VAR_CONFIDENCE_LEVELS: List[float] = Field(default=[0.95, 0.99])
+    # Scenario keys: "shocks" (per-symbol price move), "shock" (all symbols, or the "beta_to"
+    # reference symbol with others moved by their beta to it), "funding_rate" (longs pay)
+    RISK_STRESS_SCENARIOS: Dict[str, Dict[str, Any]] = Field(default={
+        "btc_down_10pct": {"shocks": {"BTCUSD": -0.10}},
+        "correlated_crash": {"beta_to": "BTCUSD", "shock": -0.20},
+        "funding_spike": {"funding_rate": 0.003}
+    })
+    
+    # Streaming Covariance (EWMA over live ticks sampled into bars)
+    RISK_COV_BAR_SECONDS: int = Field(default=900)  # Matches RISK_VAR_TIMEFRAME so candles can warm-start it
+    RISK_EWMA_LAMBDA: float = Field(default=0.94)  # RiskMetrics decay
+    RISK_CORRELATION_SIZING: bool = Field(default=True)  # Shrink new trades that add correlated same-direction exposure
+    RISK_CORRELATION_THRESHOLD: float = Field(default=0.5)  # Minimum |correlation| considered
+    
+    # Broker Memory
+    MAX_CLOSED_POSITIONS_IN_MEMORY: int = Field(default=200)  # Older closed positions are served from MongoDB
+    
+    # Additional paper accounts hosted by the broker, e.g.
+    # {"aggressive": {"default_leverage": 50, "balance_per_trade_pct": 0.3, "strategies": ["EMACrossover"]}}
+    # Keys override get_trading_config(); optional "name" and "strategies" (default: all strategies)
+    PAPER_ACCOUNTS: Dict[str, Dict[str, Any]] = Field(default={})
+    
+    # Order Matching (resting limit/stop orders in the paper broker)
+    MATCHING_USE_FEED_SIZES: bool = Field(default=True)  # Cap fills per tick at best bid/ask size
+    BRACKET_ORDERS_ENABLED: bool = Field(default=True)  # Signal trades rest stop-loss/target as OCO orders
+    
+    # Write-behind Persistence (broker state -> MongoDB)
+    PERSISTENCE_JOURNAL_PATH: str = Field(default="./cache/broker_journal.jsonl")
+    PERSISTENCE_JOURNAL_FSYNC: bool = Field(default=True)
+    PERSISTENCE_JOURNAL_SYNC_INTERVAL: float = Field(default=0.1)  # Group commit: buffered journal appends are fsynced together
+    PERSISTENCE_FLUSH_INTERVAL: float = Field(default=0.5)  # Max write lag in seconds
+    PERSISTENCE_MAX_BATCH: int = Field(default=500)  # Operations per bulk_write
+    PERSISTENCE_MAX_PENDING: int = Field(default=5000)  # Backpressure threshold
+    PERSISTENCE_BACKPRESSURE_TIMEOUT: float = Field(default=5.0)  # Max producer wait in seconds
+    
+    # Local State Recovery (snapshot + write-ahead log, restart without waiting on MongoDB)
+    STATE_RECOVERY_ENABLED: bool = Field(default=True)
+    STATE_SNAPSHOT_PATH: str = Field(default="./cache/broker_snapshot.json")
+    STATE_WAL_PATH: str = Field(default="./cache/broker_state.wal")
+    STATE_SNAPSHOT_INTERVAL: float = Field(default=60.0)  # Seconds between snapshots
+    STATE_SNAPSHOT_MAX_WAL_RECORDS: int = Field(default=10000)  # Snapshot early once the log reaches this size
     
     # WebSocket Settings
     WEBSOCKET_PORT: int = Field(default=8765)
     WEBSOCKET_TIMEOUT: int = Field(default=30)
     
+    # L2 Order Book (Delta Exchange l2_updates channel)
+    L2_ORDERBOOK_ENABLED: bool = Field(default=False)
+    L2_ORDERBOOK_SYMBOLS: List[str] = Field(default=[])  # Empty = use TRADING_SYMBOLS
+    L2_ORDERBOOK_DEPTH: int = Field(default=500)  # Preallocated price levels per book side
+    L2_MAX_SLIPPAGE_BPS: float = Field(default=25.0)  # Depth window used to cap position size
+    L2_CONTRACT_SIZES: Dict[str, float] = Field(default={})  # Coins per contract by symbol (book sizes are contracts); else from the ticker
+    
     # Email Notifications (FastAPI-Mail only)
     EMAIL_NOTIFICATIONS_ENABLED: bool = Field(default=True)
     FASTAPI_MAIL_USERNAME: str = Field(default="")
@@ -79,6 +150,25 @@ class Settings(BaseSettings):
     FASTAPI_MAIL_STARTTLS: bool = Field(default=True)
     FASTAPI_MAIL_SSL_TLS: bool = Field(default=False)
     
+    # Notification Delivery
+    NOTIFICATION_WORKERS: int = Field(default=4)  # Concurrent notification workers
+    NOTIFICATION_QUEUE_SIZE: int = Field(default=1000)  # Per-priority queue capacity
+    NOTIFICATION_SMTP_CONNECTIONS: int = Field(default=2)  # Persistent SMTP sessions shared by workers
+    NOTIFICATION_SMTP_IDLE_TIMEOUT: float = Field(default=60.0)  # Seconds idle before a session is NOOP-checked
+    NOTIFICATION_SMTP_MAX_RETRIES: int = Field(default=2)
+    NOTIFICATION_SMTP_RETRY_BACKOFF: float = Field(default=1.0)  # Seconds, doubled per retry
+    NOTIFICATION_DEDUP_TTL: float = Field(default=300.0)  # Seconds a sent notification suppresses duplicates
+    NOTIFICATION_THROTTLE_WINDOWS: Dict[str, float] = Field(default={
+        "trade_execution": 300.0,
+        "position_close": 300.0,
+        "risk_alert": 600.0
+    })  # Per notification type overrides of NOTIFICATION_DEDUP_TTL
+    EMAIL_RENDER_THREADS: int = Field(default=2)  # Threads rendering email templates off the event loop
+    NOTIFICATION_DIGEST_ENABLED: bool = Field(default=True)  # Batch non-critical notifications into digests
+    NOTIFICATION_DIGEST_WINDOW: float = Field(default=60.0)  # Seconds collected per digest email
+    NOTIFICATION_DIGEST_MAX_EVENTS: int = Field(default=50)  # Send the digest early once this many are waiting
+    NOTIFICATION_DIGEST_BURST_THRESHOLD: int = Field(default=5)  # HIGH events per window before they are digested too
+    
     # Active Strategies
     STRATEGY_CLASSES: List[str] = Field(default=["EMAStrategy", "RSIStrategy"])
     TRADING_SYMBOLS: List[str] = Field(default=["BTCUSD", "ETHUSD"])
@@ -153,8 +243,7 @@ def get_system_intervals() -> dict:
         "strategy_execution": settings.STRATEGY_EXECUTION_INTERVAL,
         "historical_data_update": settings.HISTORICAL_DATA_UPDATE_INTERVAL,
         "risk_check": settings.RISK_CHECK_INTERVAL,
-        "live_price_update": settings.LIVE_PRICE_UPDATE,
-        "live_save_rate_limit_seconds": settings.LIVE_SAVE_RATE_LIMIT_SECONDS
+        "live_price_update": settings.LIVE_PRICE_UPDATE
     }
 
 
@@ -26,7 +26,9 @@ import gc
 
 # Core imports
 from src.broker.paper_broker import AsyncBroker
+from src.broker.models import DEFAULT_ACCOUNT_ID
 from src.services.risk_manager import AsyncRiskManager
+from src.services.risk_scheduler import RiskEvaluationScheduler
 from src.services.notifications import NotificationManager
 from src.config import get_settings, get_trading_config, get_system_intervals
 from src.services.live_price_ws import RealTimeMarketData
@@ -35,6 +37,9 @@ from src.database.schemas import TradingSignal, MarketData, SignalType
 from src.broker.historical_data import HistoricalDataProvider
 from src.api.websocket_server import WebSocketServer, get_websocket_server
 from src.api.rest_server import TradingRestAPI, get_rest_api_server
+from src.database.mongodb_client import AsyncMongoDBClient
+from src.database.price_buckets import LivePriceBucketStore
+from src.utils.performance import get_latency_tracker
 
 
 @dataclass
@@ -102,6 +107,11 @@ class TradingSystem:
         try:
             self.broker = AsyncBroker()
             self.risk_manager = AsyncRiskManager(self.broker)
+            self.risk_scheduler = RiskEvaluationScheduler(
+                self._update_risk_management,
+                min_interval=self.settings.RISK_EVAL_MIN_INTERVAL,
+                is_urgent=self.risk_manager.has_crossed_trigger
+            )
             self.notification_manager = NotificationManager(email_enabled=email_enabled)
             self.strategy_manager = StrategyManager(max_workers=4)
             
@@ -115,12 +125,17 @@ class TradingSystem:
             # REST API server for dashboard and API endpoints
             self.rest_api_server = get_rest_api_server()
             self.rest_api_server.port = 8766
+            self.rest_api_server.risk_manager = self.risk_manager
+            self.rest_api_server.broker = self.broker
             
             # Initialize WebSocket live price system with callback
             self.live_price_system = RealTimeMarketData(
                 price_callback=self._on_live_price_update
             )
             
+            # Share L2 order books with broker (fill estimates) and risk manager (depth caps)
+            self.broker.order_book_manager = self.live_price_system.order_books
+            
         except Exception as e:
             self.logger.error(f"❌ Failed to initialize components: {e}")
             raise
@@ -137,6 +152,9 @@ class TradingSystem:
         self.price_update_times = deque(maxlen=1000)
         self.strategy_execution_times = deque(maxlen=100)
         
+        # End-to-end feed latency histograms (shared with live price client and REST API)
+        self.latency_tracker = get_latency_tracker()
+        
         # Circuit breakers for resilience
         self.circuit_breakers = {
             "broker": CircuitBreaker(failure_threshold=3, recovery_timeout=30),
@@ -161,16 +179,17 @@ class TradingSystem:
         self.last_error: Optional[str] = None
         self.error_history = deque(maxlen=100)
         
-        # Live save configuration
+        # Live save configuration (every tick, bucketed per symbol-minute)
         self.live_save = live_save
-        self._last_live_save_time: Dict[str, float] = {}
+        self.price_store = LivePriceBucketStore(AsyncMongoDBClient()) if live_save else None
         
         # Real-time broadcast throttling (prevent spam but allow immediate updates)
         self._last_broadcast_time = 0.0
         self._broadcast_cooldown = 1.0  # Minimum 1 second between broadcasts
         
-        # Portfolio risk warning cooldown (prevent spam warnings)
-        self._last_portfolio_risk_warning = 0.0
+        # Portfolio risk warning cooldown per account (prevent spam warnings)
+        self._last_portfolio_risk_levels: Dict[str, str] = {}
+        self._last_portfolio_risk_warnings: Dict[str, float] = {}
         self._portfolio_risk_warning_cooldown = 300.0  # 5 minutes between portfolio warnings
         
         # Setup strategies
@@ -188,6 +207,9 @@ class TradingSystem:
             symbols = self.settings.TRADING_SYMBOLS
             historical_data_provider = HistoricalDataProvider()
             
+            # Portfolio VaR reads returns from the same candle cache the strategies fill
+            self.risk_manager.risk_engine.candle_source = historical_data_provider
+            
             self.strategy_manager.add_default_strategies(
                 symbols, 
                 historical_data_provider=historical_data_provider
@@ -206,66 +228,44 @@ class TradingSystem:
         start_time = time.time()
         
         try:
+            # The tick that triggered this callback is the most recently received one
+            trigger_symbol = max(
+                live_prices,
+                key=lambda sym: (live_prices[sym].get("latency") or {}).get("recv_perf", 0.0),
+                default=None
+            )
+            
             # Process each price update
             for symbol, price_data in live_prices.items():
                 try:
                     # Log raw price data for debugging
-                    self.logger.debug(f"📊 Processing live price update for {symbol}")
-                    self.logger.debug(f"   💰 Price: {price_data.get('price', 'N/A')}")
-                    self.logger.debug(f"   📈 Data keys: {list(price_data.keys())}")
+                    if self.logger.isEnabledFor(logging.DEBUG):
+                        self.logger.debug(f"📊 Processing live price update for {symbol}")
+                        self.logger.debug(f"   💰 Price: {price_data.get('price', 'N/A')}")
+                        self.logger.debug(f"   📈 Data keys: {list(price_data.keys())}")
                     
-                    # Convert WebSocket data to MarketData format
-                    market_data = MarketData(
-                        symbol=symbol,
-                        price=price_data.get("price", 0.0),
-                        mark_price=price_data.get("mark_price"),
-                        spot_price=price_data.get("spot_price"),
-                        volume=price_data.get("volume"),
-                        turnover=price_data.get("turnover"),
-                        turnover_usd=price_data.get("turnover_usd"),
-                        high=price_data.get("high"),
-                        low=price_data.get("low"),
-                        open=price_data.get("open"),
-                        close=price_data.get("close"),
-                        open_interest=price_data.get("open_interest"),
-                        oi_value=price_data.get("oi_value"),
-                        oi_contracts=price_data.get("oi_contracts"),
-                        oi_value_usd=price_data.get("oi_value_usd"),
-                        oi_change_usd_6h=price_data.get("oi_change_usd_6h"),
-                        funding_rate=price_data.get("funding_rate"),
-                        mark_basis=price_data.get("mark_basis"),
-                        mark_change_24h=price_data.get("mark_change_24h"),
-                        underlying_asset_symbol=price_data.get("underlying_asset_symbol"),
-                        description=price_data.get("description"),
-                        initial_margin=price_data.get("initial_margin"),
-                        tick_size=price_data.get("tick_size"),
-                        price_band_lower=price_data.get("price_band_lower"),
-                        price_band_upper=price_data.get("price_band_upper"),
-                        best_bid=price_data.get("best_bid"),
-                        best_ask=price_data.get("best_ask"),
-                        bid_size=price_data.get("bid_size"),
-                        ask_size=price_data.get("ask_size"),
-                        mark_iv=price_data.get("mark_iv"),
-                        size=price_data.get("size"),
-                        timestamp=datetime.now(timezone.utc)
-                    )
+                    # Convert WebSocket data to MarketData (unvalidated fast path; validated at persistence)
+                    build_start = time.perf_counter()
+                    market_data = MarketData.from_feed(symbol, price_data, datetime.now(timezone.utc))
+                    self.latency_tracker.record("market_data_build", time.perf_counter() - build_start)
                     
                     # Thread-safe update of market data
                     with self.market_data_lock:
                         self.current_market_data[symbol] = market_data
                         # Price logging now handled in live_price_ws.py as consolidated log
                     
-                    # Live save logic with circuit breaker
-                    if self.live_save:
+                    # Persist only the tick that arrived; the other symbols' quotes are unchanged
+                    if self.live_save and symbol == trigger_symbol:
                         self._handle_live_save(market_data)
                     
                     # Update broker prices with circuit breaker
                     if self._main_loop is not None:
                         self._update_broker_prices_safe(symbol, price_data)
-                        self._update_risk_management_safe()
+                        self._update_risk_management_safe(symbol, price_data.get("price", 0.0))
                     
-                    # Broadcast to WebSocket clients
-                    self._broadcast_price_update_safe(live_prices)
+                    # Broadcast to WebSocket clients (end-to-end latency tracked for the triggering tick only)
+                    tick_latency = price_data.get("latency") if symbol == trigger_symbol else None
+                    self._broadcast_price_update_safe(live_prices, tick_latency)
                     
                     # Immediately broadcast updated account and position data
                     self._broadcast_account_and_positions_safe()
@@ -289,23 +289,10 @@ class TradingSystem:
             self._record_error(str(e))
 
     def _handle_live_save(self, market_data: MarketData):
-        """Handle live save with rate limiting and error handling"""
+        """Buffer the tick in the live price bucket store (written by its flusher)"""
         try:
-            now = time.time()
-            last_save = self._last_live_save_time.get(market_data.symbol, 0)
-            rate_limit_seconds = self.intervals.get('live_save_rate_limit_seconds', 20)
-            
-            if now - last_save >= rate_limit_seconds:
-                from src.database.mongodb_client import AsyncMongoDBClient
-                
-                if self._main_loop is not None:
-                    client = AsyncMongoDBClient()
-                    asyncio.run_coroutine_threadsafe(
-                        client.save_live_price_async(market_data),
-                        self._main_loop
-                    )
-                    self._last_live_save_time[market_data.symbol] = now
-                    
+            values = {field: getattr(market_data, field, None) for field in self.price_store.fields}
+            self.price_store.record(market_data.symbol, values, market_data.timestamp.timestamp())
         except Exception as e:
             self.logger.error(f"❌ Error saving live price for {market_data.symbol}: {e}")
 
@@ -313,9 +300,16 @@ class TradingSystem:
         """Update broker prices with circuit breaker protection"""
         try:
             def update_prices():
-                prices = {symbol: {"price": price_data.get("price", 0.0)}}
+                # Top of book lets the broker's matching engine price and size order fills
+                prices = {symbol: {
+                    "price": price_data.get("price", 0.0),
+                    "best_bid": price_data.get("best_bid"),
+                    "best_ask": price_data.get("best_ask"),
+                    "bid_size": price_data.get("bid_size"),
+                    "ask_size": price_data.get("ask_size")
+                }}
                 return asyncio.run_coroutine_threadsafe(
-                    self.broker.update_prices_async(prices),
+                    self._timed_broker_update(prices, time.perf_counter()),
                     self._main_loop
                 )
             
@@ -324,27 +318,37 @@ class TradingSystem:
         except Exception as e:
             self.logger.warning(f"⚠️ Broker update failed (circuit breaker): {e}")
 
-    def _update_risk_management_safe(self):
-        """Update risk management with circuit breaker protection"""
+    async def _timed_broker_update(self, prices: Dict[str, Dict], submitted_at: float):
+        """Apply a price update to the broker, recording mailbox wait and PnL update latency"""
+        started_at = time.perf_counter()
+        self.latency_tracker.record("mailbox_wait", started_at - submitted_at)
+        await self.broker.update_prices_async(prices)
+        self.latency_tracker.record("broker_pnl_update", time.perf_counter() - started_at)
+
+    def _update_risk_management_safe(self, symbol: Optional[str] = None, price: float = 0.0):
+        """Request a (coalesced, rate-limited) risk evaluation with circuit breaker protection"""
         try:
             def update_risk():
-                return asyncio.run_coroutine_threadsafe(
-                    self._update_risk_management(),
-                    self._main_loop
-                )
+                self._main_loop.call_soon_threadsafe(self._on_risk_tick, symbol, price)
             
             self.circuit_breakers["risk_manager"].call(update_risk)
             
         except Exception as e:
             self.logger.warning(f"⚠️ Risk management update failed (circuit breaker): {e}")
 
-    def _broadcast_price_update_safe(self, live_prices: Dict[str, Dict]):
+    def _on_risk_tick(self, symbol: Optional[str], price: float):
+        """Feed the streaming covariance and request a risk evaluation (runs on the event loop)"""
+        if symbol and price > 0:
+            self.risk_manager.on_price_tick(symbol, price)
+        self.risk_scheduler.request(symbol, price)
+
+    def _broadcast_price_update_safe(self, live_prices: Dict[str, Dict], tick_latency: Optional[Dict[str, float]] = None):
         """Broadcast price updates to WebSocket clients with circuit breaker"""
         try:
             def broadcast():
                 if self._main_loop is not None:
                     return asyncio.run_coroutine_threadsafe(
-                        self.websocket_server.broadcast_live_prices(live_prices),
+                        self._timed_price_broadcast(live_prices, tick_latency),
                         self._main_loop
                     )
             
@@ -353,6 +357,21 @@ class TradingSystem:
         except Exception as e:
             self.logger.warning(f"⚠️ WebSocket broadcast failed (circuit breaker): {e}")
 
+    async def _timed_price_broadcast(self, live_prices: Dict[str, Dict], tick_latency: Optional[Dict[str, float]] = None):
+        """Fan out live prices to WebSocket clients, recording fan-out and end-to-end latency"""
+        fanout_start = time.perf_counter()
+        await self.websocket_server.broadcast_live_prices(live_prices)
+        fanout_end = time.perf_counter()
+        self.latency_tracker.record("ws_fanout", fanout_end - fanout_start)
+        
+        if tick_latency:
+            recv_perf = tick_latency.get("recv_perf")
+            if recv_perf:
+                self.latency_tracker.record("receive_to_client", fanout_end - recv_perf)
+            exchange_ts = tick_latency.get("exchange_ts")
+            if exchange_ts:
+                self.latency_tracker.record("exchange_to_client", time.time() - exchange_ts)
+
     def _broadcast_account_and_positions_safe(self):
         """Broadcast account and position updates with smart throttling"""
         try:
@@ -453,6 +472,9 @@ class TradingSystem:
             self.logger.info(f"🌐 Dashboard URL: http://0.0.0.0:8766/dashboard")
             
             self.logger.info("📋 STEP 3: Starting Live Market Data System") 
+            if self.price_store:
+                await self.price_store.start()
+                self.logger.info("✅ STEP 3.0: Live price bucket store started (every tick saved)")
             # Start WebSocket live price system
             self.logger.info("🔄 STEP 3.1: Connecting to live price WebSocket...")
             if not self.live_price_system.start():
@@ -727,6 +749,9 @@ class TradingSystem:
             self.strategy_manager.shutdown()
             
             # Stop async components
+            await self.risk_scheduler.stop()
+            if self.price_store:
+                await self.price_store.stop()
             await self.broker.stop()
             await self.risk_manager.stop()
             await self.notification_manager.stop()
@@ -846,6 +871,10 @@ class TradingSystem:
         try:
             self.logger.info(f"🎯 Executing strategies for {symbol} at price ${market_data.price:.2f}")
             
+            # How stale is the price the strategies are about to act on
+            if market_data.timestamp:
+                self.latency_tracker.record("strategy_price_age", time.time() - market_data.timestamp.timestamp())
+            
             # Execute all strategies in parallel and get the best signal
             execution_start = time.time()
             strategy_result = self.strategy_manager.execute_strategies_parallel(symbol, market_data)
@@ -1044,12 +1073,29 @@ class TradingSystem:
             if signal.signal == SignalType.WAIT:
                 return
             
-            # CRITICAL CHECK: Only one position per symbol allowed
-            has_open_position = self.broker.has_open_position_for_symbol(signal.symbol)
+            # Every account whose strategy set includes this strategy trades the signal independently
+            for account_id in self.broker.get_accounts_for_strategy(signal.strategy_name):
+                await self._execute_signal_for_account(signal, account_id)
+                
+        except Exception as e:
+            self.logger.error(f"❌ Error executing signal: {e}")
+            self._stats["trades_failed"] += 1
+            self._record_error(str(e))
+
+    async def _execute_signal_for_account(self, signal: TradingSignal, account_id: str):
+        """Execute a trading signal on one broker account"""
+        order_start = time.perf_counter()
+        try:
+            account = self.broker.get_account(account_id)
+            account_config = self.broker.get_account_config(account_id)
+            default_leverage = account_config["default_leverage"]
+            
+            # CRITICAL CHECK: Only one position per symbol allowed (per account)
+            has_open_position = self.broker.has_open_position_for_symbol(signal.symbol, account_id)
             if has_open_position:
-                existing_position = self.broker.get_open_position_for_symbol(signal.symbol)
+                existing_position = self.broker.get_open_position_for_symbol(signal.symbol, account_id)
                 
-                self.logger.warning(f"🚫 Trade REJECTED: {signal.symbol} already has an open position")
+                self.logger.warning(f"🚫 Trade REJECTED: {signal.symbol} already has an open position in account {account_id}")
                 self.logger.warning(f"   📊 Existing Position: {existing_position.position_type.value} "
                                   f"qty={existing_position.quantity} entry=${existing_position.entry_price:.2f}")
                 self.logger.warning(f"   🎯 New Signal: {signal.signal.value} at ${signal.price:.2f}")
@@ -1064,7 +1110,7 @@ class TradingSystem:
                 )
                 
                 # Show position counts for debugging
-                position_counts = self.broker.get_open_positions_count_by_symbol()
+                position_counts = self.broker.get_open_positions_count_by_symbol(account_id)
                 self.logger.info(f"📊 Current open positions by symbol: {position_counts}")
                 
                 return
@@ -1072,12 +1118,16 @@ class TradingSystem:
             from src.broker.paper_broker import TradeRequest
             
             # Calculate safe quantity using risk manager
+            sizing_start = time.perf_counter()
             safe_quantity, quantity_reason = await self.risk_manager.calculate_safe_quantity_async(
                 symbol=signal.symbol,
                 price=signal.price,
                 requested_quantity=signal.quantity,
-                leverage=signal.leverage if hasattr(signal, 'leverage') and signal.leverage > 0 else self.trading_config["default_leverage"]
+                leverage=signal.leverage if hasattr(signal, 'leverage') and signal.leverage > 0 else default_leverage,
+                signal=signal.signal.value,
+                account_id=account_id
             )
+            self.latency_tracker.record("pre_trade_check", time.perf_counter() - sizing_start)
             
             if safe_quantity <= 0:
                 self.logger.warning(f"❌ Trade rejected by risk manager: {quantity_reason}")
@@ -1105,20 +1155,26 @@ class TradingSystem:
                 signal=signal.signal.value,
                 price=signal.price,
                 quantity=safe_quantity,  # Use calculated safe quantity
-                leverage=signal.leverage if hasattr(signal, 'leverage') and signal.leverage > 0 else self.trading_config["default_leverage"],
+                leverage=signal.leverage if hasattr(signal, 'leverage') and signal.leverage > 0 else default_leverage,
                 strategy_name=signal.strategy_name,
-                confidence=signal.confidence
+                confidence=signal.confidence,
+                account_id=account_id
             )
             
             # Execute trade
             success = await self.broker.execute_trade_async(trade_request)
+            self.latency_tracker.record("signal_to_order", time.perf_counter() - order_start)
             
             if success:
                 self._stats["trades_executed"] += 1
                 self._stats["trades_successful"] += 1
                 
                 self.logger.info(f"✅ Trade executed: {signal.signal} {signal.symbol} "
-                               f"at ${signal.price:.2f} via {signal.strategy_name}")
+                               f"at ${trade_request.price:.2f} via {signal.strategy_name} (account {account_id})")
+                
+                # Stop-loss / target rest as OCO orders instead of risk-manager market closes
+                if self.settings.BRACKET_ORDERS_ENABLED and trade_request.position_id:
+                    await self.broker.place_bracket_orders_async(trade_request.position_id)
                 
                 # Wait a moment for position to be fully created and accessible
                 await asyncio.sleep(0.1)
@@ -1129,25 +1185,25 @@ class TradingSystem:
                     position = self.broker.positions[trade_request.position_id]
                 
                 # Calculate detailed trade information
-                position_value = signal.price * safe_quantity
+                position_value = trade_request.price * trade_request.quantity
                 margin_used = position.margin_used if position else position_value / trade_request.leverage
-                trading_fee = position.trading_fee if position else margin_used * self.trading_config["trading_fee_pct"]
+                trading_fee = position.trading_fee if position else margin_used * account_config["trading_fee_pct"]
                 total_cost = margin_used + trading_fee
                 
                 # Get account summaries for detailed email
-                account_before = self.broker.account.current_balance + total_cost
-                account_after = self.broker.account.current_balance
+                account_before = account.current_balance + total_cost
+                account_after = account.current_balance
                 investment_amount = position.invested_amount if position else position_value
-                leveraged_amount = signal.price * safe_quantity * trade_request.leverage
+                leveraged_amount = trade_request.price * trade_request.quantity * trade_request.leverage
                 
                 # Send comprehensive notification with all details
                 await self.notification_manager.notify_trade_execution(
                     symbol=signal.symbol,
                     signal=signal.signal.value,
-                    price=signal.price,
+                    price=trade_request.price,
                     trade_id=trade_request.id,
                     position_id=trade_request.position_id or "N/A",
-                    quantity=safe_quantity,
+                    quantity=trade_request.quantity,
                     leverage=trade_request.leverage,
                     margin_used=margin_used,
                     capital_remaining=account_after,
@@ -1163,7 +1219,7 @@ class TradingSystem:
                 # Broadcast to WebSocket clients
                 await self.websocket_server.broadcast_notification_simple(
                     "trade_executed",
-                    f"Trade executed: {signal.signal} {signal.symbol} at ${signal.price:.2f}",
+                    f"Trade executed: {signal.signal} {signal.symbol} at ${trade_request.price:.2f}",
                     "success",
                     "Trade Execution"
                 )
@@ -1198,11 +1254,13 @@ class TradingSystem:
             self._stats["trades_failed"] += 1
             self._record_error(str(e))
 
-    async def _update_risk_management(self):
+    async def _update_risk_management(self, symbols: Optional[List[str]] = None):
         """Update risk management with enhanced error handling"""
+        risk_start = time.perf_counter()
         try:
-            # Monitor positions
-            actions_taken = await self.risk_manager.monitor_positions_async()
+            # Monitor positions (price-triggered checks for the ticked symbols, periodic full sweep)
+            sweeps_before = self.risk_manager.full_sweeps
+            actions_taken = await self.risk_manager.monitor_positions_async(symbols)
             
             if actions_taken:
                 self.logger.info(f"🛡️ Risk actions taken: {actions_taken}")
@@ -1215,82 +1273,97 @@ class TradingSystem:
                     "Risk Manager"
                 )
             
-            # Smart portfolio risk analysis with change detection
-            portfolio_risk = await self.risk_manager.analyze_portfolio_risk_async()
-            
-            # Only send alerts if risk level changed or is critical
-            current_risk_level = portfolio_risk.get("overall_risk_level", "unknown")
-            previous_risk_level = getattr(self, '_last_portfolio_risk_level', "unknown")
-            
-            # Send alert only if:
-            # 1. Risk level changed from previous check
-            # 2. Risk is critical (always alert for critical)
-            # 3. This is the first check (previous is unknown)
-            should_alert = (
-                current_risk_level != previous_risk_level or
-                current_risk_level == "critical" or
-                previous_risk_level == "unknown"
+            # Smart portfolio risk analysis per account: the full per-position analysis only
+            # alongside the periodic sweep, running aggregates on every other evaluation
+            full_sweep = self.risk_manager.full_sweeps != sweeps_before
+            for account_id in list(self.broker.accounts):
+                if full_sweep:
+                    portfolio_risk = await self.risk_manager.analyze_portfolio_risk_async(account_id)
+                else:
+                    portfolio_risk = self.risk_manager.assess_portfolio_risk(account_id)
+                await self._check_portfolio_risk_alert(account_id, portfolio_risk)
+                        
+        except Exception as e:
+            self.logger.error(f"❌ Error updating risk management: {e}")
+            self._record_error(str(e))
+        finally:
+            self.latency_tracker.record("risk_check", time.perf_counter() - risk_start)
+    
+    async def _check_portfolio_risk_alert(self, account_id: str, portfolio_risk: Dict[str, Any]):
+        """Alert on an account's portfolio risk level (change detection and cooldown per account)"""
+        is_default = account_id == DEFAULT_ACCOUNT_ID
+        label = "PORTFOLIO" if is_default else f"PORTFOLIO:{account_id}"
+        name = "Portfolio" if is_default else f"Portfolio ({account_id})"
+        
+        # Only send alerts if risk level changed or is critical
+        current_risk_level = portfolio_risk.get("overall_risk_level", "unknown")
+        previous_risk_level = self._last_portfolio_risk_levels.get(account_id, "unknown")
+        
+        # Send alert only if:
+        # 1. Risk level changed from previous check
+        # 2. Risk is critical (always alert for critical)
+        # 3. This is the first check (previous is unknown)
+        should_alert = (
+            current_risk_level != previous_risk_level or
+            current_risk_level == "critical" or
+            previous_risk_level == "unknown"
+        )
+        
+        if should_alert and current_risk_level in ["high", "critical"]:
+            # ANTI-SPAM: Check if enough time has passed since last portfolio warning
+            current_time = time.time()
+            time_since_last_warning = current_time - self._last_portfolio_risk_warnings.get(account_id, 0.0)
+            
+            # Always send critical alerts, but throttle high risk alerts
+            should_send_warning = (
+                current_risk_level == "critical" or  # Always send critical
+                current_risk_level != previous_risk_level or  # Risk level changed
+                time_since_last_warning >= self._portfolio_risk_warning_cooldown  # Cooldown expired
             )
             
-            if should_alert and current_risk_level in ["high", "critical"]:
-                # ANTI-SPAM: Check if enough time has passed since last portfolio warning
-                current_time = time.time()
-                time_since_last_warning = current_time - self._last_portfolio_risk_warning
+            if should_send_warning:
+                # Only send if this is a LIQUIDATION-BASED risk (not normal trading)
+                margin_usage = portfolio_risk.get('portfolio_margin_usage', 0)
+                pnl_percentage = portfolio_risk.get('portfolio_pnl_percentage', 0)
                 
-                # Always send critical alerts, but throttle high risk alerts
-                should_send_warning = (
-                    current_risk_level == "critical" or  # Always send critical
-                    current_risk_level != previous_risk_level or  # Risk level changed
-                    time_since_last_warning >= self._portfolio_risk_warning_cooldown  # Cooldown expired
+                # Only alert for REAL risks: near liquidation OR major losses
+                is_real_risk = (
+                    margin_usage >= 85.0 or  # Near liquidation
+                    pnl_percentage < -25.0 or  # Major losses (25%+)
+                    current_risk_level == "critical"
                 )
                 
-                if should_send_warning:
-                    # Only send if this is a LIQUIDATION-BASED risk (not normal trading)
-                    margin_usage = portfolio_risk.get('portfolio_margin_usage', 0)
-                    pnl_percentage = portfolio_risk.get('portfolio_pnl_percentage', 0)
+                if is_real_risk:
+                    alert_type = self._determine_portfolio_alert_type(portfolio_risk)
                     
-                    # Only alert for REAL risks: near liquidation OR major losses
-                    is_real_risk = (
-                        margin_usage >= 85.0 or  # Near liquidation
-                        pnl_percentage < -25.0 or  # Major losses (25%+)
-                        current_risk_level == "critical"
+                    await self.notification_manager.notify_risk_alert(
+                        symbol=label,
+                        alert_type=alert_type,
+                        current_price=0.0,
+                        risk_level=current_risk_level
                     )
                     
-                    if is_real_risk:
-                        alert_type = self._determine_portfolio_alert_type(portfolio_risk)
-                        
-                        await self.notification_manager.notify_risk_alert(
-                            symbol="PORTFOLIO",
-                            alert_type=alert_type,
-                            current_price=0.0,
-                            risk_level=current_risk_level
-                        )
-                        
-                        # Log the significant risk change
-                        if current_risk_level != previous_risk_level:
-                            self.logger.warning(f"📊 Portfolio risk level changed: {previous_risk_level} → {current_risk_level}")
-                            self.logger.info(f"📈 Portfolio details: Margin usage: {margin_usage:.1f}%, PnL: {pnl_percentage:.1f}%")
-                        
-                        await self.websocket_server.broadcast_notification_simple(
-                            "portfolio_risk",
-                            f"Portfolio risk: {current_risk_level} ({margin_usage:.1f}% margin usage)",
-                            "error" if current_risk_level == "critical" else "warning",
-                            "Risk Analysis"
-                        )
-                        
-                        # Update last warning time
-                        self._last_portfolio_risk_warning = current_time
-                    else:
-                        # Log debug info for false alerts
-                        self.logger.debug(f"🚫 Suppressed false portfolio risk alert: margin={margin_usage:.1f}%, pnl={pnl_percentage:.1f}%")
-            
-            # Store current risk level for next comparison
-            self._last_portfolio_risk_level = current_risk_level
-                        
-        except Exception as e:
-            self.logger.error(f"❌ Error updating risk management: {e}")
-            self._record_error(str(e))
-    
+                    # Log the significant risk change
+                    if current_risk_level != previous_risk_level:
+                        self.logger.warning(f"📊 {name} risk level changed: {previous_risk_level} → {current_risk_level}")
+                        self.logger.info(f"📈 Portfolio details: Margin usage: {margin_usage:.1f}%, PnL: {pnl_percentage:.1f}%")
+                    
+                    await self.websocket_server.broadcast_notification_simple(
+                        "portfolio_risk",
+                        f"{name} risk: {current_risk_level} ({margin_usage:.1f}% margin usage)",
+                        "error" if current_risk_level == "critical" else "warning",
+                        "Risk Analysis"
+                    )
+                    
+                    # Update last warning time
+                    self._last_portfolio_risk_warnings[account_id] = current_time
+                else:
+                    # Log debug info for false alerts
+                    self.logger.debug(f"🚫 Suppressed false portfolio risk alert: margin={margin_usage:.1f}%, pnl={pnl_percentage:.1f}%")
+        
+        # Store current risk level for next comparison
+        self._last_portfolio_risk_levels[account_id] = current_risk_level
+
     def _determine_portfolio_alert_type(self, portfolio_risk: Dict[str, Any]) -> str:
         """Determine specific alert type based on portfolio risk factors"""
         try:
@@ -1430,6 +1503,7 @@ class TradingSystem:
             # Clear performance tracking
             self.price_update_times.clear()
             self.strategy_execution_times.clear()
+            self.latency_tracker.reset()
             
             # Clear market data cache
             with self.market_data_lock:
@@ -1696,7 +1770,10 @@ class TradingSystem:
             "avg_strategy_execution_time": (
                 sum(self.strategy_execution_times) / len(self.strategy_execution_times)
                 if self.strategy_execution_times else 0
-            )
+            ),
+            "feed_latency": self.latency_tracker.snapshot(),
+            "risk_scheduler": self.risk_scheduler.get_stats(),
+            "live_price_store": self.price_store.get_stats() if self.price_store else None
         }
 
     def get_health_status(self) -> SystemHealth:
@@ -1714,13 +1791,12 @@ class TradingSystem:
             if pending_tasks:
                 self.logger.info(f"📋 Found {len(pending_tasks)} pending tasks")
                 
-                # Cancel notification manager tasks first
-                if hasattr(self.notification_manager, '_notification_task') and self.notification_manager._notification_task:
-                    self.notification_manager._notification_task.cancel()
-                    try:
-                        await asyncio.wait_for(self.notification_manager._notification_task, timeout=2.0)
-                    except (asyncio.CancelledError, asyncio.TimeoutError):
-                        pass
+                # Cancel notification manager workers first
+                worker_tasks = getattr(self.notification_manager, '_worker_tasks', [])
+                for task in worker_tasks:
+                    task.cancel()
+                if worker_tasks:
+                    await asyncio.wait(worker_tasks, timeout=2.0)
                 
                 # Cancel other pending tasks with timeout
                 for task in pending_tasks:
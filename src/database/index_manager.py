@@ -0,0 +1,189 @@
+"""
+Index lifecycle management
+Indexes are declared per collection here; at startup they are diffed against the server,
+missing ones are built in the background, and $indexStats usage is reported
+"""
+
+import logging
+import time
+from dataclasses import dataclass
+from typing import Dict, Any, List, Optional, Tuple
+
+from pymongo import IndexModel
+
+from src.config import get_settings
+from src.database.price_buckets import TICKS_COLLECTION, BARS_COLLECTIONS
+from src.database.query_filters import QUERY_INDEXES
+
+
+@dataclass(frozen=True)
+class IndexSpec:
+    """One declared index (keys in order, plus unique/TTL options)"""
+    keys: Tuple[Tuple[str, int], ...]
+    unique: bool = False
+    expire_after_seconds: Optional[int] = None
+
+    @property
+    def name(self) -> str:
+        """MongoDB's default name for these keys"""
+        return "_".join(f"{field}_{direction}" for field, direction in self.keys)
+
+    def to_model(self) -> IndexModel:
+        options: Dict[str, Any] = {"name": self.name, "background": True}
+        if self.unique:
+            options["unique"] = True
+        if self.expire_after_seconds is not None:
+            options["expireAfterSeconds"] = self.expire_after_seconds
+        return IndexModel(list(self.keys), **options)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "keys": [list(key) for key in self.keys],
+            "unique": self.unique,
+            "expire_after_seconds": self.expire_after_seconds
+        }
+
+
+def _spec(*keys: Tuple[str, int], unique: bool = False, ttl: Optional[float] = None) -> IndexSpec:
+    return IndexSpec(tuple(keys), unique, int(ttl) if ttl else None)
+
+
+def declared_indexes() -> Dict[str, List[IndexSpec]]:
+    """Every index the application relies on, keyed by collection (TTLs from settings)"""
+    settings = get_settings()
+    day = 86400
+    specs = {
+        "accounts": [_spec(("id", 1), unique=True)],
+        "positions": [_spec(("id", 1), unique=True), _spec(("account_id", 1))],
+        "trades": [_spec(("id", 1), unique=True), _spec(("timestamp", -1))],
+        "orders": [_spec(("id", 1), unique=True), _spec(("status", 1))],
+        "signals": [_spec(("created_at", 1), ttl=settings.SIGNAL_RETENTION_DAYS * day)],
+        # Single-field TTL index also serves the newest-first listing
+        "notifications": [
+            _spec(("timestamp", -1), ttl=settings.NOTIFICATION_RETENTION_DAYS * day),
+            _spec(("priority", 1), ("timestamp", -1))
+        ],
+        "websocket_clients": [
+            _spec(("client_id", 1)),
+            _spec(("connected_at", 1), ttl=settings.WEBSOCKET_CLIENT_RETENTION_DAYS * day)
+        ],
+        "analysis": [_spec(("timestamp", -1))]
+    }
+    for collection, key_lists in QUERY_INDEXES.items():
+        specs[collection] += [_spec(*keys) for keys in key_lists]
+
+    tiers = {
+        TICKS_COLLECTION: settings.LIVE_PRICE_TICK_RETENTION_HOURS * 3600,
+        BARS_COLLECTIONS["1m"]: settings.LIVE_PRICE_1M_RETENTION_DAYS * day,
+        BARS_COLLECTIONS["1h"]: settings.LIVE_PRICE_1H_RETENTION_DAYS * day
+    }
+    for collection, ttl_seconds in tiers.items():
+        specs[collection] = [_spec(("symbol", 1), ("start", 1), unique=True), _spec(("start", 1), ttl=ttl_seconds)]
+    return specs
+
+
+class IndexManager:
+    """Keeps server indexes in line with ``declared_indexes``
+
+    - ``sync`` creates missing indexes (background builds), updates changed TTLs with
+      collMod, and logs conflicting and undeclared indexes; nothing is ever dropped
+    - ``usage_report`` reads $indexStats to list unused and missing indexes per collection
+    """
+
+    def __init__(self, mongodb_client):
+        self.mongodb_client = mongodb_client
+        self.logger = logging.getLogger("database.index_manager")
+        self.specs = declared_indexes()
+        self.last_sync: Dict[str, Any] = {}
+
+    async def sync(self) -> bool:
+        """Diff declared indexes against the server and build what is missing"""
+        started = time.perf_counter()
+        db = self.mongodb_client.db
+        summary = {"created": [], "ttl_updated": [], "conflicts": [], "undeclared": [], "failed": []}
+
+        for collection, specs in self.specs.items():
+            try:
+                existing = await self._existing_indexes(collection)
+                matched = set()
+                missing = []
+                for spec in specs:
+                    index = existing.get(spec.keys)
+                    if index is None:
+                        missing.append(spec)
+                        continue
+                    matched.add(index["name"])
+                    current_ttl = index.get("expireAfterSeconds")
+                    if bool(index.get("unique")) != spec.unique or (current_ttl is None) != (spec.expire_after_seconds is None):
+                        # Changing uniqueness or adding/removing a TTL needs a drop + rebuild: left to an operator
+                        summary["conflicts"].append(f"{collection}.{index['name']}")
+                    elif current_ttl is not None and int(current_ttl) != spec.expire_after_seconds:
+                        await db.command("collMod", collection, index={
+                            "keyPattern": dict(spec.keys), "expireAfterSeconds": spec.expire_after_seconds
+                        })
+                        summary["ttl_updated"].append(f"{collection}.{index['name']}")
+
+                summary["undeclared"] += [
+                    f"{collection}.{index['name']}" for index in existing.values()
+                    if index["name"] not in matched and index["name"] != "_id_"
+                ]
+                if missing:
+                    await db[collection].create_indexes([spec.to_model() for spec in missing])
+                    summary["created"] += [f"{collection}.{spec.name}" for spec in missing]
+            except Exception as e:
+                summary["failed"].append(collection)
+                self.logger.error(f"❌ Index sync failed for {collection}: {e}")
+
+        summary["duration_ms"] = round((time.perf_counter() - started) * 1000, 2)
+        self.last_sync = summary
+        self._log_summary(summary)
+        return not summary["failed"]
+
+    async def usage_report(self) -> Dict[str, Any]:
+        """Per collection: missing declared indexes, unused ones (no ops since server start) and usage counts"""
+        db = self.mongodb_client.db
+        report = {}
+        for collection, specs in self.specs.items():
+            try:
+                existing = await self._existing_indexes(collection)
+                stats = await db[collection].aggregate([{"$indexStats": {}}]).to_list(length=None)
+            except Exception as e:
+                report[collection] = {"error": str(e)}
+                continue
+            usage = {row["name"]: int(row["accesses"]["ops"]) for row in stats}
+            report[collection] = {
+                "missing": [spec.name for spec in specs if spec.keys not in existing],
+                "unused": sorted(name for name, ops in usage.items() if ops == 0 and name != "_id_"),
+                "usage": usage
+            }
+        return report
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Declared index counts and the last sync summary"""
+        return {
+            "declared": {collection: [spec.to_dict() for spec in specs] for collection, specs in self.specs.items()},
+            "last_sync": self.last_sync
+        }
+
+    # Internals
+    async def _existing_indexes(self, collection: str) -> Dict[Tuple[Tuple[str, int], ...], Dict[str, Any]]:
+        """Server indexes keyed by their normalized key pattern"""
+        indexes = await self.mongodb_client.db[collection].list_indexes().to_list(length=None)
+        return {
+            tuple((field, int(direction) if isinstance(direction, (int, float)) else direction)
+                  for field, direction in index["key"].items()): index
+            for index in indexes
+        }
+
+    def _log_summary(self, summary: Dict[str, Any]):
+        if summary["created"]:
+            self.logger.info(f"🔧 Building {len(summary['created'])} missing indexes: {', '.join(summary['created'])}")
+        if summary["ttl_updated"]:
+            self.logger.info(f"🔧 Updated TTL on: {', '.join(summary['ttl_updated'])}")
+        if summary["conflicts"]:
+            self.logger.warning(f"⚠️ Indexes differ from their declaration (drop to rebuild): {', '.join(summary['conflicts'])}")
+        if summary["undeclared"]:
+            self.logger.warning(f"⚠️ Undeclared indexes (not dropped): {', '.join(summary['undeclared'])}")
+        if not summary["failed"]:
+            self.logger.info(f"✅ Indexes verified in {summary['duration_ms']:.0f}ms")
@@ -0,0 +1,159 @@
+"""
+Batched inserts for append-only collections
+Documents are buffered per collection and written with unordered insert_many,
+flushed when a batch fills or the oldest buffered document reaches the flush interval
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Dict, Any, List, Optional, Tuple
+
+from src.config import get_settings
+from src.utils.performance import get_latency_tracker
+
+
+class BulkInsertBatcher:
+    """Per-collection insert buffers in front of AsyncMongoDBClient
+
+    - ``insert`` buffers one document; with ``wait=True`` it resolves once the batch
+      holding it was acknowledged (False when that document failed to insert)
+    - a background task flushes every ``flush_interval`` seconds, or as soon as a
+      collection buffer reaches ``max_batch`` documents
+    - ``max_pending`` bounds buffered documents; producers flush inline past it
+    - ``stop`` flushes everything that is still buffered
+    """
+
+    def __init__(self, mongodb_client):
+        self.settings = get_settings()
+        self.mongodb_client = mongodb_client
+        self.logger = logging.getLogger("database.insert_batcher")
+
+        self.max_batch = self.settings.MONGODB_BATCH_MAX_SIZE
+        self.flush_interval = self.settings.MONGODB_BATCH_FLUSH_INTERVAL
+        self.max_pending = self.settings.MONGODB_BATCH_MAX_PENDING
+
+        # collection -> [(document, acknowledgement future or None)]
+        self._buffers: Dict[str, List[Tuple[Dict[str, Any], Optional[asyncio.Future]]]] = {}
+        self._pending = 0
+        self._flush_task: Optional[asyncio.Task] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._running = False
+
+        # Statistics
+        self._flush_latencies = deque(maxlen=1000)
+        self.stats = {
+            "enqueued": 0,
+            "batches": 0,
+            "documents_inserted": 0,
+            "documents_failed": 0,
+            "max_batch_size": 0,
+            "inline_flushes": 0
+        }
+
+    @property
+    def pending_count(self) -> int:
+        return self._pending
+
+    async def insert(self, collection: str, document: Dict[str, Any], wait: bool = False) -> bool:
+        """Buffer a document for the next batch (awaits the write when ``wait``)"""
+        if not self._running:
+            self._start()
+
+        future = asyncio.get_running_loop().create_future() if wait else None
+        buffer = self._buffers.setdefault(collection, [])
+        buffer.append((document, future))
+        self._pending += 1
+        self.stats["enqueued"] += 1
+
+        if self._pending >= self.max_pending:
+            # Backpressure: the producer pays for the flush
+            self.stats["inline_flushes"] += 1
+            await self.flush()
+        elif len(buffer) >= self.max_batch:
+            self._wakeup.set()
+
+        return await future if future else True
+
+    async def flush(self) -> bool:
+        """Write every buffered document; returns False if any batch failed"""
+        if self._flush_lock is None:
+            return True
+        async with self._flush_lock:
+            buffers, self._buffers = self._buffers, {}
+            self._pending = 0
+            ok = True
+            for collection, entries in buffers.items():
+                for i in range(0, len(entries), self.max_batch):
+                    ok &= await self._write_batch(collection, entries[i:i + self.max_batch])
+            return ok
+
+    async def stop(self):
+        """Stop the flusher and flush all buffered documents"""
+        self._running = False
+        if self._flush_task:
+            self._wakeup.set()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+            self._flush_task = None
+        await self.flush()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get batching statistics"""
+        latencies = sorted(self._flush_latencies)
+        batches = self.stats["batches"]
+        return {
+            **self.stats,
+            "pending": self._pending,
+            "pending_by_collection": {c: len(b) for c, b in self._buffers.items() if b},
+            "avg_batch_size": round((self.stats["documents_inserted"] + self.stats["documents_failed"]) / batches, 1)
+            if batches else 0.0,
+            "flush_latency_ms": {
+                "avg": round(sum(latencies) / len(latencies) * 1000, 2) if latencies else 0.0,
+                "p95": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000, 2)
+                if latencies else 0.0,
+                "max": round(latencies[-1] * 1000, 2) if latencies else 0.0
+            }
+        }
+
+    # Internals
+    def _start(self):
+        self._flush_lock = asyncio.Lock()
+        self._wakeup = asyncio.Event()
+        self._running = True
+        self._flush_task = asyncio.get_running_loop().create_task(self._flush_loop())
+
+    async def _flush_loop(self):
+        while self._running:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                self.logger.error(f"❌ Insert batch flusher error: {e}")
+
+    async def _write_batch(self, collection: str, entries: List[Tuple[Dict[str, Any], Optional[asyncio.Future]]]) -> bool:
+        started = time.perf_counter()
+        failed = await self.mongodb_client.insert_batch(collection, [document for document, _ in entries])
+        elapsed = time.perf_counter() - started
+
+        self._flush_latencies.append(elapsed)
+        get_latency_tracker().record("mongo_batch_insert", elapsed)
+        self.stats["batches"] += 1
+        self.stats["max_batch_size"] = max(self.stats["max_batch_size"], len(entries))
+        self.stats["documents_failed"] += len(failed)
+        self.stats["documents_inserted"] += len(entries) - len(failed)
+        if failed:
+            self.logger.error(f"❌ {len(failed)}/{len(entries)} documents failed to insert into {collection}")
+
+        for index, (_, future) in enumerate(entries):
+            if future is not None and not future.done():
+                future.set_result(index not in failed)
+        return not failed
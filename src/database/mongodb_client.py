@@ -2,13 +2,20 @@
 Async MongoDB client using motor for trading system
 """
 
+import asyncio
 import logging
-from typing import Dict, Any, Optional, List
-from datetime import datetime, timezone
+from typing import Dict, Any, Optional, List, Set
+from datetime import datetime, timezone, timedelta
 import motor.motor_asyncio
 from pymongo import errors
 from src.config import get_settings
 from pymongo import MongoClient
+from src.database.price_buckets import TICKS_COLLECTION, BARS_COLLECTIONS
+from src.database.index_manager import IndexManager
+from src.database.pagination import KeysetPaginator
+from src.database.query_filters import (
+    SEARCH_KEYS, add_search_keys, signal_filter
+)
 
 logger = logging.getLogger(__name__)
 
@@ -41,9 +48,17 @@ class AsyncMongoDBClient:
         self.accounts_collection = "accounts"
         self.positions_collection = "positions"
         self.trades_collection = "trades"
+        self.orders_collection = "orders"
         self.liveprice = "liveprice"
         self.notifications  = "notifications"
         self.signals_collection = "signals"
+        self.analysis_collection = "analysis"
+        
+        # Batched inserts for append-only collections (created on first use)
+        self._insert_batcher = None
+        self._index_task = None
+        self._index_manager = None
+        self._paginator = None
         
         self._initialized = True
         
@@ -69,10 +84,10 @@ class AsyncMongoDBClient:
             # Get database
             self.db = self.client[self.settings.DATABASE_NAME]
             
-            # Create indexes only if not already created
+            # Verify indexes once per connection; backfills and index builds run in the background
             if not self.indexes_created:
-                await self.create_indexes()
                 self.indexes_created = True
+                self._index_task = asyncio.ensure_future(self.create_indexes())
             
             self.is_connected = True
             self.log_message("Connected to MongoDB successfully", "info")
@@ -84,6 +99,9 @@ class AsyncMongoDBClient:
 
     async def disconnect(self):
         """Disconnect from MongoDB"""
+        if self._insert_batcher:
+            # Write buffered inserts before the connection goes away
+            await self._insert_batcher.stop()
         if self.client:
             self.client.close()
             self.is_connected = False
@@ -91,37 +109,74 @@ class AsyncMongoDBClient:
             self.log_message("Disconnected from MongoDB", "info")
 
     async def create_indexes(self) -> bool:
-        """Create useful indexes on collections"""
-        if self.is_connected or self.client:
-            return True
-        
+        """Backfill derived query fields, then build any declared index the server is missing"""
+        if self.db is None:
+            return False
+        await self.backfill_query_fields()
+        return await self.index_manager.sync()
+
+    @property
+    def index_manager(self) -> IndexManager:
+        if self._index_manager is None:
+            self._index_manager = IndexManager(self)
+        return self._index_manager
+
+    async def find_page(self, collection: str, query: Dict[str, Any], sort_field: str, limit: int,
+                        cursor: Optional[str] = None, page: int = 1, total: str = "estimated",
+                        facet: bool = False) -> Dict[str, Any]:
+        """Newest-first page by (sort_field, _id); see KeysetPaginator (bad cursors raise ValueError)"""
+        if not self.is_connected:
+            if not await self.connect():
+                raise ConnectionError("MongoDB unavailable")
+        if self._paginator is None:
+            self._paginator = KeysetPaginator(self)
+        return await self._paginator.fetch(collection, query, sort_field, limit, cursor, page, total, facet)
+
+    async def backfill_query_fields(self) -> bool:
+        """Set normalized keys and the signal TTL date on documents written before they existed"""
         try:
-            # Create indexes for accounts collection
-            await self.db[self.accounts_collection].create_index("id", unique=True)
-            await self.db[self.accounts_collection].create_index("last_trade_date")
-            
-            # Create indexes for positions collection
-            await self.db[self.positions_collection].create_index("id", unique=True)
-            await self.db[self.positions_collection].create_index("symbol")
-            await self.db[self.positions_collection].create_index("status")
-            await self.db[self.positions_collection].create_index("entry_time")
-            
-            # Create indexes for trades collection
-            await self.db[self.trades_collection].create_index("id", unique=True)
-            await self.db[self.trades_collection].create_index("symbol")
-            await self.db[self.trades_collection].create_index("timestamp")
-            
-            # Create indexes for analysis collection
-            await self.db[self.analysis_collection].create_index("timestamp")
-            await self.db[self.analysis_collection].create_index("analysis_data.symbol")
-            
-            self.log_message("MongoDB indexes created successfully", "info")
+            for collection in (self.positions_collection, self.signals_collection, self.trades_collection):
+                for field, key in SEARCH_KEYS.items():
+                    result = await self.db[collection].update_many(
+                        {key: {"$exists": False}, field: {"$type": "string", "$ne": ""}},
+                        [{"$set": {key: {"$toUpper": {"$trim": {"input": f"${field}"}}}}}]
+                    )
+                    if result.modified_count:
+                        self.log_message(f"Backfilled {key} on {result.modified_count} {collection} documents", "info")
+            result = await self.db[self.signals_collection].update_many(
+                {"created_at": {"$exists": False}},
+                [{"$set": {"created_at": {"$dateFromString": {"dateString": "$timestamp", "onError": "$$NOW", "onNull": "$$NOW"}}}}]
+            )
+            if result.modified_count:
+                self.log_message(f"Backfilled created_at on {result.modified_count} signals", "info")
             return True
-            
         except Exception as e:
-            self.log_message(f"Error creating MongoDB indexes: {e}", "error")
+            self.log_message(f"Error backfilling query fields: {e}", "error")
             return False
 
+    async def explain_query(self, collection: str, query: Dict[str, Any],
+                            sort: Optional[List[tuple]] = None, limit: int = 50) -> Dict[str, Any]:
+        """Winning plan summary for a find (stages, index used, whether it scans the collection)"""
+        if not self.is_connected:
+            if not await self.connect():
+                return {}
+        cursor = self.db[collection].find(query)
+        if sort:
+            cursor = cursor.sort(sort)
+        plan = (await cursor.limit(limit).explain())["queryPlanner"]["winningPlan"]
+        nodes = self._plan_nodes(plan.get("queryPlan", plan))  # SBE plans nest the classic tree
+        stages = [node.get("stage") for node in nodes]
+        indexes = [node["indexName"] for node in nodes if node.get("indexName")]
+        return {"stages": stages, "indexes": indexes, "collection_scan": "COLLSCAN" in stages}
+
+    def _plan_nodes(self, node: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        if not node:
+            return []
+        nodes = [node]
+        for child in node.get("inputStages") or [node.get("inputStage")]:
+            nodes.extend(self._plan_nodes(child))
+        return nodes
+
     async def insert_document(self, collection: str, document: Dict) -> bool:
         """Insert a document into collection asynchronously"""
         if not self.is_connected:
@@ -138,6 +193,49 @@ class AsyncMongoDBClient:
             self.log_message(f"Error inserting document: {e}", "error")
             return False
 
+    async def insert_many(self, collection: str, documents: List[Dict], ordered: bool = False) -> bool:
+        """Insert documents in one round trip; True only if every document was inserted"""
+        return not await self.insert_batch(collection, documents, ordered=ordered)
+
+    async def insert_batch(self, collection: str, documents: List[Dict], ordered: bool = False) -> Set[int]:
+        """Insert documents in one round trip, returning the indexes of documents that failed"""
+        if not documents:
+            return set()
+        if not self.is_connected:
+            if not await self.connect():
+                return set(range(len(documents)))
+        
+        try:
+            await self.db[collection].insert_many(documents, ordered=ordered)
+            return set()
+        except errors.BulkWriteError as e:
+            # Unordered: everything except the reported write errors was inserted
+            failed = {error["index"] for error in e.details.get("writeErrors", [])}
+            self.log_message(f"{len(failed)} of {len(documents)} inserts into {collection} failed", "error")
+            return failed
+        except Exception as e:
+            self.log_message(f"Error in batch insert to {collection}: {e}", "error")
+            return set(range(len(documents)))
+
+    async def insert_buffered(self, collection: str, document: Dict, wait: bool = False) -> bool:
+        """Queue a document for the next batched insert_many into collection
+        
+        Returns immediately unless ``wait`` is set, in which case it resolves once the
+        batch was written (False if this document failed)
+        """
+        if self._insert_batcher is None:
+            from src.database.insert_batcher import BulkInsertBatcher
+            self._insert_batcher = BulkInsertBatcher(self)
+        return await self._insert_batcher.insert(collection, document, wait=wait)
+
+    async def flush_buffered_inserts(self) -> bool:
+        """Write all buffered inserts now"""
+        return await self._insert_batcher.flush() if self._insert_batcher else True
+
+    def get_batch_stats(self) -> Dict[str, Any]:
+        """Batched insert statistics (batch sizes, flush latency, pending documents)"""
+        return self._insert_batcher.get_stats() if self._insert_batcher else {}
+
     async def find_document(self, collection: str, query: Dict) -> Optional[Dict]:
         """Find a document in collection asynchronously"""
         if not self.is_connected:
@@ -173,6 +271,41 @@ class AsyncMongoDBClient:
             self.log_message(f"Error finding documents: {e}", "error")
             return []
 
+    async def bulk_write(self, collection: str, operations: List[Any], ordered: bool = False) -> bool:
+        """Execute a batch of pymongo write operations in one round trip"""
+        if not operations:
+            return True
+        if not self.is_connected:
+            if not await self.connect():
+                return False
+        
+        try:
+            result = await self.db[collection].bulk_write(operations, ordered=ordered)
+            return result.acknowledged
+        except Exception as e:
+            self.log_message(f"Error in bulk write to {collection}: {e}", "error")
+            return False
+
+    async def bulk_write_failures(self, collection: str, operations: List[Any]) -> Set[int]:
+        """Unordered bulk write, returning the indexes of operations that were not applied"""
+        if not operations:
+            return set()
+        if not self.is_connected:
+            if not await self.connect():
+                return set(range(len(operations)))
+        
+        try:
+            await self.db[collection].bulk_write(operations, ordered=False)
+            return set()
+        except errors.BulkWriteError as e:
+            # Unordered: everything except the reported write errors was applied
+            failed = {error["index"] for error in e.details.get("writeErrors", [])}
+            self.log_message(f"{len(failed)} of {len(operations)} writes to {collection} failed", "error")
+            return failed
+        except Exception as e:
+            self.log_message(f"Error in bulk write to {collection}: {e}", "error")
+            return set(range(len(operations)))
+
     async def update_document(self, collection: str, query: Dict, update: Dict) -> bool:
         """Update a document in collection asynchronously"""
         if not self.is_connected:
@@ -243,7 +376,8 @@ class AsyncMongoDBClient:
         try:
             # Delete all collections
             collections = [self.accounts_collection, self.positions_collection, 
-                         self.trades_collection, self.liveprice,self.notifications,self.signals_collection]
+                         self.trades_collection, self.orders_collection, self.liveprice,self.notifications,self.signals_collection,
+                         TICKS_COLLECTION, *BARS_COLLECTIONS.values()]
             
             for collection in collections:
                 await self.delete_collection(collection)
@@ -286,6 +420,7 @@ class AsyncMongoDBClient:
             # Ensure position has timestamp
             if "last_updated" not in position_data:
                 position_data["last_updated"] = datetime.now(timezone.utc).isoformat()
+            add_search_keys(position_data)
             
             return await self.replace_document(
                 self.positions_collection, 
@@ -308,6 +443,97 @@ class AsyncMongoDBClient:
             self.log_message(f"Error loading positions: {e}", "error")
             return []
 
+    async def load_recent_closed_positions(self, limit: int = 200, account_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Load the most recently closed positions (newest first), optionally of one account"""
+        if not self.is_connected:
+            if not await self.connect():
+                return []
+        try:
+            query: Dict[str, Any] = {"status": "CLOSED"}
+            if account_id:
+                # Positions saved before multi-account support belong to the default account
+                query["account_id"] = {"$in": [account_id, None]} if account_id == "main" else account_id
+            cursor = self.db[self.positions_collection].find(query).sort("exit_time", -1).limit(limit)
+            positions = await cursor.to_list(length=None)
+            for position in positions:
+                if '_id' in position:
+                    position['_id'] = str(position['_id'])
+            return positions
+        except Exception as e:
+            self.log_message(f"Error loading recent closed positions: {e}", "error")
+            return []
+
+    async def get_closed_position_stats(self, days: int = 7) -> Optional[Dict[str, Dict[str, Any]]]:
+        """Aggregate realized PnL totals and per-day (UTC) close counts per account in the database
+        
+        Closed positions contribute their final PnL, partial reduce-only fill trades their realized PnL.
+        """
+        if not self.is_connected:
+            if not await self.connect():
+                return None
+        try:
+            collection = self.db[self.positions_collection]
+            # Positions saved before multi-account support belong to the default account
+            account_key = {"$ifNull": ["$account_id", "main"]}
+            totals = await collection.aggregate([
+                {"$match": {"status": "CLOSED"}},
+                {"$group": {
+                    "_id": account_key,
+                    "count": {"$sum": 1},
+                    "positive_pnl": {"$sum": {"$cond": [{"$gt": ["$pnl", 0]}, "$pnl", 0]}},
+                    "negative_pnl": {"$sum": {"$cond": [{"$lt": ["$pnl", 0]}, "$pnl", 0]}}
+                }}
+            ]).to_list(length=None)
+            
+            cutoff_day = (datetime.now(timezone.utc) - timedelta(days=days)).strftime('%Y-%m-%d')
+            daily = await collection.aggregate([
+                {"$match": {"status": "CLOSED", "exit_time": {"$gte": cutoff_day}}},
+                {"$group": {
+                    "_id": {"account": account_key, "day": {"$substrBytes": ["$exit_time", 0, 10]}},
+                    "closed": {"$sum": 1},
+                    "profitable": {"$sum": {"$cond": [{"$gt": ["$pnl", 0]}, 1, 0]}}
+                }}
+            ]).to_list(length=None)
+            
+            # Partial reduce-only fills realize PnL on positions that may still be open; each is a trade
+            partial_match = {"$match": {"realized_pnl": {"$type": "number"}}}
+            partial_totals = await self.db[self.trades_collection].aggregate([
+                partial_match,
+                {"$group": {
+                    "_id": account_key,
+                    "positive_pnl": {"$sum": {"$cond": [{"$gt": ["$realized_pnl", 0]}, "$realized_pnl", 0]}},
+                    "negative_pnl": {"$sum": {"$cond": [{"$lt": ["$realized_pnl", 0]}, "$realized_pnl", 0]}}
+                }}
+            ]).to_list(length=None)
+            partial_daily = await self.db[self.trades_collection].aggregate([
+                partial_match,
+                {"$match": {"timestamp": {"$gte": cutoff_day}}},
+                {"$group": {
+                    "_id": {"account": account_key, "day": {"$substrBytes": ["$timestamp", 0, 10]}},
+                    "closed": {"$sum": 1},
+                    "profitable": {"$sum": {"$cond": [{"$gt": ["$realized_pnl", 0]}, 1, 0]}}
+                }}
+            ]).to_list(length=None)
+            
+            def account_stats(account_id: str) -> Dict[str, Any]:
+                return stats.setdefault(account_id, {"count": 0, "positive_pnl": 0.0, "negative_pnl": 0.0, "daily": {}})
+            
+            stats: Dict[str, Dict[str, Any]] = {}
+            for row in totals:
+                account_stats(row["_id"])["count"] = row["count"]
+            for row in totals + partial_totals:
+                entry = account_stats(row["_id"])
+                entry["positive_pnl"] += float(row["positive_pnl"])
+                entry["negative_pnl"] += float(row["negative_pnl"])
+            for row in daily + partial_daily:
+                day_counts = account_stats(row["_id"]["account"])["daily"]
+                closed, profitable = day_counts.get(row["_id"]["day"], (0, 0))
+                day_counts[row["_id"]["day"]] = (closed + row["closed"], profitable + row["profitable"])
+            return stats
+        except Exception as e:
+            self.log_message(f"Error aggregating closed positions: {e}", "error")
+            return None
+
     async def delete_position(self, position_id: str) -> bool:
         """Delete position from MongoDB"""
         try:
@@ -323,8 +549,9 @@ class AsyncMongoDBClient:
             # Ensure trade has timestamp
             if "timestamp" not in trade_data:
                 trade_data["timestamp"] = datetime.now(timezone.utc).isoformat()
+            add_search_keys(trade_data)
             
-            return await self.insert_document(self.trades_collection, trade_data)
+            return await self.insert_buffered(self.trades_collection, trade_data, wait=True)
         except Exception as e:
             self.log_message(f"Error saving trade: {e}", "error")
             return False
@@ -353,11 +580,15 @@ class AsyncMongoDBClient:
     async def save_signal(self, signal_data: Dict[str, Any]) -> bool:
         """Save strategy signal data to MongoDB"""
         try:
+            # Copy: callers broadcast the same dict, which must stay JSON-serializable
+            signal_data = dict(signal_data)
             # Ensure signal has timestamp
             if "timestamp" not in signal_data:
                 signal_data["timestamp"] = datetime.now(timezone.utc).isoformat()
+            signal_data.setdefault("created_at", datetime.now(timezone.utc))  # TTL index field
+            add_search_keys(signal_data)
             
-            return await self.insert_document(self.signals_collection, signal_data)
+            return await self.insert_buffered(self.signals_collection, signal_data)
         except Exception as e:
             self.log_message(f"Error saving signal: {e}", "error")
             return False
@@ -369,35 +600,7 @@ class AsyncMongoDBClient:
                 if not await self.connect():
                     return []
                 
-            # Build query filters
-            query = {}
-            if filters:
-                if filters.get('symbol'):
-                    query['symbol'] = {'$regex': filters['symbol'], '$options': 'i'}
-                if filters.get('strategy'):
-                    query['strategy_name'] = {'$regex': filters['strategy'], '$options': 'i'}
-                if filters.get('search'):
-                    search_term = filters['search']
-                    query['$or'] = [
-                        {'symbol': {'$regex': search_term, '$options': 'i'}},
-                        {'strategy_name': {'$regex': search_term, '$options': 'i'}},
-                        {'signal': {'$regex': search_term, '$options': 'i'}}
-                    ]
-                # Date range filter
-                if filters.get('date_from') or filters.get('date_to'):
-                    date_filter = {}
-                    if filters.get('date_from'):
-                        try:
-                            date_filter['$gte'] = datetime.fromisoformat(filters['date_from'].replace('Z', '+00:00'))
-                        except ValueError:
-                            pass  # Skip invalid date format
-                    if filters.get('date_to'):
-                        try:
-                            date_filter['$lte'] = datetime.fromisoformat(filters['date_to'].replace('Z', '+00:00'))
-                        except ValueError:
-                            pass  # Skip invalid date format
-                    if date_filter:
-                        query['timestamp'] = date_filter
+            query = signal_filter(filters)
             
             # Execute query with pagination
             cursor = self.db[self.signals_collection].find(query).sort("timestamp", -1).skip(skip).limit(limit)
@@ -420,36 +623,7 @@ class AsyncMongoDBClient:
                 if not await self.connect():
                     return 0
             
-            # Build query filters (same as in load_signals)
-            query = {}
-            if filters:
-                if filters.get('symbol'):
-                    query['symbol'] = {'$regex': filters['symbol'], '$options': 'i'}
-                if filters.get('strategy'):
-                    query['strategy_name'] = {'$regex': filters['strategy'], '$options': 'i'}
-                if filters.get('search'):
-                    search_term = filters['search']
-                    query['$or'] = [
-                        {'symbol': {'$regex': search_term, '$options': 'i'}},
-                        {'strategy_name': {'$regex': search_term, '$options': 'i'}},
-                        {'signal': {'$regex': search_term, '$options': 'i'}}
-                    ]
-                # Date range filter
-                if filters.get('date_from') or filters.get('date_to'):
-                    date_filter = {}
-                    if filters.get('date_from'):
-                        try:
-                            date_filter['$gte'] = datetime.fromisoformat(filters['date_from'].replace('Z', '+00:00'))
-                        except ValueError:
-                            pass  # Skip invalid date format
-                    if filters.get('date_to'):
-                        try:
-                            date_filter['$lte'] = datetime.fromisoformat(filters['date_to'].replace('Z', '+00:00'))
-                        except ValueError:
-                            pass  # Skip invalid date format
-                    if date_filter:
-                        query['timestamp'] = date_filter
-            
+            query = signal_filter(filters)
             return await self.db[self.signals_collection].count_documents(query)
         except Exception as e:
             self.log_message(f"Error counting signals: {e}", "error")
@@ -526,27 +700,6 @@ class AsyncMongoDBClient:
             cls._instance = None
             cls._initialized = False 
 
-    async def save_live_price_async(self, market_data):
-        """Save a MarketData object (or dict) to the 'liveprice' collection asynchronously"""
-        if not self.is_connected:
-            if not await self.connect():
-                return False
-        try:
-            # Convert to dict if needed
-            if hasattr(market_data, '__dict__'):
-                doc = dict(market_data.__dict__)
-            else:
-                doc = dict(market_data)
-            # Convert timestamp to ISO if needed
-            if 'timestamp' in doc and hasattr(doc['timestamp'], 'isoformat'):
-                doc['timestamp'] = doc['timestamp'].isoformat()
-            await self.db[self.liveprice].insert_one(doc)
-            self.log_message(f"Live price saved for {doc.get('symbol', '?')}", "info")
-            return True
-        except Exception as e:
-            self.log_message(f"Error saving live price: {e}", "error")
-            return False 
-
     async def cleanup_old_data(self, days: int = 90) -> None:
         """Delete trades, positions, and notifications older than 'days' days for data retention."""
         if not self.is_connected:
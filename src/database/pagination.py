@@ -0,0 +1,137 @@
+"""
+Keyset (cursor) pagination
+A page is addressed by an opaque token holding the (sort value, _id) of the last document
+returned, so any page costs one index seek instead of skipping over every earlier page
+"""
+
+import base64
+import json
+import time
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Tuple
+
+from bson import ObjectId
+from bson.errors import InvalidId
+
+from src.config import get_settings
+from src.utils.performance import LRUCache
+
+
+# How the total is reported: cached per filter, counted on every request, or skipped
+TOTAL_MODES = ("estimated", "exact", "none")
+
+
+def encode_cursor(sort_value: Any, doc_id: ObjectId) -> str:
+    """Opaque token for the position after (sort_value, doc_id)"""
+    if isinstance(sort_value, datetime):
+        sort_value = {"$date": sort_value.isoformat()}
+    raw = json.dumps([sort_value, str(doc_id)], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token: str) -> Tuple[Any, ObjectId]:
+    """(sort_value, _id) from a token; ValueError when it is malformed"""
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        sort_value, doc_id = json.loads(raw)
+        if isinstance(sort_value, dict):
+            sort_value = datetime.fromisoformat(sort_value["$date"])
+        return sort_value, ObjectId(doc_id)
+    except (ValueError, TypeError, KeyError, InvalidId) as e:
+        raise ValueError(f"Invalid page cursor: {e}") from e
+
+
+def after_cursor(query: Dict[str, Any], sort_field: str, token: str) -> Dict[str, Any]:
+    """query restricted to documents after the cursor in (sort_field, _id) descending order"""
+    sort_value, doc_id = decode_cursor(token)
+    seek = {"$or": [
+        {sort_field: {"$lt": sort_value}},
+        {sort_field: sort_value, "_id": {"$lt": doc_id}}
+    ]}
+    return {"$and": [query, seek]} if query else seek
+
+
+class KeysetPaginator:
+    """Newest-first pages ordered by (sort_field, _id)
+
+    - ``cursor`` seeks past the previous page; ``page`` (skip) is kept for jumping
+      to an arbitrary page number
+    - totals are exact, cached per filter for ``PAGINATION_COUNT_CACHE_TTL`` seconds
+      ("estimated"), or skipped ("none")
+    - ``facet`` returns the page and an exact total from one $facet aggregation (cursor
+      pages take their total from the count instead)
+    """
+
+    def __init__(self, mongodb_client):
+        self.settings = get_settings()
+        self.mongodb_client = mongodb_client
+        self.count_ttl = self.settings.PAGINATION_COUNT_CACHE_TTL
+        self._counts = LRUCache(max_size=self.settings.PAGINATION_COUNT_CACHE_SIZE)
+
+        # Statistics
+        self.stats = {"pages": 0, "cursor_pages": 0, "facet_pages": 0, "counts": 0, "cached_counts": 0}
+
+    async def fetch(self, collection: str, query: Dict[str, Any], sort_field: str, limit: int,
+                    cursor: Optional[str] = None, page: int = 1, total: str = "estimated",
+                    facet: bool = False) -> Dict[str, Any]:
+        """One page: {"items", "next_cursor", "has_more", "total"}"""
+        page_query = after_cursor(query, sort_field, cursor) if cursor else query
+        skip = 0 if cursor else (page - 1) * limit
+        sort = [(sort_field, -1), ("_id", -1)]
+        db = self.mongodb_client.db[collection]
+
+        self.stats["pages"] += 1
+        if cursor:
+            self.stats["cursor_pages"] += 1
+
+        if facet:
+            self.stats["facet_pages"] += 1
+            # $match and $sort ahead of $facet so the (..., sort_field, _id) indexes supply the
+            # order; facet sub-pipelines cannot use indexes
+            facets: Dict[str, List[Dict[str, Any]]] = {"items": [{"$skip": skip}, {"$limit": limit + 1}]}
+            if not cursor:
+                facets["total"] = [{"$count": "n"}]
+            result = await db.aggregate([
+                {"$match": page_query},
+                {"$sort": dict(sort)},
+                {"$facet": facets}
+            ]).to_list(length=1)
+            items = result[0]["items"] if result else []
+            if cursor:
+                # The pipeline only sees documents past the cursor
+                count = await self._count(collection, query, total)
+            else:
+                count = result[0]["total"][0]["n"] if result and result[0]["total"] else 0
+        else:
+            items = await db.find(page_query).sort(sort).skip(skip).limit(limit + 1).to_list(length=limit + 1)
+            count = await self._count(collection, query, total)
+
+        has_more = len(items) > limit
+        items = items[:limit]
+        next_cursor = encode_cursor(items[-1].get(sort_field), items[-1]["_id"]) if has_more else None
+        return {"items": items, "next_cursor": next_cursor, "has_more": has_more, "total": count}
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get pagination statistics"""
+        return {**self.stats, "count_cache": self._counts.stats()}
+
+    # Internals
+    async def _count(self, collection: str, query: Dict[str, Any], mode: str) -> Optional[int]:
+        if mode == "none":
+            return None
+        db = self.mongodb_client.db[collection]
+        if mode == "estimated" and not query:
+            # Collection metadata, no scan at all
+            return await db.estimated_document_count()
+
+        key = (collection, json.dumps(query, sort_keys=True, default=str))
+        if mode == "estimated":
+            cached = self._counts.get(key)
+            if cached is not None and time.monotonic() - cached[0] < self.count_ttl:
+                self.stats["cached_counts"] += 1
+                return cached[1]
+
+        self.stats["counts"] += 1
+        count = await db.count_documents(query)
+        self._counts.put(key, (time.monotonic(), count))
+        return count
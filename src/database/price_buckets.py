@@ -0,0 +1,292 @@
+"""
+Time-bucketed live price storage
+Every tick is kept in one document per symbol per minute (compact per-field arrays),
+with 1m and 1h OHLC bars maintained on each flush and TTL indexes expiring each tier
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from datetime import datetime, timezone, timedelta
+from typing import Dict, Any, List, Optional, Tuple
+
+from pymongo import UpdateOne
+
+from src.config import get_settings
+
+
+TICKS_COLLECTION = "liveprice_ticks"
+BARS_COLLECTIONS = {"1m": "liveprice_1m", "1h": "liveprice_1h"}
+BAR_SECONDS = {"1m": 60, "1h": 3600}
+
+
+class _PendingBucket:
+    """Ticks for one symbol/minute collected since the last flush"""
+
+    __slots__ = ("offsets", "values", "open", "high", "low", "close", "close_values")
+
+    def __init__(self, fields: List[str]):
+        self.offsets: List[int] = []
+        self.values: Dict[str, List[Optional[float]]] = {field: [] for field in fields}
+        self.open = self.high = self.low = self.close = None
+        self.close_values: Dict[str, Optional[float]] = {}
+
+    def add(self, offset_ms: int, price: float, values: Dict[str, Optional[float]]):
+        self.offsets.append(offset_ms)
+        for field, column in self.values.items():
+            column.append(values.get(field))
+        if self.open is None:
+            self.open = self.high = self.low = price
+        else:
+            self.high = max(self.high, price)
+            self.low = min(self.low, price)
+        self.close = price
+        self.close_values = values
+
+
+class LivePriceBucketStore:
+    """Bucket-pattern persistence for live ticks
+
+    - ``record`` (thread-safe, called from the feed thread) buffers a tick in memory
+    - ``flush`` appends buffered ticks to their minute bucket with one ``$push``/``$each``
+      upsert per symbol-minute and updates the 1m/1h bars with ``$min``/``$max``/``$set``;
+      failed tick and bar writes are both retried on the next flush
+    - TTL indexes on ``start`` (declared in index_manager) expire ticks, 1m bars and
+      1h bars after their retention
+    """
+
+    def __init__(self, mongodb_client):
+        self.settings = get_settings()
+        self.mongodb_client = mongodb_client
+        self.logger = logging.getLogger("database.price_buckets")
+
+        # Price is always stored: bars are built from it
+        self.fields = ["price"] + [f for f in self.settings.LIVE_PRICE_BUCKET_FIELDS if f != "price"]
+        self.flush_interval = self.settings.LIVE_PRICE_FLUSH_INTERVAL
+
+        self._lock = threading.Lock()
+        self._pending: Dict[Tuple[str, int], _PendingBucket] = {}
+        # Bar updates whose write failed, keyed by (timeframe, symbol, bar start); retried on the next flush
+        self._failed_bars: Dict[Tuple[str, str, int], Dict[str, Any]] = {}
+        self._flush_task: Optional[asyncio.Task] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._running = False
+
+        # Statistics
+        self.stats = {
+            "ticks_recorded": 0,
+            "ticks_written": 0,
+            "flushes": 0,
+            "failed_flushes": 0,
+            "failed_bar_writes": 0,
+            "last_flush_ms": 0.0
+        }
+
+    def record(self, symbol: str, values: Dict[str, Any], timestamp: Optional[float] = None):
+        """Buffer one tick (values holds the configured fields; 'price' is required)"""
+        price = values.get("price")
+        if not price:
+            return
+        timestamp = time.time() if timestamp is None else timestamp
+        minute = int(timestamp // 60) * 60
+        offset_ms = int((timestamp - minute) * 1000)
+        tick = {field: values.get(field) for field in self.fields}
+
+        with self._lock:
+            bucket = self._pending.get((symbol, minute))
+            if bucket is None:
+                bucket = self._pending[(symbol, minute)] = _PendingBucket(self.fields)
+            bucket.add(offset_ms, price, tick)
+            self.stats["ticks_recorded"] += 1
+
+    async def start(self):
+        """Start the background flusher"""
+        self._flush_lock = asyncio.Lock()
+        self._running = True
+        self._flush_task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self):
+        """Stop the flusher and write all buffered ticks"""
+        self._running = False
+        if self._flush_task:
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+            self._flush_task = None
+        await self.flush()
+
+    async def flush(self) -> bool:
+        """Write buffered ticks and bar updates; failed writes are requeued"""
+        if self._flush_lock is None:
+            return True
+        async with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+            if not pending and not self._failed_bars:
+                return True
+
+            started = time.perf_counter()
+
+            unwritten: Dict[Tuple[str, int], _PendingBucket] = {}
+            if pending:
+                keys, tick_ops = self._tick_operations(pending)
+                failed = await self.mongodb_client.bulk_write_failures(TICKS_COLLECTION, tick_ops)
+                # Only buckets whose $push was not applied are retried, so no tick is appended twice
+                unwritten = {keys[i]: pending[keys[i]] for i in failed}
+            written = {key: bucket for key, bucket in pending.items() if key not in unwritten}
+
+            # Bars that failed last time go first: they hold the older part of each bar
+            bars, self._failed_bars = self._failed_bars, {}
+            self._merge_bars(bars, written)
+            for collection, (bar_keys, bar_ops) in self._bar_operations(bars).items():
+                failed_bars = await self.mongodb_client.bulk_write_failures(collection, bar_ops)
+                if failed_bars:
+                    # Only updates that were not applied are kept, so no bar counts its ticks twice
+                    self.stats["failed_bar_writes"] += 1
+                    self._failed_bars.update({bar_keys[i]: bars[bar_keys[i]] for i in failed_bars})
+                    self.logger.warning(f"⚠️ Failed to update {len(failed_bars)} {collection} bars, will retry")
+
+            self.stats["flushes"] += 1
+            self.stats["last_flush_ms"] = round((time.perf_counter() - started) * 1000, 2)
+            self.stats["ticks_written"] += sum(len(b.offsets) for b in written.values())
+            if not unwritten:
+                return True
+
+            self.stats["failed_flushes"] += 1
+            self._requeue(unwritten)
+            self.logger.error(f"❌ Failed to write {len(unwritten)} of {len(pending)} live price buckets, will retry")
+            return False
+
+    async def load_ticks(self, symbol: str, start: datetime, end: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """Ticks for symbol in [start, end) flattened back into one dict per tick"""
+        end = end or datetime.now(timezone.utc)
+        query = {"symbol": symbol, "start": {"$gte": start.replace(second=0, microsecond=0), "$lt": end}}
+        buckets = await self._find_sorted(TICKS_COLLECTION, query, 0)
+
+        ticks = []
+        for bucket in buckets:
+            bucket_start = bucket["start"].replace(tzinfo=timezone.utc)
+            for i, offset_ms in enumerate(bucket.get("t", [])):
+                timestamp = bucket_start + timedelta(milliseconds=offset_ms)
+                if start <= timestamp < end:
+                    tick = {"symbol": symbol, "timestamp": timestamp}
+                    for field in self.fields:
+                        column = bucket.get(field) or []
+                        tick[field] = column[i] if i < len(column) else None
+                    ticks.append(tick)
+        return ticks
+
+    async def load_bars(self, symbol: str, timeframe: str = "1m", limit: int = 100) -> List[Dict[str, Any]]:
+        """Most recent OHLC bars for symbol, oldest first"""
+        bars = await self._find_sorted(BARS_COLLECTIONS[timeframe], {"symbol": symbol}, limit, descending=True)
+        for bar in bars:
+            bar.pop("_id", None)
+        return list(reversed(bars))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get bucket store statistics"""
+        with self._lock:
+            pending_ticks = sum(len(b.offsets) for b in self._pending.values())
+        return {**self.stats, "pending_buckets": len(self._pending), "pending_ticks": pending_ticks,
+                "pending_bars": len(self._failed_bars)}
+
+    # Internals
+    def _tick_operations(self, pending: Dict[Tuple[str, int], _PendingBucket]):
+        """(bucket keys, one $push upsert per bucket) in matching order"""
+        keys = list(pending)
+        tick_ops = []
+        for symbol, minute in keys:
+            bucket = pending[(symbol, minute)]
+            push = {"t": {"$each": bucket.offsets}}
+            push.update({field: {"$each": column} for field, column in bucket.values.items()})
+            tick_ops.append(UpdateOne(
+                {"symbol": symbol, "start": datetime.fromtimestamp(minute, tz=timezone.utc)},
+                {"$push": push, "$inc": {"n": len(bucket.offsets)}},
+                upsert=True
+            ))
+        return keys, tick_ops
+
+    @staticmethod
+    def _merge_bars(bars: Dict[Tuple[str, str, int], Dict[str, Any]], written: Dict[Tuple[str, int], _PendingBucket]):
+        """Fold buckets whose ticks were stored into 1m/1h bar aggregates (bars holds older data)"""
+        # Minutes in order so multi-minute bars see opens before closes
+        for (symbol, minute), bucket in sorted(written.items(), key=lambda item: item[0][1]):
+            for timeframe, seconds in BAR_SECONDS.items():
+                bar_start = minute - minute % seconds
+                bar = bars.get((timeframe, symbol, bar_start))
+                if bar is None:
+                    bars[(timeframe, symbol, bar_start)] = {
+                        "open": bucket.open, "high": bucket.high, "low": bucket.low,
+                        "close": bucket.close, "ticks": len(bucket.offsets), "last": bucket.close_values
+                    }
+                else:
+                    bar["high"] = max(bar["high"], bucket.high)
+                    bar["low"] = min(bar["low"], bucket.low)
+                    bar["close"] = bucket.close
+                    bar["ticks"] += len(bucket.offsets)
+                    bar["last"] = bucket.close_values
+
+    @staticmethod
+    def _bar_operations(bars: Dict[Tuple[str, str, int], Dict[str, Any]]) -> Dict[str, Tuple[List[Tuple[str, str, int]], List[UpdateOne]]]:
+        """Per bar collection: (bar keys, one upsert per bar) in matching order"""
+        bar_ops: Dict[str, Tuple[List[Tuple[str, str, int]], List[UpdateOne]]] = {}
+        for key, bar in bars.items():
+            timeframe, symbol, bar_start = key
+            last = bar["last"]
+            keys, ops = bar_ops.setdefault(BARS_COLLECTIONS[timeframe], ([], []))
+            keys.append(key)
+            ops.append(UpdateOne(
+                {"symbol": symbol, "start": datetime.fromtimestamp(bar_start, tz=timezone.utc)},
+                {
+                    "$setOnInsert": {"open": bar["open"]},
+                    "$max": {"high": bar["high"]},
+                    "$min": {"low": bar["low"]},
+                    "$inc": {"ticks": bar["ticks"]},
+                    "$set": {
+                        "close": bar["close"],
+                        # Feed volume is a rolling 24h figure, so bars keep its closing value
+                        "volume_24h": last.get("volume"),
+                        "open_interest": last.get("open_interest"),
+                        "funding_rate": last.get("funding_rate")
+                    }
+                },
+                upsert=True
+            ))
+        return bar_ops
+
+    def _requeue(self, pending: Dict[Tuple[str, int], _PendingBucket]):
+        """Put unwritten buckets back ahead of ticks recorded during the flush"""
+        with self._lock:
+            for key, newer in self._pending.items():
+                older = pending.get(key)
+                if older is None:
+                    pending[key] = newer
+                    continue
+                for i, offset_ms in enumerate(newer.offsets):
+                    older.add(offset_ms, newer.values["price"][i],
+                              {field: column[i] for field, column in newer.values.items()})
+            self._pending = pending
+
+    async def _find_sorted(self, collection: str, query: Dict[str, Any], limit: int,
+                           descending: bool = False) -> List[Dict[str, Any]]:
+        if not self.mongodb_client.is_connected and not await self.mongodb_client.connect():
+            return []
+        try:
+            cursor = self.mongodb_client.db[collection].find(query).sort("start", -1 if descending else 1)
+            if limit > 0:
+                cursor = cursor.limit(limit)
+            return await cursor.to_list(length=None)
+        except Exception as e:
+            self.logger.error(f"❌ Error reading {collection}: {e}")
+            return []
+
+    async def _flush_loop(self):
+        while self._running:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                self.logger.error(f"❌ Live price flusher error: {e}")
@@ -0,0 +1,114 @@
+"""
+Index-friendly query filters
+Symbol and strategy names are stored a second time upper-cased (symbol_key/strategy_key)
+so filters become exact or anchored-prefix matches that an index can serve, instead of
+unanchored case-insensitive regexes that force a collection scan
+"""
+
+import re
+from datetime import datetime, timezone
+from typing import Dict, Any, Iterable, Optional
+
+
+# Source field -> normalized copy stored alongside it
+SEARCH_KEYS = {"symbol": "symbol_key", "strategy_name": "strategy_key"}
+
+
+def normalize_key(value: Any) -> str:
+    """Canonical form of a symbol/strategy for storage and matching"""
+    return str(value).strip().upper()
+
+
+def add_search_keys(document: Dict[str, Any]) -> Dict[str, Any]:
+    """Set the normalized key fields on a document before it is written"""
+    for field, key in SEARCH_KEYS.items():
+        value = document.get(field)
+        if value:
+            document[key] = normalize_key(value)
+    return document
+
+
+def key_match(value: str, exact: bool = False) -> Any:
+    """Exact value, or an anchored case-sensitive prefix regex (an index range scan)"""
+    key = normalize_key(value)
+    return key if exact else {"$regex": f"^{re.escape(key)}"}
+
+
+def search_filter(search: str, key_fields: Iterable[str], exact_fields: Iterable[str] = ()) -> Dict[str, Any]:
+    """$or of prefix matches on key fields and exact matches on upper-case enum fields"""
+    clauses = [{field: key_match(search)} for field in key_fields]
+    clauses += [{field: normalize_key(search)} for field in exact_fields]
+    return {"$or": clauses}
+
+
+def iso_range(date_from: Optional[str] = None, date_to: Optional[str] = None) -> Optional[Dict[str, str]]:
+    """Range over ISO-8601 UTC strings (how timestamps are stored); invalid bounds are skipped"""
+    bounds = {}
+    for operator, value in (("$gte", date_from), ("$lte", date_to)):
+        if not value:
+            continue
+        try:
+            parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+        except ValueError:
+            continue
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=timezone.utc)
+        bounds[operator] = parsed.astimezone(timezone.utc).isoformat()
+    return bounds or None
+
+
+def closed_position_filter(date_from: Optional[str] = None, date_to: Optional[str] = None,
+                           symbol: Optional[str] = None, strategy: Optional[str] = None,
+                           position_type: Optional[str] = None, search: Optional[str] = None) -> Dict[str, Any]:
+    """Closed-position query served by the (status, [symbol_key|strategy_key], exit_time) indexes"""
+    query: Dict[str, Any] = {"status": "CLOSED"}
+    exit_range = iso_range(date_from, date_to)
+    if exit_range:
+        query["exit_time"] = exit_range
+    if symbol:
+        query["symbol_key"] = key_match(symbol)
+    if strategy:
+        query["strategy_key"] = key_match(strategy)
+    if position_type:
+        query["position_type"] = position_type.upper()
+    if search:
+        query.update(search_filter(search, ("symbol_key", "strategy_key")))
+    return query
+
+
+def signal_filter(filters: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Signal query (symbol/strategy/search/date_from/date_to) on the normalized key fields"""
+    query: Dict[str, Any] = {}
+    if not filters:
+        return query
+    if filters.get("symbol"):
+        query["symbol_key"] = key_match(filters["symbol"])
+    if filters.get("strategy"):
+        query["strategy_key"] = key_match(filters["strategy"])
+    if filters.get("search"):
+        query.update(search_filter(filters["search"], ("symbol_key", "strategy_key"), ("signal",)))
+    date_range = iso_range(filters.get("date_from"), filters.get("date_to"))
+    if date_range:
+        query["timestamp"] = date_range
+    return query
+
+
+# Compound indexes matching the filter + sort shapes above (equality, then the
+# (sort key, _id) order that keyset pagination seeks on)
+QUERY_INDEXES = {
+    "positions": [
+        [("status", 1), ("exit_time", -1), ("_id", -1)],
+        [("status", 1), ("symbol_key", 1), ("exit_time", -1), ("_id", -1)],
+        [("status", 1), ("strategy_key", 1), ("exit_time", -1), ("_id", -1)]
+    ],
+    "signals": [
+        [("timestamp", -1), ("_id", -1)],
+        [("symbol_key", 1), ("timestamp", -1), ("_id", -1)],
+        [("strategy_key", 1), ("timestamp", -1), ("_id", -1)],
+        [("signal", 1), ("timestamp", -1), ("_id", -1)]
+    ],
+    "trades": [
+        [("symbol_key", 1), ("timestamp", -1)],
+        [("strategy_key", 1), ("timestamp", -1)]
+    ]
+}
@@ -31,35 +31,35 @@ class TradingSignal(BaseModel):
 class MarketData(BaseModel):
     """Market data structure (expanded)"""
     price: float
-    mark_price: float = None
-    spot_price: float = None
-    volume: float = None
-    turnover: float = None
-    turnover_usd: float = None
-    high: float = None
-    low: float = None
-    open: float = None
-    close: float = None
-    open_interest: float = None
-    oi_value: float = None
-    oi_contracts: float = None
-    oi_value_usd: float = None
-    oi_change_usd_6h: float = None
-    funding_rate: float = None
-    mark_basis: float = None
-    mark_change_24h: float = None
-    underlying_asset_symbol: str = None
-    description: str = None
-    initial_margin: float = None
-    tick_size: float = None
-    price_band_lower: float = None
-    price_band_upper: float = None
-    best_bid: float = None
-    best_ask: float = None
-    bid_size: float = None
-    ask_size: float = None
-    mark_iv: float = None
-    size: float = None
+    mark_price: Optional[float] = None
+    spot_price: Optional[float] = None
+    volume: Optional[float] = None
+    turnover: Optional[float] = None
+    turnover_usd: Optional[float] = None
+    high: Optional[float] = None
+    low: Optional[float] = None
+    open: Optional[float] = None
+    close: Optional[float] = None
+    open_interest: Optional[float] = None
+    oi_value: Optional[float] = None
+    oi_contracts: Optional[float] = None
+    oi_value_usd: Optional[float] = None
+    oi_change_usd_6h: Optional[float] = None
+    funding_rate: Optional[float] = None
+    mark_basis: Optional[float] = None
+    mark_change_24h: Optional[float] = None
+    underlying_asset_symbol: Optional[str] = None
+    description: Optional[str] = None
+    initial_margin: Optional[float] = None
+    tick_size: Optional[float] = None
+    price_band_lower: Optional[float] = None
+    price_band_upper: Optional[float] = None
+    best_bid: Optional[float] = None
+    best_ask: Optional[float] = None
+    bid_size: Optional[float] = None
+    ask_size: Optional[float] = None
+    mark_iv: Optional[float] = None
+    size: Optional[float] = None
     symbol: str
     timestamp: datetime = Field(default_factory=lambda: datetime.now())
     
@@ -67,6 +67,32 @@ class MarketData(BaseModel):
         json_encoders = {
             datetime: lambda v: v.isoformat()
         }
+    
+    @classmethod
+    def from_feed(cls, symbol: str, price_data: Dict[str, Any], timestamp: datetime) -> "MarketData":
+        """Build from a live feed dict without validation (tick hot path).
+
+        Feed values are already typed by the WebSocket parser. This skips both
+        validation and ``model_construct`` overhead; call
+        ``MarketData.model_validate(md.model_dump())`` where a validated copy is needed.
+        """
+        get = price_data.get
+        values = {field: get(field) for field in _MARKET_DATA_FEED_FIELDS}
+        values["price"] = get("price", 0.0)
+        values["symbol"] = symbol
+        values["timestamp"] = timestamp
+        market_data = cls.__new__(cls)
+        _object_setattr(market_data, "__dict__", values)
+        _object_setattr(market_data, "__pydantic_fields_set__", set(_MARKET_DATA_FIELDS))
+        _object_setattr(market_data, "__pydantic_extra__", None)
+        _object_setattr(market_data, "__pydantic_private__", None)
+        return market_data
+
+
+_object_setattr = object.__setattr__
+_MARKET_DATA_FIELDS = tuple(MarketData.model_fields)
+# Fields copied straight from the live feed dict (declaration order preserved for dumps)
+_MARKET_DATA_FEED_FIELDS = tuple(name for name in _MARKET_DATA_FIELDS if name not in ("symbol", "timestamp"))
 
 
 class StrategyStats(BaseModel):
@@ -0,0 +1,349 @@
+"""
+Write-behind persistence queue for broker state
+State changes are journaled locally, coalesced, and flushed to MongoDB in bulk_write batches
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional, Tuple
+
+from pymongo import ReplaceOne
+
+from src.config import get_settings
+from src.database.query_filters import add_search_keys
+
+
+class WriteBehindQueue:
+    """Durable write-behind queue in front of AsyncMongoDBClient
+
+    - Every change is buffered for a local JSONL journal; buffered lines are written and
+      fsynced together every ``journal_sync_interval`` seconds off the event loop (group commit)
+    - Writes are idempotent replace-by-id upserts, coalesced by (collection, id)
+      so only the latest document is written (e.g. one account snapshot per flush)
+    - A background task flushes every ``flush_interval`` seconds or when a batch fills
+    - ``enqueue`` applies backpressure once ``max_pending`` operations are waiting
+    - ``stop`` flushes everything that is still pending
+    """
+
+    def __init__(self, mongodb_client, journal_path: Optional[str] = None):
+        self.settings = get_settings()
+        self.mongodb_client = mongodb_client
+        self.logger = logging.getLogger("database.write_behind")
+
+        self.journal_path = journal_path or self.settings.PERSISTENCE_JOURNAL_PATH
+        self.flush_interval = self.settings.PERSISTENCE_FLUSH_INTERVAL
+        self.max_batch = self.settings.PERSISTENCE_MAX_BATCH
+        self.max_pending = self.settings.PERSISTENCE_MAX_PENDING
+        self.fsync = self.settings.PERSISTENCE_JOURNAL_FSYNC
+        self.journal_sync_interval = self.settings.PERSISTENCE_JOURNAL_SYNC_INTERVAL
+
+        # Pending upserts keyed by (collection, document id)
+        self._upserts: "OrderedDict[Tuple[str, str], Dict[str, Any]]" = OrderedDict()
+
+        self._journal = None
+        self._journal_buffer: List[str] = []
+        self._journal_entries = 0  # Lines in the journal (written or buffered)
+        self._journal_lock: Optional[asyncio.Lock] = None
+        self._sync_task: Optional[asyncio.Task] = None
+        self._flush_task: Optional[asyncio.Task] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._drained: Optional[asyncio.Event] = None
+        self._running = False
+
+        # Statistics
+        self.stats = {
+            "enqueued": 0,
+            "coalesced": 0,
+            "flushes": 0,
+            "documents_written": 0,
+            "failed_flushes": 0,
+            "backpressure_waits": 0,
+            "replayed": 0,
+            "journal_syncs": 0,
+            "journal_compactions": 0,
+            "last_flush_lag_ms": 0.0
+        }
+        self._oldest_pending_time: Optional[float] = None
+
+    @property
+    def pending_count(self) -> int:
+        return len(self._upserts)
+
+    async def start(self, flush_pending: bool = True):
+        """Replay any unflushed journal entries and start the background flusher
+
+        With ``flush_pending=False`` replayed entries are left to the background flusher
+        (used when broker state was recovered locally and must not wait on the database)
+        """
+        self._flush_lock = asyncio.Lock()
+        self._journal_lock = asyncio.Lock()
+        self._wakeup = asyncio.Event()
+        self._drained = asyncio.Event()
+        self._drained.set()
+
+        self._replay_journal()
+        self._journal_entries = self.stats["replayed"]
+        os.makedirs(os.path.dirname(self.journal_path) or ".", exist_ok=True)
+        self._journal = open(self.journal_path, "a", encoding="utf-8")
+
+        if self.pending_count:
+            # Apply writes left by a previous run before state is loaded back from the database
+            self.logger.info(f"Replaying {self.pending_count} unflushed operations from journal")
+            if flush_pending:
+                await self.flush()
+
+        self._running = True
+        self._flush_task = asyncio.create_task(self._flush_loop())
+        self._sync_task = asyncio.create_task(self._sync_loop())
+
+    async def stop(self):
+        """Stop the flusher and flush all pending operations"""
+        self._running = False
+        if self._flush_task:
+            self._wakeup.set()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+            self._flush_task = None
+        if self._sync_task:
+            self._sync_task.cancel()
+            try:
+                await self._sync_task
+            except asyncio.CancelledError:
+                pass
+            self._sync_task = None
+
+        await self.flush()
+        if self.pending_count:
+            self.logger.warning(f"⚠️ {self.pending_count} operations left in journal after shutdown flush")
+
+        await self.sync_journal()
+        if self._journal:
+            self._journal.close()
+            self._journal = None
+
+    # Enqueue API (mirrors AsyncMongoDBClient save_* defaults)
+    async def save_account(self, account_data: Dict[str, Any]):
+        if "last_updated" not in account_data:
+            account_data["last_updated"] = datetime.now(timezone.utc).isoformat()
+        await self.enqueue_upsert(self.mongodb_client.accounts_collection, account_data)
+
+    async def save_position(self, position_data: Dict[str, Any]):
+        if "last_updated" not in position_data:
+            position_data["last_updated"] = datetime.now(timezone.utc).isoformat()
+        add_search_keys(position_data)
+        await self.enqueue_upsert(self.mongodb_client.positions_collection, position_data)
+
+    async def save_trade(self, trade_data: Dict[str, Any]):
+        if "timestamp" not in trade_data:
+            trade_data["timestamp"] = datetime.now(timezone.utc).isoformat()
+        add_search_keys(trade_data)
+        # Trades carry a unique id, so an upsert keeps retries after partial failures idempotent
+        await self.enqueue_upsert(self.mongodb_client.trades_collection, trade_data)
+
+    async def save_order(self, order_data: Dict[str, Any]):
+        if "last_updated" not in order_data:
+            order_data["last_updated"] = datetime.now(timezone.utc).isoformat()
+        await self.enqueue_upsert(self.mongodb_client.orders_collection, order_data)
+
+    async def enqueue_upsert(self, collection: str, document: Dict[str, Any]):
+        """Queue a replace-by-id upsert (coalesced with earlier pending writes of the same id)"""
+        await self._wait_for_capacity()
+        self._write_journal({"collection": collection, "doc": document})
+        self._add_upsert(collection, document)
+
+    async def clear(self):
+        """Drop all pending operations and truncate the journal (used when data is wiped)"""
+        if self._flush_lock is None:
+            self._upserts.clear()
+            self._oldest_pending_time = None
+            return
+        # Wait out any in-flight flush so it cannot rewrite documents after the wipe
+        async with self._flush_lock:
+            self._upserts.clear()
+            self._oldest_pending_time = None
+            await self._compact_journal()
+            self._drained.set()
+
+    async def flush(self) -> bool:
+        """Write all pending operations as bulk_write batches; failed batches stay queued"""
+        if self._flush_lock is None:
+            return False
+        async with self._flush_lock:
+            if not self.pending_count:
+                return True
+
+            upserts = self._upserts
+            self._upserts = OrderedDict()
+            oldest = self._oldest_pending_time
+            self._oldest_pending_time = None
+
+            operations: Dict[str, List[Any]] = {}
+            for (collection, key), document in upserts.items():
+                operations.setdefault(collection, []).append(
+                    ReplaceOne({"id": key}, dict(document), upsert=True)
+                )
+
+            failed_collections = set()
+            for collection, ops in operations.items():
+                for i in range(0, len(ops), self.max_batch):
+                    if not await self.mongodb_client.bulk_write(collection, ops[i:i + self.max_batch]):
+                        failed_collections.add(collection)
+                        break
+
+            written = sum(len(ops) for c, ops in operations.items() if c not in failed_collections)
+            self.stats["documents_written"] += written
+            self.stats["flushes"] += 1
+            if oldest is not None:
+                self.stats["last_flush_lag_ms"] = round((time.time() - oldest) * 1000, 2)
+
+            if failed_collections:
+                # Requeue failed work under anything enqueued during the flush (newer wins)
+                self.stats["failed_flushes"] += 1
+                retry_upserts = OrderedDict(
+                    (key, doc) for key, doc in upserts.items() if key[0] in failed_collections
+                )
+                retry_upserts.update(self._upserts)
+                self._upserts = retry_upserts
+                self._oldest_pending_time = oldest
+                self.logger.error(f"❌ Write-behind flush failed for {sorted(failed_collections)}, will retry")
+
+            stale = self._journal_entries - self.pending_count
+            if stale and (not self.pending_count or stale >= self.max_batch):
+                # Truncate once drained; while writes are failing, only compact once it pays off
+                await self._compact_journal()
+            if self.pending_count < self.max_pending:
+                self._drained.set()
+            return not failed_collections
+
+    async def sync_journal(self):
+        """Write buffered journal lines and fsync them in one batch, off the event loop"""
+        if self._journal_lock is None:
+            return
+        async with self._journal_lock:
+            if not self._journal_buffer or not self._journal:
+                return
+            lines, self._journal_buffer = self._journal_buffer, []
+            await asyncio.to_thread(self._append_journal, lines)
+            self.stats["journal_syncs"] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get write-behind queue statistics"""
+        return {
+            **self.stats,
+            "pending": self.pending_count,
+            "oldest_pending_age_ms": round((time.time() - self._oldest_pending_time) * 1000, 2)
+            if self._oldest_pending_time else 0.0
+        }
+
+    # Internals
+    async def _flush_loop(self):
+        """Flush on interval or when a batch is full; back off while the database is failing"""
+        consecutive_failures = 0
+        while self._running:
+            timeout = min(self.flush_interval * (2 ** consecutive_failures), 30.0)
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                consecutive_failures = 0 if await self.flush() else min(consecutive_failures + 1, 6)
+            except Exception as e:
+                consecutive_failures = min(consecutive_failures + 1, 6)
+                self.logger.error(f"❌ Write-behind flusher error: {e}")
+
+    async def _wait_for_capacity(self):
+        """Backpressure: block producers while too many operations are pending"""
+        if self._drained is None or self.pending_count < self.max_pending:
+            return
+        self.stats["backpressure_waits"] += 1
+        self._drained.clear()
+        self._wakeup.set()
+        try:
+            await asyncio.wait_for(self._drained.wait(), timeout=self.settings.PERSISTENCE_BACKPRESSURE_TIMEOUT)
+        except asyncio.TimeoutError:
+            # Database unavailable: keep trading, the journal still holds every change
+            self.logger.warning(f"⚠️ Write-behind backlog at {self.pending_count} operations, database not draining")
+
+    def _add_upsert(self, collection: str, document: Dict[str, Any]):
+        key = (collection, document["id"])
+        if key in self._upserts:
+            self.stats["coalesced"] += 1
+            self._upserts.move_to_end(key)
+        self._upserts[key] = document
+        self._mark_enqueued()
+
+    def _mark_enqueued(self):
+        self.stats["enqueued"] += 1
+        if self._oldest_pending_time is None:
+            self._oldest_pending_time = time.time()
+        if self._wakeup and self.pending_count >= self.max_batch:
+            self._wakeup.set()
+
+    async def _sync_loop(self):
+        while self._running:
+            await asyncio.sleep(self.journal_sync_interval)
+            try:
+                await self.sync_journal()
+            except Exception as e:
+                self.logger.error(f"❌ Journal sync error: {e}")
+
+    def _write_journal(self, entry: Dict[str, Any]):
+        if not self._journal:
+            return
+        self._journal_buffer.append(json.dumps(entry, default=str) + "\n")
+        self._journal_entries += 1
+
+    def _append_journal(self, lines: List[str]):
+        self._journal.write("".join(lines))
+        self._journal.flush()
+        if self.fsync:
+            os.fsync(self._journal.fileno())
+
+    async def _compact_journal(self):
+        """Rewrite the journal down to the operations still pending (file I/O in a worker thread)"""
+        if not self._journal:
+            return
+        async with self._journal_lock:
+            # Pending upserts already include every buffered line
+            lines = [
+                json.dumps({"collection": collection, "doc": document}, default=str) + "\n"
+                for (collection, _), document in self._upserts.items()
+            ]
+            self._journal_buffer = []
+            self._journal_entries = len(lines)
+            await asyncio.to_thread(self._replace_journal, lines)
+            self.stats["journal_compactions"] += 1
+
+    def _replace_journal(self, lines: List[str]):
+        self._journal.close()
+        tmp_path = f"{self.journal_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write("".join(lines))
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+        os.replace(tmp_path, self.journal_path)
+        self._journal = open(self.journal_path, "a", encoding="utf-8")
+
+    def _replay_journal(self):
+        """Load unflushed operations left by a previous run"""
+        if not os.path.exists(self.journal_path):
+            return
+        with open(self.journal_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # Torn final write from a crash
+                    continue
+                self._add_upsert(entry["collection"], entry["doc"])
+                self.stats["replayed"] += 1
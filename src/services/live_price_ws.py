@@ -19,6 +19,8 @@ import websocket
 from websocket import WebSocketApp
 
 from src.config import get_settings
+from src.utils.performance import get_latency_tracker, parse_exchange_time
+from src.services.order_book import OrderBookManager
 
 class RealTimeMarketData:
     """Real-time Market Data Client with Delta Exchange WebSocket Integration"""
@@ -52,6 +54,19 @@ class RealTimeMarketData:
         self._start_time = time.time()
         self._last_heartbeat = time.time()
         self._heartbeat_interval = 30  # seconds
+        
+        # Feed latency histograms (exchange -> receive -> parse)
+        self.latency_tracker = get_latency_tracker()
+        
+        # Optional L2 order books (l2_updates channel)
+        self.l2_enabled = self.settings.L2_ORDERBOOK_ENABLED
+        self.l2_symbols: List[str] = list(self.settings.L2_ORDERBOOK_SYMBOLS or self.settings.TRADING_SYMBOLS)
+        self.order_books: Optional[OrderBookManager] = None
+        if self.l2_enabled:
+            self.order_books = OrderBookManager(
+                capacity=self.settings.L2_ORDERBOOK_DEPTH,
+                resync_callback=self._resubscribe_order_book
+            )
 
     def start(self) -> bool:
         """Start real-time market data system"""
@@ -131,8 +146,24 @@ class RealTimeMarketData:
             "update_count": self._update_count,
             "updates_per_second": round(self._update_count / uptime, 2) if uptime > 0 else 0,
             "active_symbols": len(self.live_prices),
-            "last_update": datetime.now(timezone.utc).isoformat()
+            "last_update": datetime.now(timezone.utc).isoformat(),
+            "order_books": self.order_books.get_stats() if self.order_books else None
         }
+    
+    def get_order_book(self, symbol: str):
+        """Get the in-sync L2 order book for a symbol (None if disabled or resyncing)"""
+        if not self.order_books:
+            return None
+        return self.order_books.get_book(symbol)
+    
+    def _resubscribe_order_book(self, symbol: str) -> None:
+        """Resubscribe to l2_updates for a symbol to receive a fresh snapshot"""
+        if not self.ws or not self.is_connected:
+            return
+        channel = {"name": "l2_updates", "symbols": [symbol]}
+        self.ws.send(json.dumps({"type": "unsubscribe", "payload": {"channels": [channel]}}))
+        self.ws.send(json.dumps({"type": "subscribe", "payload": {"channels": [channel]}}))
+        self.logger.info(f"INFO - [MarketData] OrderBook | Resubscribed to l2_updates for {symbol}")
 
     def _start_websocket_connection(self) -> None:
         """Start WebSocket connection in separate thread"""
@@ -213,6 +244,11 @@ class RealTimeMarketData:
                     ]
                 }
             }
+            if self.l2_enabled:
+                subscribe_msg["payload"]["channels"].append({
+                    "name": "l2_updates",
+                    "symbols": self.l2_symbols
+                })
             
             self.logger.info(f"INFO - [MarketData] WebSocket | Sending subscription message: {json.dumps(subscribe_msg)}")
             ws.send(json.dumps(subscribe_msg))
@@ -230,15 +266,24 @@ class RealTimeMarketData:
     
     def _on_websocket_message(self, ws: WebSocketApp, message: str) -> None:
         """Handle incoming WebSocket messages"""
+        # Stamp receive time before any processing
+        recv_time = time.time()
+        recv_perf = time.perf_counter()
         try:
             data = json.loads(message)
             
-            # Debug logging to see what data we're receiving
-            self.logger.debug(f"DEBUG - [MarketData] WebSocket | Received message: {data}")
+            # Debug logging to see what data we're receiving (guarded: book updates are high-frequency)
+            if self.logger.isEnabledFor(logging.DEBUG):
+                self.logger.debug(f"DEBUG - [MarketData] WebSocket | Received message: {data}")
             
             # Update heartbeat time for any valid message
             self._last_heartbeat = time.time()
             
+            # L2 order book snapshots/deltas are applied in place and not forwarded
+            if self.order_books is not None and data.get("type") == "l2_updates":
+                self.order_books.handle_message(data)
+                return
+            
             # Process market data (Delta Exchange format)
             if "type" in data and data["type"] == "v2/ticker":
                 # Keep the original symbol format (BTCUSD, ETHUSD) to match strategy expectations
@@ -278,6 +323,7 @@ class RealTimeMarketData:
                         
                         # Contract details
                         "contract_type": data.get("contract_type"),
+                        "contract_value": float(data["contract_value"]) if data.get("contract_value") else None,
                         "underlying_asset_symbol": data.get("underlying_asset_symbol"),
                         "turnover_symbol": data.get("turnover_symbol"),
                         "oi_value_symbol": data.get("oi_value_symbol"),
@@ -308,6 +354,20 @@ class RealTimeMarketData:
                         # Greeks (if available)
                         "greeks": data.get("greeks")
                     }
+                    
+                    # Pipeline timestamps for end-to-end latency tracking
+                    exchange_time = parse_exchange_time(data.get("time") or data.get("timestamp"))
+                    parsed_perf = time.perf_counter()
+                    price_update["latency"] = {
+                        "exchange_ts": exchange_time,
+                        "recv_ts": recv_time,
+                        "recv_perf": recv_perf,
+                        "parsed_perf": parsed_perf
+                    }
+                    if exchange_time:
+                        self.latency_tracker.record("exchange_to_receive", recv_time - exchange_time)
+                    self.latency_tracker.record("parse", parsed_perf - recv_perf)
+                    
                     self.live_prices[symbol] = price_update
                     self._update_count += 1
                     
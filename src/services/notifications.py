@@ -20,9 +20,13 @@ import json
 import queue
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
-from fastapi_mail import FastMail, MessageSchema, ConnectionConfig
+import aiosmtplib
+from collections import deque
+from email.utils import formataddr
+from fastapi_mail import ConnectionConfig
 from src.database.mongodb_client import AsyncMongoDBClient
 from src.core.email_formatter import EmailFormatter, TradeExecutionData, PositionExitData
+from src.utils.performance import ExpiringKeyCache
 try:
     from src.database.schemas import NotificationLog, NotificationStatus
 except ImportError:
@@ -53,6 +57,15 @@ class NotificationPriority(Enum):
     CRITICAL = "critical"
 
 
+# Order in which notification workers drain the per-priority queues
+PRIORITY_ORDER = (
+    NotificationPriority.CRITICAL,
+    NotificationPriority.HIGH,
+    NotificationPriority.MEDIUM,
+    NotificationPriority.LOW
+)
+
+
 @dataclass
 class NotificationEvent:
     """Notification event data"""
@@ -87,22 +100,121 @@ class NotificationEvent:
         }
 
 
+class SmtpConnectionPool:
+    """Persistent SMTP sessions shared by the notification workers
+    
+    Sessions open lazily (connect, STARTTLS, login), go back to the pool after each
+    message, are checked with NOOP after sitting idle, and are dropped on any error.
+    """
+    
+    def __init__(self, size: int = 2, idle_timeout: float = 60.0):
+        self.settings = get_settings()
+        self.logger = logging.getLogger("notifications.smtp_pool")
+        self.size = size
+        self.idle_timeout = idle_timeout
+        self._slots: Optional[asyncio.Queue] = None  # (client, last_used) or None for an unopened slot
+        self.stats = {
+            "connections_opened": 0,
+            "connections_reused": 0,
+            "connections_dropped": 0
+        }
+    
+    @property
+    def open_connections(self) -> int:
+        return self.stats["connections_opened"] - self.stats["connections_dropped"]
+    
+    async def send(self, message) -> None:
+        """Send a message on a pooled session; raises on failure (the session is dropped)"""
+        if self._slots is None:
+            self._slots = asyncio.Queue()
+            for _ in range(self.size):
+                self._slots.put_nowait(None)
+        
+        slot = await self._slots.get()
+        client, last_used = slot if slot else (None, 0.0)
+        try:
+            if client is not None and not await self._is_usable(client, last_used):
+                await self._close(client)
+                client = None
+            if client is None:
+                client = await self._connect()
+            else:
+                self.stats["connections_reused"] += 1
+            await client.send_message(message)
+            self._slots.put_nowait((client, time.monotonic()))
+        except BaseException:
+            if client is not None:
+                await self._close(client)
+            self._slots.put_nowait(None)
+            raise
+    
+    async def close(self):
+        """Quit every idle session"""
+        if self._slots is None:
+            return
+        while not self._slots.empty():
+            slot = self._slots.get_nowait()
+            if slot:
+                await self._close(slot[0])
+        self._slots = None
+    
+    async def _is_usable(self, client, last_used: float) -> bool:
+        if not client.is_connected:
+            return False
+        if time.monotonic() - last_used < self.idle_timeout:
+            return True
+        try:
+            await client.noop()
+            return True
+        except Exception:
+            return False
+    
+    async def _connect(self):
+        client = aiosmtplib.SMTP(
+            hostname=self.settings.FASTAPI_MAIL_SERVER,
+            port=self.settings.FASTAPI_MAIL_PORT,
+            use_tls=self.settings.FASTAPI_MAIL_SSL_TLS,
+            start_tls=self.settings.FASTAPI_MAIL_STARTTLS,
+            timeout=30
+        )
+        await client.connect()
+        if self.settings.FASTAPI_MAIL_USERNAME:
+            await client.login(self.settings.FASTAPI_MAIL_USERNAME, self.settings.FASTAPI_MAIL_PASSWORD)
+        self.stats["connections_opened"] += 1
+        self.logger.info(f"SMTP session opened to {self.settings.FASTAPI_MAIL_SERVER}")
+        return client
+    
+    async def _close(self, client):
+        self.stats["connections_dropped"] += 1
+        try:
+            await client.quit()
+        except Exception:
+            client.close()
+
+
 class EmailNotifier:
-    """Email notification handler using FastAPI-Mail and MongoDB logging with centralized EmailFormatter"""
+    """Email notification handler using pooled SMTP sessions and MongoDB logging with centralized EmailFormatter"""
     def __init__(self):
         self.settings = get_settings()
         self.logger = logging.getLogger("notifications.email")
         self.mail_config = ConnectionConfig(**get_fastapi_mail_config())
-        self.fastmail = FastMail(self.mail_config)
+        self.smtp_pool = SmtpConnectionPool(
+            size=self.settings.NOTIFICATION_SMTP_CONNECTIONS,
+            idle_timeout=self.settings.NOTIFICATION_SMTP_IDLE_TIMEOUT
+        )
         self.mongo_client = None
         self._mongo_initialized = False
         
         # Initialize centralized email formatter
         self.email_formatter = EmailFormatter()
         
-        # Email deduplication cache (trade_id -> timestamp)
-        self._sent_emails = {}
-        self._cache_timeout = 300  # 5 minutes
+        # Email deduplication / throttling cache with a window per notification type
+        self._throttle_windows = self.settings.NOTIFICATION_THROTTLE_WINDOWS
+        self._sent_emails = ExpiringKeyCache(default_ttl=self.settings.NOTIFICATION_DEDUP_TTL)
+        
+        # Delivery metrics
+        self._send_latencies = deque(maxlen=500)
+        self.stats = {"send_attempts": 0, "retries": 0}
 
     async def _ensure_mongo_connection(self):
         """Ensure MongoDB connection is established"""
@@ -136,7 +248,7 @@ class EmailNotifier:
             # Don't raise the exception, just log it
 
     async def send_email(self, subject: str, body: str, recipients: list = None) -> bool:
-        """Send email using FastAPI-Mail"""
+        """Send email on a pooled SMTP session, retrying with backoff"""
         if not self.settings.EMAIL_NOTIFICATIONS_ENABLED:
             self.logger.info("Email notifications are disabled")
             return False
@@ -154,19 +266,44 @@ class EmailNotifier:
             self.logger.warning("FASTAPI_MAIL_FROM is not set to a valid email address!")
             return False
 
-        try:
-            message = MessageSchema(
-                subject=subject,
-                recipients=recipients,
-                body=body,
-                subtype="html"
-            )
-            await self.fastmail.send_message(message)
-            self.logger.info(f"Email sent successfully to {recipients}")
-            return True
-        except Exception as e:
-            self.logger.error(f"Failed to send email: {e}")
-            return False
+        message = MIMEMultipart("alternative")
+        message["Subject"] = subject
+        message["From"] = formataddr((self.settings.FASTAPI_MAIL_FROM_NAME, self.settings.FASTAPI_MAIL_FROM))
+        message["To"] = ", ".join(recipients)
+        message.attach(MIMEText(body, "html", "utf-8"))
+        
+        max_retries = self.settings.NOTIFICATION_SMTP_MAX_RETRIES
+        for attempt in range(max_retries + 1):
+            self.stats["send_attempts"] += 1
+            started = time.perf_counter()
+            try:
+                await self.smtp_pool.send(message)
+                self._send_latencies.append(time.perf_counter() - started)
+                self.logger.info(f"Email sent successfully to {recipients}")
+                return True
+            except Exception as e:
+                if attempt < max_retries:
+                    self.stats["retries"] += 1
+                    self.logger.warning(f"⚠️ Email send failed (attempt {attempt + 1}), retrying: {e}")
+                    await asyncio.sleep(self.settings.NOTIFICATION_SMTP_RETRY_BACKOFF * (2 ** attempt))
+                else:
+                    self.logger.error(f"Failed to send email: {e}")
+        return False
+    
+    def get_delivery_stats(self) -> Dict[str, Any]:
+        """SMTP delivery metrics: latency, retries and pooled sessions"""
+        latencies = sorted(self._send_latencies)
+        return {
+            **self.stats,
+            **self.smtp_pool.stats,
+            "smtp_connections_open": self.smtp_pool.open_connections,
+            "send_latency_ms": {
+                "avg": round(sum(latencies) / len(latencies) * 1000, 2) if latencies else 0.0,
+                "p95": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000, 2)
+                if latencies else 0.0,
+                "max": round(latencies[-1] * 1000, 2) if latencies else 0.0
+            }
+        }
 
     async def send_notification_email(self, event: NotificationEvent) -> bool:
         """Send notification email and log to database with deduplication"""
@@ -180,14 +317,16 @@ class EmailNotifier:
             await self._log_notification_to_db(event, "skipped", f"Event type {event.type.value} disabled")
             return False
 
-        # Check for duplicate emails (for trade execution and risk alerts)
-        if self._is_duplicate_notification(event):
+        # Check for duplicate emails (for trade execution and risk alerts); the key is reserved
+        # atomically so concurrent workers cannot send the same email twice
+        is_new, cache_key = self._reserve_notification(event)
+        if not is_new:
             self.logger.info(f"Duplicate/throttled notification prevented: {event.title}")
             await self._log_notification_to_db(event, "skipped", "Duplicate notification prevented")
             return False
 
         subject = self._create_email_subject(event)
-        body = self._create_email_body(event)
+        body = await self.email_formatter.render_async(self._create_email_body, event)
         
         status = "failed"
         error = None
@@ -197,8 +336,6 @@ class EmailNotifier:
             sent = await self.send_email(subject, body)
             if sent:
                 status = "sent"
-                # Mark email as sent for deduplication/throttling
-                self._mark_notification_sent(event)
                 self.logger.info(f"Notification email sent successfully: {event.title}")
             else:
                 error = "Email sending failed"
@@ -207,12 +344,57 @@ class EmailNotifier:
             status = "failed"
             error = str(e)
             self.logger.error(f"Exception while sending notification email: {e}")
+        if not sent and cache_key:
+            self._sent_emails.discard(cache_key)
 
         # Always log to database regardless of email success/failure
         await self._log_notification_to_db(event, status, error)
         
         return sent
 
+    async def send_digest_email(self, events: List[NotificationEvent], window_seconds: float = 0.0) -> bool:
+        """Send several notifications as one digest email and log them in a single batch"""
+        if not self.settings.EMAIL_NOTIFICATIONS_ENABLED:
+            await self._log_notifications_to_db(events, "skipped", "Email notifications disabled")
+            return False
+        
+        # Reserve deduplication keys before sending (released again if the digest fails)
+        included, skipped, cache_keys = [], [], []
+        for event in events:
+            is_new, cache_key = self._reserve_notification(event) if self._should_send_email_for_event(event) else (False, None)
+            if is_new:
+                included.append(event)
+                cache_keys.append(cache_key)
+            else:
+                skipped.append(event)
+        await self._log_notifications_to_db(skipped, "skipped", "Duplicate or disabled notification")
+        if not included:
+            return False
+        subject, body = await self.email_formatter.render_async(
+            self.email_formatter.format_notification_digest_email, [e.to_dict() for e in included], window_seconds
+        )
+        
+        sent = False
+        error = None
+        try:
+            sent = await self.send_email(subject, body)
+            if not sent:
+                error = "Email sending failed"
+        except Exception as e:
+            error = str(e)
+            self.logger.error(f"Exception while sending digest email: {e}")
+        
+        if sent:
+            self.logger.info(f"Digest email sent with {len(included)} notifications")
+        else:
+            for cache_key in cache_keys:
+                if cache_key:
+                    self._sent_emails.discard(cache_key)
+            self.logger.error(f"Failed to send digest email with {len(included)} notifications")
+        
+        await self._log_notifications_to_db(included, "sent" if sent else "failed", error)
+        return sent
+    
     async def _log_notification_to_db(self, event: NotificationEvent, status: str, error: str = None):
         """Log notification to MongoDB database"""
         try:
@@ -222,37 +404,57 @@ class EmailNotifier:
                 self.logger.error("MongoDB client not available for logging")
                 return False
 
-            log_data = {
-                "type": event.type.value,
-                "priority": event.priority.value,
-                "title": event.title,
-                "message": event.message,
-                "data": event.data,
-                "timestamp": event.timestamp,
-                "user_id": event.user_id,
-                "trade_id": event.trade_id,
-                "position_id": event.position_id,
-                "symbol": event.symbol,
-                "price": event.price,
-                "pnl": event.pnl,
-                "status": status,
-                "error": error,
-                "created_at": datetime.now(timezone.utc)
-            }
-
-            result = await self.mongo_client.insert_document("notifications", log_data)
+            log_data = self._build_log_document(event, status, error)
+            # Batched with other notification logs (failures are logged by the batcher)
+            await self.mongo_client.insert_buffered("notifications", log_data)
+            self.logger.info(f"Notification logged to database: {event.title} (Status: {status})")
+            return True
+                
+        except Exception as ex:
+            self.logger.error(f"Exception while logging to database: {ex}")
+            return False
+    
+    async def _log_notifications_to_db(self, events: List[NotificationEvent], status: str, error: str = None):
+        """Log several notifications to MongoDB in a single bulk write"""
+        if not events:
+            return True
+        try:
+            await self._ensure_mongo_connection()
             
-            if result:
-                self.logger.info(f"Notification logged to database: {event.title} (Status: {status})")
-                return True
-            else:
-                self.logger.error(f"Failed to log notification to database: {event.title}")
+            if not self.mongo_client:
+                self.logger.error("MongoDB client not available for logging")
                 return False
-                
+            
+            documents = [self._build_log_document(event, status, error) for event in events]
+            if await self.mongo_client.insert_many("notifications", documents):
+                self.logger.info(f"{len(events)} notifications logged to database (Status: {status})")
+                return True
+            self.logger.error(f"Failed to log {len(events)} notifications to database")
+            return False
+        
         except Exception as ex:
             self.logger.error(f"Exception while logging to database: {ex}")
             return False
     
+    def _build_log_document(self, event: NotificationEvent, status: str, error: str = None) -> Dict[str, Any]:
+        return {
+            "type": event.type.value,
+            "priority": event.priority.value,
+            "title": event.title,
+            "message": event.message,
+            "data": event.data,
+            "timestamp": event.timestamp,
+            "user_id": event.user_id,
+            "trade_id": event.trade_id,
+            "position_id": event.position_id,
+            "symbol": event.symbol,
+            "price": event.price,
+            "pnl": event.pnl,
+            "status": status,
+            "error": error,
+            "created_at": datetime.now(timezone.utc)
+        }
+    
     def _should_send_email_for_event(self, event: NotificationEvent) -> bool:
         """Check if email should be sent for this event type"""
         # Send emails for all essential notification types
@@ -265,51 +467,24 @@ class EmailNotifier:
             NotificationType.SYSTEM_SHUTDOWN
         ]
     
-    def _is_duplicate_notification(self, event: NotificationEvent) -> bool:
-        """Check if this notification was already sent recently (supports throttling)"""
-        
-        # Clean old entries
-        current_time = time.time()
-        self._sent_emails = {
-            key: timestamp for key, timestamp in self._sent_emails.items()
-            if current_time - timestamp < self._cache_timeout
-        }
-        
-        # For trade executions, use trade_id for strict deduplication
+    def _notification_cache_key(self, event: NotificationEvent) -> Optional[str]:
+        """Deduplication key: trade_id for trades, symbol + alert type for risk alerts"""
         if event.trade_id:
-            cache_key = f"{event.type.value}_{event.trade_id}"
-            return cache_key in self._sent_emails
-        
-        # For risk alerts, use symbol + alert type for throttling (10 minutes)
+            return f"{event.type.value}_{event.trade_id}"
         if event.type == NotificationType.RISK_ALERT:
-            risk_throttle_window = 600  # 10 minutes for risk alerts
             symbol = event.symbol or "PORTFOLIO"
             alert_type = event.data.get("alert_type", "Risk Alert")
-            cache_key = f"risk_{symbol}_{alert_type}"
-            
-            # Check if this specific risk alert was sent recently
-            if cache_key in self._sent_emails:
-                time_since_last = current_time - self._sent_emails[cache_key]
-                return time_since_last < risk_throttle_window
-        
+            return f"risk_{symbol}_{alert_type}"
         # For other notifications, no throttling by default
-        return False
+        return None
     
-    def _mark_notification_sent(self, event: NotificationEvent):
-        """Mark this notification as sent in the cache"""
-        current_time = time.time()
-        
-        # For trade executions
-        if event.trade_id:
-            cache_key = f"{event.type.value}_{event.trade_id}"
-            self._sent_emails[cache_key] = current_time
-        
-        # For risk alerts
-        elif event.type == NotificationType.RISK_ALERT:
-            symbol = event.symbol or "PORTFOLIO"
-            alert_type = event.data.get("alert_type", "Risk Alert")
-            cache_key = f"risk_{symbol}_{alert_type}"
-            self._sent_emails[cache_key] = current_time
+    def _reserve_notification(self, event: NotificationEvent) -> tuple[bool, Optional[str]]:
+        """Atomically mark this notification as sent; returns (False, key) for a duplicate"""
+        cache_key = self._notification_cache_key(event)
+        if cache_key is None:
+            return True, None
+        window = self._throttle_windows.get(event.type.value)
+        return self._sent_emails.add_if_absent(cache_key, window), cache_key
     
     def _create_email_subject(self, event: NotificationEvent) -> str:
         """Create email subject line"""
@@ -810,16 +985,29 @@ class NotificationManager:
         # Initialize notification channels
         self.email_notifier = EmailNotifier()
         
-        # Async support
-        self._notification_queue = asyncio.Queue(maxsize=1000)
-        self._notification_task = None
+        # Async support: one queue per priority drained by a pool of workers (highest priority first)
+        queue_size = self.settings.NOTIFICATION_QUEUE_SIZE
+        self._queues = {priority: asyncio.Queue(maxsize=queue_size) for priority in PRIORITY_ORDER}
+        self._pending: Optional[asyncio.Semaphore] = None
+        self._worker_tasks: List[asyncio.Task] = []
+        self._worker_count = max(1, self.settings.NOTIFICATION_WORKERS)
         self._running = False
         
+        # Digest batching: non-critical events collected over a window and sent as one email
+        self.digest_enabled = self.settings.NOTIFICATION_DIGEST_ENABLED
+        self.digest_window = self.settings.NOTIFICATION_DIGEST_WINDOW
+        self._digest_buffer: List[NotificationEvent] = []
+        self._digest_task = None
+        self._digest_wakeup: Optional[asyncio.Event] = None
+        self._recent_high: deque = deque()  # Timestamps of recent HIGH events (burst detection)
+        
         # Statistics
         self._stats = {
             "total_notifications": 0,
             "emails_sent": 0,
             "emails_failed": 0,
+            "digests_sent": 0,
+            "digested_events": 0,
             "last_notification": None
         }
         
@@ -837,10 +1025,16 @@ class NotificationManager:
             
             self._running = True
             
-            # Start async notification processor
-            self._notification_task = asyncio.create_task(self._process_notifications())
+            # Start async notification workers
+            self._pending = asyncio.Semaphore(sum(q.qsize() for q in self._queues.values()))
+            self._worker_tasks = [
+                asyncio.create_task(self._process_notifications(i)) for i in range(self._worker_count)
+            ]
+            if self.digest_enabled:
+                self._digest_wakeup = asyncio.Event()
+                self._digest_task = asyncio.create_task(self._process_digests())
             
-            self.logger.info("Notification manager started successfully")
+            self.logger.info(f"Notification manager started successfully ({self._worker_count} workers)")
             return True
             
         except Exception as e:
@@ -855,13 +1049,22 @@ class NotificationManager:
         
         self._running = False
         
-        # Stop async task
-        if self._notification_task:
-            self._notification_task.cancel()
+        # Send whatever is still waiting for the next digest
+        if self._digest_task:
+            self._digest_task.cancel()
             try:
-                await self._notification_task
+                await self._digest_task
             except asyncio.CancelledError:
                 pass
+            self._digest_task = None
+        await self._flush_digest()
+        
+        # Stop async workers
+        for task in self._worker_tasks:
+            task.cancel()
+        await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        self._worker_tasks = []
+        await self.email_notifier.smtp_pool.close()
         
         self.logger.info("Notification manager stopped")
     
@@ -872,9 +1075,17 @@ class NotificationManager:
             await self.start()
         
         try:
-            await self._notification_queue.put(event)
             self._stats["total_notifications"] += 1
             self._stats["last_notification"] = datetime.now(timezone.utc)
+            if self._should_digest(event):
+                self._digest_buffer.append(event)
+                if len(self._digest_buffer) >= self.settings.NOTIFICATION_DIGEST_MAX_EVENTS:
+                    self._digest_wakeup.set()
+                self.logger.info(f"Notification added to digest: {event.type.value} - {event.title}")
+                return True
+            
+            await self._queues[event.priority].put(event)
+            self._pending.release()
             self.logger.info(f"Notification queued: {event.type.value} - {event.title}")
             return True
         except Exception as e:
@@ -1215,16 +1426,15 @@ class NotificationManager:
     
     
     # Private methods
-    async def _process_notifications(self):
-        """Process notifications asynchronously"""
-        self.logger.info("Started processing notifications")
+    async def _process_notifications(self, worker_id: int = 0):
+        """Worker loop: take the highest-priority pending notification and process it"""
+        self.logger.info(f"Notification worker {worker_id} started")
         
         while self._running:
             try:
-                # Wait for notification with timeout
-                try:
-                    event = await asyncio.wait_for(self._notification_queue.get(), timeout=1.0)
-                except asyncio.TimeoutError:
+                await self._pending.acquire()
+                event = self._next_event()
+                if event is None:
                     continue
                 
                 # Process notification
@@ -1236,6 +1446,56 @@ class NotificationManager:
             except Exception as e:
                 self.logger.error(f"Error processing notification: {e}")
     
+    def _should_digest(self, event: NotificationEvent) -> bool:
+        """LOW/MEDIUM events are always digested; HIGH only during a burst; CRITICAL never"""
+        if not self.digest_enabled or self._digest_task is None or not self.email_enabled:
+            return False
+        if event.priority in (NotificationPriority.LOW, NotificationPriority.MEDIUM):
+            return True
+        if event.priority != NotificationPriority.HIGH:
+            return False
+        
+        now = time.monotonic()
+        self._recent_high.append(now)
+        while self._recent_high and now - self._recent_high[0] > self.digest_window:
+            self._recent_high.popleft()
+        return len(self._recent_high) > self.settings.NOTIFICATION_DIGEST_BURST_THRESHOLD
+    
+    async def _process_digests(self):
+        """Flush the digest buffer once per window (or early when it fills up)"""
+        while self._running:
+            try:
+                await asyncio.wait_for(self._digest_wakeup.wait(), timeout=self.digest_window)
+            except asyncio.TimeoutError:
+                pass
+            self._digest_wakeup.clear()
+            await self._flush_digest()
+    
+    async def _flush_digest(self):
+        events, self._digest_buffer = self._digest_buffer, []
+        if not events:
+            return
+        try:
+            if len(events) == 1:
+                # Nothing to batch: send it as a regular notification
+                await self._process_single_notification(events[0])
+                return
+            self._stats["digested_events"] += len(events)
+            if await self.email_notifier.send_digest_email(events, self.digest_window):
+                self._stats["digests_sent"] += 1
+                self._stats["emails_sent"] += 1
+            else:
+                self._stats["emails_failed"] += 1
+        except Exception as e:
+            self.logger.error(f"❌ Error sending notification digest: {e}")
+    
+    def _next_event(self) -> Optional[NotificationEvent]:
+        for priority in PRIORITY_ORDER:
+            queue = self._queues[priority]
+            if not queue.empty():
+                return queue.get_nowait()
+        return None
+    
     async def _process_single_notification(self, event: NotificationEvent):
         """Process a single notification asynchronously"""
         try:
@@ -1262,7 +1522,11 @@ class NotificationManager:
         """Get notification statistics"""
         return {
             **self._stats,
-            "queue_size": self._notification_queue.qsize() if self._notification_queue else 0,
+            "queue_size": sum(q.qsize() for q in self._queues.values()),
+            "queue_depth": {priority.value: self._queues[priority].qsize() for priority in PRIORITY_ORDER},
+            "workers": len(self._worker_tasks),
+            "digest_pending": len(self._digest_buffer),
+            "delivery": self.email_notifier.get_delivery_stats(),
             "running": self._running
         }
 
@@ -0,0 +1,340 @@
+"""
+L2 Order Book with preallocated NumPy array storage
+Applies Delta Exchange l2_updates snapshots/deltas with sequence gap detection
+and provides fast depth and VWAP queries for the broker and risk manager
+"""
+
+import logging
+import threading
+import time
+from typing import Dict, List, Optional, Tuple, Any
+
+import numpy as np
+
+
+class BookSide:
+    """One side of an L2 book stored as sorted, preallocated price/size arrays
+
+    Levels are kept in ``keys`` sorted ascending from best to worst. For asks
+    the key is the price; for bids it is the negated price so that both sides
+    share the same binary-search and in-place shift logic.
+    """
+
+    def __init__(self, is_bid: bool, capacity: int = 1000):
+        self.is_bid = is_bid
+        self.capacity = capacity
+        self._sign = -1.0 if is_bid else 1.0
+        self.keys = np.empty(capacity, dtype=np.float64)
+        self.sizes = np.empty(capacity, dtype=np.float64)
+        self.count = 0
+
+    def clear(self):
+        """Remove all levels (arrays are reused)"""
+        self.count = 0
+
+    def load(self, levels: np.ndarray):
+        """Replace the side with a snapshot given as an (n, 2) price/size array"""
+        if levels.size == 0:
+            self.count = 0
+            return
+        levels = levels[levels[:, 1] > 0]
+        keys = levels[:, 0] * self._sign
+        order = np.argsort(keys, kind="stable")[:self.capacity]
+        n = len(order)
+        self.keys[:n] = keys[order]
+        self.sizes[:n] = levels[order, 1]
+        self.count = n
+
+    def set_level(self, price: float, size: float):
+        """Insert, update or (size == 0) delete a single price level"""
+        key = price * self._sign
+        n = self.count
+        i = int(np.searchsorted(self.keys[:n], key))
+        exists = i < n and self.keys[i] == key
+
+        if size <= 0:
+            if exists:
+                self.keys[i:n - 1] = self.keys[i + 1:n]
+                self.sizes[i:n - 1] = self.sizes[i + 1:n]
+                self.count = n - 1
+            return
+
+        if exists:
+            self.sizes[i] = size
+            return
+
+        if n >= self.capacity:
+            # Book full: drop the worst level unless the new one is even worse
+            if i >= n:
+                return
+            n -= 1
+
+        self.keys[i + 1:n + 1] = self.keys[i:n]
+        self.sizes[i + 1:n + 1] = self.sizes[i:n]
+        self.keys[i] = key
+        self.sizes[i] = size
+        self.count = n + 1
+
+    def best(self) -> Tuple[Optional[float], float]:
+        """Best price and size on this side"""
+        if self.count == 0:
+            return None, 0.0
+        return float(self.keys[0] * self._sign), float(self.sizes[0])
+
+    def depth_within(self, limit_price: float) -> Tuple[float, float]:
+        """Total size and notional of levels at or better than limit_price"""
+        n = int(np.searchsorted(self.keys[:self.count], limit_price * self._sign, side="right"))
+        if n == 0:
+            return 0.0, 0.0
+        sizes = self.sizes[:n]
+        prices = self.keys[:n] * self._sign
+        return float(sizes.sum()), float(np.dot(prices, sizes))
+
+    def vwap_for_size(self, size: float) -> Tuple[Optional[float], float]:
+        """Volume-weighted price to fill ``size`` by walking the book
+
+        Returns (vwap, filled_size); filled_size < size when the book is too thin.
+        """
+        if self.count == 0 or size <= 0:
+            return None, 0.0
+        sizes = self.sizes[:self.count]
+        cumulative = np.cumsum(sizes)
+        n = int(np.searchsorted(cumulative, size)) + 1
+        if n > self.count:
+            n = self.count
+        take = sizes[:n].copy()
+        filled = float(cumulative[n - 1])
+        if filled > size:
+            take[-1] -= filled - size
+            filled = size
+        prices = self.keys[:n] * self._sign
+        return float(np.dot(prices, take) / filled), filled
+
+    def to_levels(self, max_levels: int = 10) -> List[List[float]]:
+        """Top-of-book levels as [price, size] pairs"""
+        n = min(self.count, max_levels)
+        return [[float(self.keys[i] * self._sign), float(self.sizes[i])] for i in range(n)]
+
+
+class L2OrderBook:
+    """Level-2 order book for a single symbol"""
+
+    def __init__(self, symbol: str, capacity: int = 1000):
+        self.symbol = symbol
+        self.bids = BookSide(is_bid=True, capacity=capacity)
+        self.asks = BookSide(is_bid=False, capacity=capacity)
+        self.sequence_no: Optional[int] = None
+        self.is_synced = False
+        self.last_update_time = 0.0
+        self.exchange_timestamp: Optional[int] = None
+        self.updates_applied = 0
+        self.sequence_gaps = 0
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def _to_array(levels: List[List[Any]]) -> np.ndarray:
+        """Convert exchange [[price, size], ...] (strings or numbers) to a float array"""
+        if not levels:
+            return np.empty((0, 2), dtype=np.float64)
+        return np.array([level[:2] for level in levels], dtype=np.float64)
+
+    def apply_snapshot(self, bids: List[List[Any]], asks: List[List[Any]],
+                       sequence_no: Optional[int] = None, timestamp: Optional[int] = None):
+        """Replace the whole book with a snapshot"""
+        bid_levels = self._to_array(bids)
+        ask_levels = self._to_array(asks)
+        with self.lock:
+            self.bids.load(bid_levels)
+            self.asks.load(ask_levels)
+            self.sequence_no = sequence_no
+            self.exchange_timestamp = timestamp
+            self.last_update_time = time.time()
+            self.is_synced = True
+            self.updates_applied += 1
+
+    def apply_update(self, bids: List[List[Any]], asks: List[List[Any]],
+                     sequence_no: Optional[int] = None, timestamp: Optional[int] = None) -> bool:
+        """Apply an incremental update
+
+        Returns False (and marks the book unsynced) when a sequence gap is
+        detected; the caller should then request a fresh snapshot.
+        """
+        with self.lock:
+            if not self.is_synced:
+                return False
+            if sequence_no is not None and self.sequence_no is not None and sequence_no != self.sequence_no + 1:
+                self.is_synced = False
+                self.sequence_gaps += 1
+                return False
+
+            for level in bids or ():
+                self.bids.set_level(float(level[0]), float(level[1]))
+            for level in asks or ():
+                self.asks.set_level(float(level[0]), float(level[1]))
+
+            if sequence_no is not None:
+                self.sequence_no = sequence_no
+            self.exchange_timestamp = timestamp
+            self.last_update_time = time.time()
+            self.updates_applied += 1
+            return True
+
+    def best_bid_ask(self) -> Tuple[Optional[float], Optional[float]]:
+        """Best bid and best ask prices"""
+        with self.lock:
+            return self.bids.best()[0], self.asks.best()[0]
+
+    def mid_price(self) -> Optional[float]:
+        """Mid price, or None if either side is empty"""
+        best_bid, best_ask = self.best_bid_ask()
+        if best_bid is None or best_ask is None:
+            return None
+        return (best_bid + best_ask) / 2
+
+    def spread_bps(self) -> Optional[float]:
+        """Bid/ask spread in basis points of mid"""
+        best_bid, best_ask = self.best_bid_ask()
+        if best_bid is None or best_ask is None:
+            return None
+        mid = (best_bid + best_ask) / 2
+        return (best_ask - best_bid) / mid * 10000 if mid > 0 else None
+
+    def depth_at_bps(self, side: str, bps: float) -> Dict[str, float]:
+        """Size and notional resting within ``bps`` of the best price
+
+        side: "bid" or "ask" (the side of the book being measured).
+        """
+        with self.lock:
+            book_side = self.bids if side.lower() == "bid" else self.asks
+            best, _ = book_side.best()
+            if best is None:
+                return {"size": 0.0, "notional": 0.0, "limit_price": None}
+            offset = bps / 10000
+            limit_price = best * (1 - offset) if book_side.is_bid else best * (1 + offset)
+            size, notional = book_side.depth_within(limit_price)
+            return {"size": size, "notional": notional, "limit_price": limit_price}
+
+    def vwap_for_size(self, signal: str, size: float) -> Dict[str, Optional[float]]:
+        """Expected average fill price for a market order of ``size``
+
+        signal: "BUY" walks the asks, "SELL" walks the bids.
+        """
+        with self.lock:
+            is_buy = signal.upper() == "BUY"
+            book_side = self.asks if is_buy else self.bids
+            best, _ = book_side.best()
+            vwap, filled = book_side.vwap_for_size(size)
+        slippage_bps = None
+        if vwap is not None and best:
+            slippage_bps = abs(vwap - best) / best * 10000
+        return {
+            "vwap": vwap,
+            "filled_size": filled,
+            "requested_size": size,
+            "fully_filled": filled >= size,
+            "best_price": best,
+            "slippage_bps": slippage_bps
+        }
+
+    def to_dict(self, max_levels: int = 10) -> Dict[str, Any]:
+        """Top-of-book view for APIs and broadcasts"""
+        with self.lock:
+            return {
+                "symbol": self.symbol,
+                "bids": self.bids.to_levels(max_levels),
+                "asks": self.asks.to_levels(max_levels),
+                "bid_levels": self.bids.count,
+                "ask_levels": self.asks.count,
+                "sequence_no": self.sequence_no,
+                "is_synced": self.is_synced,
+                "last_update_time": self.last_update_time
+            }
+
+
+class OrderBookManager:
+    """Holds L2 books for all subscribed symbols and routes l2_updates messages"""
+
+    def __init__(self, capacity: int = 1000, resync_callback=None):
+        self.capacity = capacity
+        self.resync_callback = resync_callback
+        self.books: Dict[str, L2OrderBook] = {}
+        self.lock = threading.Lock()
+        self.logger = logging.getLogger("order_book")
+
+        # Statistics
+        self.stats = {
+            "snapshots": 0,
+            "updates": 0,
+            "sequence_gaps": 0,
+            "resync_requests": 0,
+            "dropped_updates": 0
+        }
+
+    def get_book(self, symbol: str) -> Optional[L2OrderBook]:
+        """Get the book for a symbol if it exists and is in sync"""
+        book = self.books.get(symbol)
+        if book is None or not book.is_synced:
+            return None
+        return book
+
+    def _get_or_create(self, symbol: str) -> L2OrderBook:
+        book = self.books.get(symbol)
+        if book is None:
+            with self.lock:
+                book = self.books.setdefault(symbol, L2OrderBook(symbol, self.capacity))
+        return book
+
+    def handle_message(self, data: Dict[str, Any]) -> bool:
+        """Apply a Delta Exchange l2_updates message; returns False on sequence gap"""
+        symbol = data.get("symbol")
+        if not symbol:
+            return False
+
+        book = self._get_or_create(symbol)
+        action = data.get("action", "update")
+        bids = data.get("bids") or data.get("buy") or []
+        asks = data.get("asks") or data.get("sell") or []
+        sequence_no = data.get("sequence_no")
+        timestamp = data.get("timestamp")
+
+        if action == "snapshot":
+            book.apply_snapshot(bids, asks, sequence_no, timestamp)
+            self.stats["snapshots"] += 1
+            return True
+
+        if book.apply_update(bids, asks, sequence_no, timestamp):
+            self.stats["updates"] += 1
+            return True
+
+        # Either a gap was just detected or we are waiting for a fresh snapshot
+        if book.sequence_gaps and book.is_synced is False and book.sequence_no is not None:
+            expected = book.sequence_no + 1
+            self.logger.warning(f"WARN - [OrderBook] {symbol} | Sequence gap: expected {expected}, got {sequence_no} - resyncing")
+            self.stats["sequence_gaps"] += 1
+            # Reset sequence so the gap is reported only once per resync
+            book.sequence_no = None
+            self.stats["resync_requests"] += 1
+            if self.resync_callback:
+                try:
+                    self.resync_callback(symbol)
+                except Exception as e:
+                    self.logger.error(f"ERROR - [OrderBook] {symbol} | Resync request failed: {str(e)}")
+        else:
+            self.stats["dropped_updates"] += 1
+        return False
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get order book statistics"""
+        return {
+            **self.stats,
+            "books": {
+                symbol: {
+                    "is_synced": book.is_synced,
+                    "bid_levels": book.bids.count,
+                    "ask_levels": book.asks.count,
+                    "sequence_no": book.sequence_no,
+                    "spread_bps": book.spread_bps()
+                }
+                for symbol, book in list(self.books.items())
+            }
+        }
@@ -0,0 +1,109 @@
+"""
+Price-trigger index for per-tick risk checks
+Per-symbol sorted trigger levels so a price update only visits the levels it crossed
+"""
+
+import math
+from bisect import bisect_left, insort
+from typing import Dict, List, Optional, Set, Tuple
+
+
+# Trigger kinds
+STOP_LOSS = "stop_loss"
+TARGET = "target"
+TRAILING_STOP = "trailing_stop"
+TRAILING_RATCHET = "trailing_ratchet"  # new favourable extreme: move the trailing stop
+RISK_LEVEL = "risk_level"  # liquidation / PnL threshold: run full position risk analysis
+
+# (level, position_id, kind)
+Entry = Tuple[float, str, str]
+
+
+class PriceTriggerBook:
+    """Sorted trigger levels for one symbol, fired on the crossing edge
+
+    ``below`` levels are past when price <= level (long stops, short targets, ...),
+    ``above`` levels are past when price >= level (long targets, short stops, ...).
+    ``crossed`` returns only levels that became past since the previous call, i.e.
+    the levels between the last price and this one, plus levels registered while
+    already past; a level stays quiet while price sits beyond it. O(log n + crossed).
+    """
+
+    def __init__(self, symbol: str):
+        self.symbol = symbol
+        self.last_price: Optional[float] = None
+        self._below: List[Entry] = []
+        self._above: List[Entry] = []
+        self._by_position: Dict[str, Set[Tuple[bool, Entry]]] = {}
+        self._fresh: Set[Tuple[bool, Entry]] = set()  # registered already past, not yet reported
+
+    def __len__(self) -> int:
+        return len(self._below) + len(self._above)
+
+    def set_levels(self, position_id: str, levels: List[Tuple[str, float, bool]]):
+        """Replace a position's levels with (kind, price, fire_below); unchanged levels keep their state"""
+        wanted = {
+            (fire_below, (price, position_id, kind))
+            for kind, price, fire_below in levels if price and price > 0
+        }
+        current = self._by_position.get(position_id, set())
+        for item in current - wanted:
+            self._discard(item)
+        for fire_below, entry in wanted - current:
+            insort(self._below if fire_below else self._above, entry)
+            if self.last_price is not None and self._is_past(fire_below, entry[0], self.last_price):
+                self._fresh.add((fire_below, entry))
+        if wanted:
+            self._by_position[position_id] = wanted
+        else:
+            self._by_position.pop(position_id, None)
+
+    def remove_position(self, position_id: str):
+        """Remove every level registered for a position"""
+        for item in self._by_position.pop(position_id, ()):
+            self._discard(item)
+
+    def crossed(self, price: float, advance: bool = True) -> List[Tuple[str, str, float]]:
+        """(position_id, kind, level) crossed on the move to ``price``
+
+        With ``advance=False`` the book is only peeked at (last price and fresh
+        levels are kept for the next call).
+        """
+        prev = self.last_price
+        if prev is None:
+            # Nothing seen yet: every level already past counts as crossed
+            hits = self._below[bisect_left(self._below, (price,)):]
+            hits += self._above[:bisect_left(self._above, (math.nextafter(price, math.inf),))]
+        else:
+            hits = []
+            if price < prev:
+                # below levels in [price, prev)
+                hits += self._below[bisect_left(self._below, (price,)):bisect_left(self._below, (prev,))]
+            elif price > prev:
+                # above levels in (prev, price]
+                hits += self._above[bisect_left(self._above, (math.nextafter(prev, math.inf),)):
+                                    bisect_left(self._above, (math.nextafter(price, math.inf),))]
+            seen = set(hits)
+            hits += [entry for fire_below, entry in self._fresh
+                     if entry not in seen and self._is_past(fire_below, entry[0], price)]
+
+        if advance:
+            self.last_price = price
+            self._fresh.clear()
+        return [(pid, kind, level) for level, pid, kind in hits]
+
+    def positions(self) -> List[str]:
+        return list(self._by_position)
+
+    # Internals
+    @staticmethod
+    def _is_past(fire_below: bool, level: float, price: float) -> bool:
+        return price <= level if fire_below else price >= level
+
+    def _discard(self, item: Tuple[bool, Entry]):
+        fire_below, entry = item
+        levels = self._below if fire_below else self._above
+        i = bisect_left(levels, entry)
+        if i < len(levels) and levels[i] == entry:
+            del levels[i]
+        self._fresh.discard(item)
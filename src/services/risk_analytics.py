@@ -0,0 +1,398 @@
+"""
+Portfolio VaR / Expected Shortfall, stress scenarios and streaming covariance
+Vectorized over a returns matrix built from the candle cache; the window statistics
+are rolled forward incrementally as new candles close, and an EWMA covariance is
+updated per bar from the live tick stream
+"""
+
+import logging
+import math
+import time
+from datetime import datetime, timezone
+from statistics import NormalDist
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+class PortfolioRiskEngine:
+    """Historical and parametric VaR/ES plus stress scenarios for signed notional exposures
+
+    - ``refresh`` pulls closes from ``candle_source`` (a HistoricalDataProvider) without fetching;
+      when the aligned candle window only moved forward, the new rows are appended and the
+      oldest dropped, updating the running sums behind the mean/covariance in O(k * S^2)
+    - ``evaluate`` takes an (accounts x symbols) notional matrix and returns per-account and
+      total figures in one pass of matrix products
+    """
+
+    def __init__(self, timeframe: str = "15m", lookback: int = 500,
+                 confidence_levels: Sequence[float] = (0.95, 0.99),
+                 scenarios: Optional[Dict[str, Dict[str, Any]]] = None):
+        self.timeframe = timeframe
+        self.lookback = lookback
+        self.confidence_levels = tuple(confidence_levels)
+        self.scenarios = scenarios or {}
+        self.candle_source = None  # Assigned by TradingSystem
+        self.logger = logging.getLogger("risk_manager.analytics")
+
+        # Aligned return window: rows are candle closes, columns are symbols
+        self.symbols: List[str] = []
+        self._columns: Dict[str, int] = {}
+        self._index = pd.DatetimeIndex([])
+        self._returns = np.empty((0, 0))
+        self._sum = np.zeros(0)
+        self._cross = np.zeros((0, 0))
+        self._last_candle: Dict[str, Any] = {}
+        self.model_version = 0
+        self.last_update: Optional[str] = None
+        self._beta_cache: Dict[tuple, float] = {}
+        self._betas_version = -1
+
+        self.stats = {"rebuilds": 0, "incremental_updates": 0, "evaluations": 0, "last_evaluation_ms": 0.0}
+
+    @property
+    def observations(self) -> int:
+        return self._returns.shape[0]
+
+    # Model maintenance
+    def refresh(self, symbols: Sequence[str]) -> bool:
+        """Update the returns window from cached candles; returns True when the model changed"""
+        if self.candle_source is None:
+            return False
+
+        closes: Dict[str, pd.Series] = {}
+        changed = set(symbols) != set(self.symbols)
+        for symbol in symbols:
+            df = self.candle_source.get_cached_data(symbol, self.timeframe)
+            if df is None or df.empty or "close" not in df:
+                changed = changed or symbol in self._columns
+                continue
+            closes[symbol] = df["close"]
+            if self._last_candle.get(symbol) != df.index[-1]:
+                self._last_candle[symbol] = df.index[-1]
+                changed = True
+        if not changed:
+            return False
+
+        frame = pd.concat(closes, axis=1, join="inner").dropna() if closes else pd.DataFrame()
+        frame = frame.iloc[-(self.lookback + 1):]
+        if len(frame) < 3:
+            return False
+
+        returns = frame.pct_change().iloc[1:]
+        if list(returns.columns) == self.symbols and self._try_roll_forward(returns):
+            self.stats["incremental_updates"] += 1
+        else:
+            self._rebuild(returns)
+            self.stats["rebuilds"] += 1
+
+        self.model_version += 1
+        self.last_update = datetime.now(timezone.utc).isoformat()
+        return True
+
+    def _rebuild(self, returns: pd.DataFrame):
+        self.symbols = list(returns.columns)
+        self._columns = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self._index = returns.index
+        self._returns = returns.to_numpy(dtype=np.float64)
+        self._sum = self._returns.sum(axis=0)
+        self._cross = self._returns.T @ self._returns
+
+    def _try_roll_forward(self, returns: pd.DataFrame) -> bool:
+        """Append newly closed candles and drop the oldest ones, if the window only moved forward"""
+        old_index = self._index
+        if len(old_index) == 0:
+            return False
+        added = returns.index[returns.index > old_index[-1]]
+        if len(added) == 0 or len(added) >= len(returns):
+            return False
+        kept = returns.index[:len(returns) - len(added)]
+        dropped = len(old_index) - len(kept)
+        if dropped < 0 or not old_index[dropped:].equals(kept):
+            return False
+
+        new_rows = returns.loc[added].to_numpy(dtype=np.float64)
+        old_rows = self._returns[:dropped]
+        self._sum += new_rows.sum(axis=0) - old_rows.sum(axis=0)
+        self._cross += new_rows.T @ new_rows - old_rows.T @ old_rows
+        self._returns = np.vstack((self._returns[dropped:], new_rows))
+        self._index = returns.index
+        return True
+
+    def returns_window(self) -> Tuple[np.ndarray, List[str]]:
+        """(observations x symbols) simple returns of the current window and its symbols"""
+        return self._returns, self.symbols
+
+    def covariance(self) -> np.ndarray:
+        """Sample covariance of per-candle returns over the window"""
+        t = self.observations
+        mean = self._sum / t
+        return (self._cross - t * np.outer(mean, mean)) / (t - 1)
+
+    # Evaluation
+    def evaluate(self, exposures: np.ndarray, exposure_symbols: List[str], account_ids: List[str],
+                 equity: np.ndarray) -> Dict[str, Any]:
+        """VaR/ES and stress results for an (accounts x exposure_symbols) signed notional matrix"""
+        started = time.perf_counter()
+        # Last row is the whole book across accounts
+        exposures = np.vstack((exposures, exposures.sum(axis=0, keepdims=True)))
+        equity = np.append(equity, equity.sum())
+        labels = list(account_ids) + ["total"]
+
+        results = {label: {"gross_exposure": float(np.abs(row).sum()), "net_exposure": float(row.sum())}
+                   for label, row in zip(labels, exposures)}
+
+        # Map exposure columns onto modelled symbols (positions without candle history are unmodelled)
+        model_cols = np.array([self._columns.get(symbol, -1) for symbol in exposure_symbols], dtype=np.int64)
+        modelled = model_cols >= 0
+        model_exposure = np.zeros((exposures.shape[0], len(self.symbols)))
+        if modelled.any() and self.observations >= 2:
+            model_exposure[:, model_cols[modelled]] = exposures[:, modelled]
+            self._value_at_risk(model_exposure, labels, results)
+        unmodelled = np.abs(exposures[:, ~modelled]).sum(axis=1)
+        for label, value in zip(labels, unmodelled):
+            results[label]["unmodelled_exposure"] = float(value)
+
+        stress = self._stress(exposures, exposure_symbols, labels, equity)
+
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.stats["evaluations"] += 1
+        self.stats["last_evaluation_ms"] = round(elapsed_ms, 3)
+        return {
+            "model": {
+                "timeframe": self.timeframe,
+                "observations": self.observations,
+                "symbols": self.symbols,
+                "version": self.model_version,
+                "last_update": self.last_update
+            },
+            "accounts": {label: results[label] for label in labels[:-1]},
+            "total": results["total"],
+            "stress": stress,
+            "compute_ms": round(elapsed_ms, 3)
+        }
+
+    def _value_at_risk(self, model_exposure: np.ndarray, labels: List[str], results: Dict[str, Dict[str, Any]]):
+        """Historical and parametric VaR/ES (positive numbers = loss over one candle)"""
+        pnl = np.sort(model_exposure @ self._returns.T, axis=1)  # rows x observations, worst first
+        t = self.observations
+        mean = model_exposure @ (self._sum / t)
+        sigma = np.sqrt(np.maximum(np.einsum("ij,jk,ik->i", model_exposure, self.covariance(), model_exposure), 0.0))
+
+        for confidence in self.confidence_levels:
+            suffix = f"{int(round(confidence * 100))}"
+            tail = max(1, math.ceil(round((1 - confidence) * t, 9)))
+            historical_var = -pnl[:, tail - 1]
+            historical_es = -pnl[:, :tail].mean(axis=1)
+            z = NormalDist().inv_cdf(confidence)
+            parametric_var = z * sigma - mean
+            parametric_es = sigma * NormalDist().pdf(z) / (1 - confidence) - mean
+            for i, label in enumerate(labels):
+                results[label].update({
+                    f"historical_var_{suffix}": float(historical_var[i]),
+                    f"historical_es_{suffix}": float(historical_es[i]),
+                    f"parametric_var_{suffix}": float(parametric_var[i]),
+                    f"parametric_es_{suffix}": float(parametric_es[i])
+                })
+
+    def _stress(self, exposures: np.ndarray, exposure_symbols: List[str], labels: List[str],
+                equity: np.ndarray) -> Dict[str, Any]:
+        """Apply every scenario as one (scenarios x symbols) shock matrix"""
+        if not self.scenarios:
+            return {}
+        names = list(self.scenarios)
+        shocks = np.zeros((len(names), len(exposure_symbols)))
+        funding = np.zeros(len(names))
+        betas = self._betas()
+
+        for i, name in enumerate(names):
+            spec = self.scenarios[name]
+            shock = spec.get("shock", 0.0)
+            reference = spec.get("beta_to")
+            for j, symbol in enumerate(exposure_symbols):
+                if symbol in spec.get("shocks", {}):
+                    shocks[i, j] = spec["shocks"][symbol]
+                elif reference:
+                    # Correlated move: scale the reference shock by each symbol's beta (1 when unmodelled)
+                    shocks[i, j] = shock * (1.0 if symbol == reference else betas.get((reference, symbol), 1.0))
+                else:
+                    shocks[i, j] = shock
+            funding[i] = spec.get("funding_rate", 0.0)
+
+        # Positive funding: longs pay, shorts receive
+        pnl = exposures @ shocks.T - np.outer(exposures.sum(axis=1), funding)  # rows x scenarios
+        with np.errstate(divide="ignore", invalid="ignore"):
+            pct = np.where(equity[:, None] > 0, pnl / equity[:, None] * 100, 0.0)
+
+        return {
+            name: {
+                "total_pnl": float(pnl[-1, i]),
+                "total_pct_of_equity": float(pct[-1, i]),
+                "accounts": {label: {"pnl": float(pnl[k, i]), "pct_of_equity": float(pct[k, i])}
+                             for k, label in enumerate(labels[:-1])}
+            }
+            for i, name in enumerate(names)
+        }
+
+    def _betas(self) -> Dict[tuple, float]:
+        """(reference, symbol) -> beta of symbol returns to the reference symbol (cached per model version)"""
+        if self.observations < 2:
+            return {}
+        if self._betas_version == self.model_version:
+            return self._beta_cache
+        covariance = self.covariance()
+        betas = {}
+        for reference, r in self._columns.items():
+            if covariance[r, r] <= 0:
+                continue
+            for symbol, c in self._columns.items():
+                betas[(reference, symbol)] = float(covariance[r, c] / covariance[r, r])
+        self._beta_cache = betas
+        self._betas_version = self.model_version
+        return betas
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get engine statistics"""
+        return {**self.stats, "observations": self.observations, "symbols": len(self.symbols),
+                "model_version": self.model_version}
+
+
+class StreamingCovariance:
+    """EWMA (RiskMetrics) covariance, correlation and volatility over per-bar log returns
+
+    Ticks are sampled into fixed ``bar_seconds`` bars; each bar close updates the matrix in
+    O(n^2) for the symbols that traded in both bars, with no recomputation over history.
+    Derived correlations are cached per update.
+    """
+
+    def __init__(self, symbols: Sequence[str] = (), bar_seconds: int = 900, decay: float = 0.94):
+        self.bar_seconds = bar_seconds
+        self.decay = decay
+        self.symbols: List[str] = []
+        self._columns: Dict[str, int] = {}
+        self._cov = np.zeros((0, 0))
+        self._pair_updates = np.zeros((0, 0), dtype=np.int64)
+        self._last_close = np.zeros(0)
+        self._bar_close = np.zeros(0)
+        self._bar: Optional[int] = None
+        self.observations = 0
+        self.version = 0
+        self._correlation_cache: Optional[np.ndarray] = None
+        self._correlation_version = -1
+        for symbol in symbols:
+            self._add_symbol(symbol)
+
+    def _add_symbol(self, symbol: str) -> int:
+        column = self._columns.get(symbol)
+        if column is not None:
+            return column
+        n = len(self.symbols)
+        cov = np.zeros((n + 1, n + 1))
+        cov[:n, :n] = self._cov
+        pair_updates = np.zeros((n + 1, n + 1), dtype=np.int64)
+        pair_updates[:n, :n] = self._pair_updates
+        self._cov, self._pair_updates = cov, pair_updates
+        self._last_close = np.append(self._last_close, np.nan)
+        self._bar_close = np.append(self._bar_close, np.nan)
+        self.symbols.append(symbol)
+        self._columns[symbol] = n
+        return n
+
+    def on_price(self, symbol: str, price: float, timestamp: float):
+        """Record a tick; closes the current bar when the tick starts a new one"""
+        if price <= 0:
+            return
+        bar = int(timestamp // self.bar_seconds)
+        if self._bar is None:
+            self._bar = bar
+        elif bar > self._bar:
+            self._close_bar()
+            self._bar = bar
+        self._bar_close[self._add_symbol(symbol)] = price
+
+    def _close_bar(self):
+        with np.errstate(divide="ignore", invalid="ignore"):
+            returns = np.log(self._bar_close / self._last_close)
+        mask = np.isfinite(returns)
+        traded = ~np.isnan(self._bar_close)
+        self._last_close[traded] = self._bar_close[traded]
+        self._bar_close[:] = np.nan
+        if mask.any():
+            self.update(returns, mask)
+
+    def update(self, returns: np.ndarray, mask: Optional[np.ndarray] = None):
+        """Fold one bar of log returns (aligned with ``symbols``) into the EWMA matrix"""
+        idx = np.flatnonzero(mask) if mask is not None else np.arange(len(self.symbols))
+        block = np.ix_(idx, idx)
+        r = returns[idx]
+        outer = np.outer(r, r)
+        updated = self.decay * self._cov[block] + (1 - self.decay) * outer
+        # Pairs seen for the first time start from their first observation
+        fresh = self._pair_updates[block] == 0
+        updated[fresh] = outer[fresh]
+        self._cov[block] = updated
+        self._pair_updates[block] += 1
+        self.observations += 1
+        self.version += 1
+
+    def seed(self, log_returns: np.ndarray, symbols: Sequence[str]):
+        """Warm start from a (bars x symbols) history of log returns, oldest first"""
+        columns = [self._add_symbol(symbol) for symbol in symbols]
+        aligned = np.full(len(self.symbols), np.nan)
+        for row in log_returns:
+            aligned[:] = np.nan
+            aligned[columns] = row
+            mask = np.isfinite(aligned)
+            if mask.any():
+                self.update(aligned, mask)
+
+    def covariance(self) -> np.ndarray:
+        return self._cov
+
+    def correlation(self) -> np.ndarray:
+        """Correlation matrix derived from the EWMA covariance (cached per update)"""
+        if self._correlation_version != self.version:
+            std = np.sqrt(np.maximum(np.diag(self._cov), 0.0))
+            with np.errstate(divide="ignore", invalid="ignore"):
+                correlation = np.where(np.outer(std, std) > 0, self._cov / np.outer(std, std), 0.0)
+            np.fill_diagonal(correlation, 1.0)
+            self._correlation_cache = np.clip(correlation, -1.0, 1.0)
+            self._correlation_version = self.version
+        return self._correlation_cache
+
+    def correlation_between(self, symbol_a: str, symbol_b: str) -> Optional[float]:
+        """Correlation of two symbols, or None until both have a bar of history together"""
+        a, b = self._columns.get(symbol_a), self._columns.get(symbol_b)
+        if a is None or b is None or self._pair_updates[a, b] == 0:
+            return None
+        return float(self.correlation()[a, b])
+
+    def volatility(self, annualized: bool = False) -> Dict[str, float]:
+        """EWMA volatility of log returns per bar (or annualized over a 365-day year)"""
+        scale = math.sqrt(365 * 86400 / self.bar_seconds) if annualized else 1.0
+        return {symbol: float(math.sqrt(max(self._cov[i, i], 0.0)) * scale)
+                for symbol, i in self._columns.items() if self._pair_updates[i, i] > 0}
+
+    def portfolio_volatility(self, exposures: Dict[str, float]) -> Optional[float]:
+        """One-bar volatility (in currency) of signed notional exposures per symbol"""
+        vector = np.zeros(len(self.symbols))
+        for symbol, notional in exposures.items():
+            column = self._columns.get(symbol)
+            if column is None or self._pair_updates[column, column] == 0:
+                return None
+            vector[column] = notional
+        return float(math.sqrt(max(vector @ self._cov @ vector, 0.0)))
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Correlation matrix and volatilities for the dashboard"""
+        correlation = self.correlation()
+        return {
+            "symbols": self.symbols,
+            "bar_seconds": self.bar_seconds,
+            "decay": self.decay,
+            "observations": self.observations,
+            "correlation": [[round(float(value), 4) for value in row] for row in correlation],
+            "volatility": self.volatility(),
+            "annualized_volatility": self.volatility(annualized=True)
+        }
@@ -4,15 +4,23 @@ Basic risk monitoring with dummy data and essential functionality
 """
 
 import logging
+import math
 import time
 from typing import Dict, List, Optional, Any, Tuple
 from datetime import datetime, timezone
 from dataclasses import dataclass, field
 from enum import Enum
 
+import numpy as np
+
 from src.broker.models import Position, PositionType, PositionStatus
 from src.config import get_settings, get_trading_config
 from src.services.notifications import NotificationManager
+from src.services.risk_analytics import PortfolioRiskEngine, StreamingCovariance
+from src.services.price_triggers import (
+    PriceTriggerBook, STOP_LOSS, TARGET, TRAILING_STOP, TRAILING_RATCHET, RISK_LEVEL
+)
+from src.utils.performance import ExpiringKeyCache
 
 
 class RiskLevel(Enum):
@@ -83,13 +91,43 @@ class AsyncRiskManager:
         self._risk_metrics: Dict[str, RiskMetrics] = {}
         self._trailing_states: Dict[str, Dict] = {}
         
+        # Latest risk level per open position and running counts per account (pre-trade reads are O(1))
+        self._position_risk_levels: Dict[str, Tuple[str, RiskLevel]] = {}
+        self._risk_level_counts: Dict[str, Dict[RiskLevel, int]] = {}
+        
         # Performance tracking
         self._risk_decisions = []
         self._execution_times = {}
         
         # Warning spam prevention
-        self._last_warning_time = {}  # Track last warning time per symbol/type
         self._warning_cooldown = 300  # 5 minutes between same warnings
+        self._recent_warnings = ExpiringKeyCache(default_ttl=self._warning_cooldown)  # Warnings sent per symbol/type
+        
+        # Price-trigger index: per-symbol sorted levels checked on each tick
+        self._trigger_books: Dict[str, PriceTriggerBook] = {}
+        self._trigger_symbols: Dict[str, str] = {}  # position_id -> symbol
+        self._trigger_index_version = -1
+        self._last_full_sweep = 0.0
+        self.full_sweeps = 0
+        self._full_sweep_interval = self.settings.RISK_CHECK_INTERVAL
+        
+        # Trailing stops are included in the broker's local snapshots
+        self.broker.trailing_state_provider = lambda: self._trailing_states
+        
+        # Portfolio VaR / stress engine (candle source assigned by TradingSystem)
+        self.risk_engine = PortfolioRiskEngine(
+            timeframe=self.settings.RISK_VAR_TIMEFRAME,
+            lookback=self.settings.RISK_VAR_LOOKBACK,
+            confidence_levels=self.settings.RISK_VAR_CONFIDENCE_LEVELS,
+            scenarios=self.settings.RISK_STRESS_SCENARIOS
+        )
+        
+        # Live EWMA covariance/correlation of TRADING_SYMBOLS (fed per tick, warm-started from candles)
+        self.covariance = StreamingCovariance(
+            self.settings.TRADING_SYMBOLS,
+            bar_seconds=self.settings.RISK_COV_BAR_SECONDS,
+            decay=self.settings.RISK_EWMA_LAMBDA
+        )
         
         # Notification system
         self.notification_manager = NotificationManager()
@@ -104,6 +142,12 @@ class AsyncRiskManager:
             # Note: Notification manager is started by main trading system
             # Don't start it here to avoid conflicts
             
+            # Trailing stops recovered from the broker's local state (broker starts first)
+            if self.broker.recovered_trailing_states:
+                self._trailing_states.update(self.broker.recovered_trailing_states)
+                self._trigger_index_version = -1
+                self.logger.info(f"✅ Restored {len(self.broker.recovered_trailing_states)} trailing stops")
+            
             self.logger.info("Simplified async risk management system started")
             return True
             
@@ -135,7 +179,8 @@ class AsyncRiskManager:
             # Calculate margin usage with account balance context
             margin_usage = 0.0
             if position.leverage > 1 and position.margin_used > 0:
-                account_balance = self.broker.account.current_balance if self.broker.account else 1000.0
+                account = self.broker.get_account(position.account_id)
+                account_balance = account.current_balance if account else 1000.0
                 margin_usage = position.calculate_margin_usage(current_price, account_balance)
             
             # Calculate distances from stop loss and target
@@ -151,14 +196,15 @@ class AsyncRiskManager:
             # Calculate volatility score (dummy data)
             volatility_score = 50.0  # Fixed moderate score
             
-            # Determine risk level
+            # Determine risk level (thresholds from the position's account config)
+            config = self.broker.get_account_config(position.account_id)
             risk_level = self._determine_risk_level(
-                margin_usage, pnl_percentage, holding_time_hours, volatility_score
+                margin_usage, pnl_percentage, holding_time_hours, volatility_score, config
             )
             
             # Generate recommendation
             recommendation = self._generate_risk_recommendation(
-                position, risk_level, pnl_percentage, holding_time_hours, margin_usage
+                position, risk_level, pnl_percentage, holding_time_hours, margin_usage, config
             )
             
             # Check trailing stop
@@ -186,6 +232,7 @@ class AsyncRiskManager:
             
             # Cache metrics
             self._risk_metrics[position.id] = metrics
+            self._track_risk_level(position, risk_level)
             
             return metrics
             
@@ -303,21 +350,22 @@ class AsyncRiskManager:
             self.logger.error(f"Risk action execution failed for {position.symbol}: {e}")
             return False
     
-    async def analyze_portfolio_risk_async(self) -> Dict[str, Any]:
-        """Analyze overall portfolio risk with proper risk calculation logic"""
+    async def analyze_portfolio_risk_async(self, account_id: Optional[str] = None) -> Dict[str, Any]:
+        """Analyze overall portfolio risk of an account (default account) with proper risk calculation logic"""
         try:
             if not self.broker.positions:
                 return {"status": "no_positions", "overall_risk_level": "low"}
             
-            if not self.broker.account:
+            account = self.broker.get_account(account_id)
+            if not account:
                 return {"status": "error", "error": "No account available"}
             
-            account_balance = self.broker.account.current_balance
+            account_balance = account.current_balance
             if account_balance <= 0:
                 return {"status": "error", "error": "Invalid account balance"}
             
-            # Get open positions only
-            open_positions = [pos for pos in self.broker.positions.values() if pos.status.value == "OPEN"]
+            # Get the account's open positions only
+            open_positions = self.broker.get_open_positions(account.id)
             
             if not open_positions:
                 return {"status": "no_open_positions", "overall_risk_level": "low"}
@@ -369,14 +417,23 @@ class AsyncRiskManager:
             total_portfolio_value = account_balance + total_unrealized_pnl
             
             # Portfolio return percentage from initial balance
-            initial_balance = self.broker.account.initial_balance
+            initial_balance = account.initial_balance
             portfolio_return_pct = ((total_portfolio_value - initial_balance) / initial_balance) * 100 if initial_balance > 0 else 0
             
+            # Correlation-aware volatility of the account's book over one covariance bar
+            exposures: Dict[str, float] = {}
+            for position in open_positions:
+                direction = 1.0 if position.position_type == PositionType.LONG else -1.0
+                mark = self.broker._price_cache.get(position.symbol, {}).get("price", position.entry_price)
+                exposures[position.symbol] = exposures.get(position.symbol, 0.0) + direction * position.quantity * mark
+            portfolio_volatility = self.covariance.portfolio_volatility(exposures)
+            
             # Smart portfolio risk level determination (now uses improved calculation)
+            config = self.broker.get_account_config(account.id)
             overall_risk = self._determine_portfolio_risk_level(
                 portfolio_margin_usage, portfolio_pnl_percentage, portfolio_return_pct,
                 critical_positions, high_risk_positions, len(open_positions),
-                effective_portfolio_risk  # Pass the new combined risk metric
+                config, effective_portfolio_risk  # Pass the new combined risk metric
             )
             
             # Count positions by risk level
@@ -389,7 +446,7 @@ class AsyncRiskManager:
             
             # Generate smart recommendations
             recommendations = self._generate_portfolio_recommendations(
-                overall_risk, risk_distribution, portfolio_margin_usage, portfolio_pnl_percentage
+                overall_risk, risk_distribution, portfolio_margin_usage, portfolio_pnl_percentage, config
             )
             
             return {
@@ -403,6 +460,10 @@ class AsyncRiskManager:
                 "total_unrealized_pnl": total_unrealized_pnl,
                 "account_balance": account_balance,
                 "total_portfolio_value": total_portfolio_value,
+                "portfolio_volatility": portfolio_volatility,
+                "portfolio_volatility_pct": (
+                    portfolio_volatility / account_balance * 100 if portfolio_volatility is not None else None
+                ),
                 "total_positions": len(position_risks),
                 "open_positions": len(open_positions),
                 "risk_distribution": risk_distribution,
@@ -424,56 +485,116 @@ class AsyncRiskManager:
             self.logger.error(f"Portfolio risk analysis failed: {e}")
             return {"status": "error", "error": str(e), "overall_risk_level": "unknown"}
     
-    async def calculate_safe_quantity_async(self, symbol: str, price: float, requested_quantity: float, leverage: float = None) -> Tuple[float, str]:
-        """Calculate safe quantity with proper position sizing and liquidation protection"""
+    def get_portfolio_exposure(self, account_id: Optional[str] = None) -> Dict[str, Any]:
+        """Constant-time portfolio figures for pre-trade checks (running aggregates, no per-position rebuild)"""
+        account = self.broker.get_account(account_id)
+        if not account:
+            return {"status": "error", "error": "No account available"}
+        
+        exposure = self.broker.get_account_exposure(account.id)
+        balance = account.current_balance
+        counts = self._risk_level_counts.get(account.id, {})
+        return {
+            "status": "ok",
+            "account_balance": balance,
+            "total_margin_used": exposure["margin_used"],
+            "portfolio_margin_usage": exposure["margin_used"] / balance * 100 if balance > 0 else 0.0,
+            "total_unrealized_pnl": exposure["unrealized_pnl"],
+            "portfolio_pnl_percentage": exposure["unrealized_pnl"] / balance * 100 if balance > 0 else 0.0,
+            "open_positions": exposure["open_positions"],
+            "risk_distribution": {level.value: counts.get(level, 0) for level in RiskLevel}
+        }
+    
+    def assess_portfolio_risk(self, account_id: Optional[str] = None) -> Dict[str, Any]:
+        """Portfolio risk level from the running aggregates, for per-evaluation alert checks
+        
+        Same thresholds as analyze_portfolio_risk_async, but position risk levels are the
+        latest tracked ones instead of a fresh per-position analysis.
+        """
+        exposure = self.get_portfolio_exposure(account_id)
+        if exposure["status"] != "ok":
+            return {**exposure, "overall_risk_level": "unknown"}
+        if not exposure["open_positions"]:
+            return {"status": "no_open_positions", "overall_risk_level": "low"}
+        
+        account = self.broker.get_account(account_id)
+        margin_usage = exposure["portfolio_margin_usage"]
+        pnl_percentage = exposure["portfolio_pnl_percentage"]
+        effective_portfolio_risk = margin_usage + (abs(pnl_percentage) * 0.5 if pnl_percentage < 0 else 0)
+        initial_balance = account.initial_balance
+        portfolio_return_pct = (
+            (exposure["account_balance"] + exposure["total_unrealized_pnl"] - initial_balance) / initial_balance * 100
+            if initial_balance > 0 else 0
+        )
+        distribution = exposure["risk_distribution"]
+        overall_risk = self._determine_portfolio_risk_level(
+            margin_usage, pnl_percentage, portfolio_return_pct,
+            distribution[RiskLevel.CRITICAL.value], distribution[RiskLevel.HIGH.value],
+            exposure["open_positions"], self.broker.get_account_config(account.id), effective_portfolio_risk
+        )
+        return {
+            **exposure,
+            "status": "assessed",
+            "overall_risk_level": overall_risk.value,
+            "effective_portfolio_risk": effective_portfolio_risk,
+            "portfolio_return_percentage": portfolio_return_pct
+        }
+    
+    async def calculate_safe_quantity_async(self, symbol: str, price: float, requested_quantity: float, leverage: float = None, signal: str = None, account_id: Optional[str] = None) -> Tuple[float, str]:
+        """Calculate safe quantity with proper position sizing and liquidation protection
+        
+        Sizing uses the account's own trading config (default account when no id is given).
+        """
         try:
-            if not self.broker.account:
+            account = self.broker.get_account(account_id)
+            if not account:
                 return 0.0, "No account available"
+            trading_config = self.broker.get_account_config(account.id)
             
             # Step 0: ANTI-OVERTRADE CHECK - Check portfolio risk before allowing new trades
-            portfolio_risk_data = await self.analyze_portfolio_risk_async()
-            if portfolio_risk_data.get("status") == "analyzed":
-                portfolio_margin_usage = portfolio_risk_data.get("portfolio_margin_usage", 0.0)
-                max_portfolio_risk = self.trading_config.get("max_portfolio_risk_pct", 80.0)
+            exposure = self.get_portfolio_exposure(account.id)
+            if exposure["open_positions"] > 0:
+                portfolio_margin_usage = exposure["portfolio_margin_usage"]
+                max_portfolio_risk = trading_config.get("max_portfolio_risk_pct", 80.0)
                 
                 if portfolio_margin_usage >= max_portfolio_risk:
                     return 0.0, f"🚫 ANTI-OVERTRADE: Portfolio risk too high {portfolio_margin_usage:.1f}% >= {max_portfolio_risk}%. Close existing positions first."
                 
                 # Additional check for high risk warning
-                high_risk_threshold = self.trading_config.get("high_risk_margin_pct", 85.0)
+                high_risk_threshold = trading_config.get("high_risk_margin_pct", 85.0)
                 if portfolio_margin_usage >= high_risk_threshold:
                     self.logger.warning(f"⚠️ Portfolio approaching high risk: {portfolio_margin_usage:.1f}% (limit: {max_portfolio_risk}%)")
             
             # Step 1: Check if position already exists for symbol (One position per symbol rule)
-            for pos in self.broker.positions.values():
-                if pos.symbol == symbol and pos.status.value == "OPEN":
-                    return 0.0, f"Position already open for {symbol} ({pos.position_type.value}, qty={pos.quantity}, entry=₹{pos.entry_price:.2f})"
+            pos = self.broker.get_open_position_for_symbol(symbol, account.id)
+            if pos:
+                return 0.0, f"Position already open for {symbol} ({pos.position_type.value}, qty={pos.quantity}, entry=₹{pos.entry_price:.2f})"
             
             # Step 1.5: Check maximum open positions limit
-            open_positions_count = len([pos for pos in self.broker.positions.values() if pos.status.value == "OPEN"])
-            max_positions = self.trading_config.get("max_positions_open", 2)  # Updated to 2
+            open_positions_count = exposure["open_positions"]
+            max_positions = trading_config.get("max_positions_open", 2)  # Updated to 2
             
             if open_positions_count >= max_positions:
                 return 0.0, f"Maximum open positions limit reached ({open_positions_count}/{max_positions}). Close some positions first."
             
             # Step 2: Get current available balance
-            available_balance = self.broker.account.current_balance
+            available_balance = account.current_balance
             if available_balance <= 0:
                 return 0.0, f"No available balance. Current balance: ₹{available_balance:.2f}"
             
             # Step 3: Use default leverage if not provided
             if leverage is None:
-                leverage = self.trading_config.get("default_leverage", 50.0)
+                leverage = trading_config.get("default_leverage", 50.0)
             
             # Step 4: Calculate position sizing (% of balance) - Use safe mode for small balances
             # Use safe mode if balance is small or if configured
             use_safe_mode = available_balance <= 1000  # Use safe mode for balances <= 1000
             
             if use_safe_mode:
-                balance_per_trade_pct = self.trading_config.get("safe_balance_per_trade_pct", 0.05)  # 5% safe mode
+                balance_per_trade_pct = trading_config.get("safe_balance_per_trade_pct", 0.05)  # 5% safe mode
                 self.logger.info(f"Using SAFE MODE: {balance_per_trade_pct*100}% per trade for balance ₹{available_balance:.2f}")
             else:
-                balance_per_trade_pct = self.trading_config.get("balance_per_trade_pct", 0.20)  # 20% normal mode
+                balance_per_trade_pct = trading_config.get("balance_per_trade_pct", 0.20)  # 20% normal mode
                 self.logger.info(f"Using NORMAL MODE: {balance_per_trade_pct*100}% per trade for balance ₹{available_balance:.2f}")
             
             margin_to_use = available_balance * balance_per_trade_pct
@@ -485,7 +606,7 @@ class AsyncRiskManager:
             calculated_quantity = position_value / price
             
             # Step 7: Apply liquidation protection
-            liquidation_buffer = self.trading_config.get("liquidation_buffer_pct", 0.10)  # 10% buffer
+            liquidation_buffer = trading_config.get("liquidation_buffer_pct", 0.10)  # 10% buffer
             safe_quantity = calculated_quantity * (1 - liquidation_buffer)
             
             # Step 8: Use calculated safe quantity (ignore requested if it's 0 or too small)
@@ -498,6 +619,24 @@ class AsyncRiskManager:
                 final_quantity = min(requested_quantity, safe_quantity)
                 self.logger.info(f"🎯 Using safer quantity: {final_quantity:.6f} (requested: {requested_quantity:.6f}, calculated: {safe_quantity:.6f})")
             
+            # Step 8.2: Correlation haircut - same-direction exposure to correlated open positions
+            if signal and self.settings.RISK_CORRELATION_SIZING:
+                factor, correlated = self._correlation_sizing_factor(symbol, signal, account.id)
+                if factor < 1.0:
+                    self.logger.info(f"🎯 Correlated exposure with {', '.join(correlated)}: quantity x{factor:.2f}")
+                    final_quantity *= factor
+            
+            # Step 8.5: Cap by L2 book liquidity within the slippage window (when book feed is enabled)
+            book = self.broker.get_order_book(symbol) if hasattr(self.broker, "get_order_book") else None
+            if book is not None and signal:
+                max_slippage_bps = self.settings.L2_MAX_SLIPPAGE_BPS
+                depth = book.depth_at_bps("ask" if signal.upper() == "BUY" else "bid", max_slippage_bps)
+                # Book sizes are contracts, quantities are coins
+                depth_quantity = depth["size"] * self.broker.get_contract_size(symbol)
+                if 0 < depth_quantity < final_quantity:
+                    self.logger.info(f"🎯 Capping quantity by book depth: {final_quantity:.6f} → {depth_quantity:.6f} (within {max_slippage_bps} bps)")
+                    final_quantity = depth_quantity
+            
             # Step 9: Ensure minimum viable trade size
             min_trade_size = 0.001  
             if final_quantity < min_trade_size:
@@ -506,7 +645,7 @@ class AsyncRiskManager:
             # Step 10: Calculate final costs and validations
             final_position_value = final_quantity * price
             final_margin = final_position_value / leverage
-            trading_fee = final_margin * self.trading_config["trading_fee_pct"]
+            trading_fee = final_margin * trading_config["trading_fee_pct"]
             total_cost = final_margin + trading_fee
             
             # Step 11: Final balance validation
@@ -531,58 +670,239 @@ class AsyncRiskManager:
             return 0.0, f"Error calculating safe quantity: {str(e)}"
 
     
-    async def monitor_positions_async(self) -> List[str]:
-        """Monitor all open positions and execute risk management actions"""
+    async def monitor_positions_async(self, symbols: Optional[List[str]] = None) -> List[str]:
+        """Monitor open positions and execute risk management actions
+
+        With ``symbols`` only positions whose trigger levels were crossed at the
+        latest price of those symbols are checked (O(log n + triggered)). A full
+        sweep of every open position runs when no symbols are given and at least
+        every RISK_CHECK_INTERVAL seconds, covering time- and margin-based rules.
+        """
         try:
-            actions_taken = []
+            self._sync_trigger_index()
             
-            for position in list(self.broker.positions.values()):
-                if position.status != PositionStatus.OPEN:
-                    continue
-                
-                # No grace period - immediate risk management as requested by user
-                
-                if position.symbol in self.broker._price_cache:
-                    current_price = self.broker._price_cache[position.symbol].get("price", 0.0)
-                    
-                    if current_price <= 0:
-                        continue
-                    
-                    # Check stop loss
-                    if self._check_stop_loss_hit(position, current_price):
-                        if await self.broker.close_position_async(position.id, current_price, "Stop Loss Hit"):
-                            actions_taken.append(f"Stop Loss: {position.symbol}")
-                            continue
-                    
-                    # Check target hit
-                    if self._check_target_hit(position, current_price):
-                        if await self.broker.close_position_async(position.id, current_price, "Target Hit"):
-                            actions_taken.append(f"Target Hit: {position.symbol}")
-                            continue
-                    
-                    # Check holding time limit
-                    if self._check_time_limit_exceeded(position):
-                        if await self.broker.close_position_async(position.id, current_price, "Time Limit Reached"):
-                            actions_taken.append(f"Time Limit: {position.symbol}")
-                            continue
-                    
-                    # Advanced risk management - only after grace period
-                    risk_metrics = await self.analyze_position_risk_async(position, current_price)
-                    if await self.execute_risk_action_async(position, risk_metrics, current_price):
-                        actions_taken.append(f"Risk Action: {position.symbol}")
+            now = time.time()
+            if symbols is None or now - self._last_full_sweep >= self._full_sweep_interval:
+                self._last_full_sweep = now
+                self.full_sweeps += 1
+                return await self._full_sweep_async()
             
+            actions_taken = []
+            for symbol in symbols:
+                current_price = self.broker._price_cache.get(symbol, {}).get("price", 0.0)
+                if current_price > 0:
+                    actions_taken.extend(await self._handle_triggers_async(symbol, current_price))
             return actions_taken
             
         except Exception as e:
             self.logger.error(f"Error monitoring positions: {str(e)}")
             return []
     
+    async def _full_sweep_async(self) -> List[str]:
+        """Check every open position and rebuild its trigger levels"""
+        actions_taken = []
+        self._warm_start_covariance()
+        
+        for position in self.broker.get_open_positions():
+            if position.status != PositionStatus.OPEN:
+                continue
+            
+            # No grace period - immediate risk management as requested by user
+            
+            if position.symbol in self.broker._price_cache:
+                current_price = self.broker._price_cache[position.symbol].get("price", 0.0)
+                
+                if current_price <= 0:
+                    continue
+                
+                action = await self._check_position_async(position, current_price, check_time_limit=True)
+                if action:
+                    actions_taken.append(action)
+            
+            if position.status == PositionStatus.OPEN:
+                self._register_triggers(position)
+            else:
+                self._unregister_triggers(position.id)
+        
+        # Every position was just checked at these prices: later ticks only report new crossings
+        for symbol, book in self._trigger_books.items():
+            price = self.broker._price_cache.get(symbol, {}).get("price", 0.0)
+            if price > 0:
+                book.crossed(price)
+        
+        return actions_taken
+    
+    async def _handle_triggers_async(self, symbol: str, current_price: float) -> List[str]:
+        """Act only on positions whose trigger levels were crossed at this price"""
+        book = self._trigger_books.get(symbol)
+        if book is None:
+            return []
+        
+        triggered_ids = list(dict.fromkeys(position_id for position_id, _, _ in book.crossed(current_price)))
+        if not triggered_ids:
+            return []
+        
+        open_positions = {position.id: position for position in self.broker.get_open_positions_for_symbol(symbol)}
+        actions_taken = []
+        
+        for position_id in triggered_ids:
+            position = open_positions.get(position_id)
+            if position is None or position.status != PositionStatus.OPEN:
+                self._unregister_triggers(position_id)
+                continue
+            
+            action = await self._check_position_async(position, current_price)
+            if action:
+                actions_taken.append(action)
+            
+            # Stops, trailing levels and risk bands may have moved
+            if position.status == PositionStatus.OPEN:
+                self._register_triggers(position)
+            else:
+                self._unregister_triggers(position_id)
+        
+        return actions_taken
+    
+    async def _check_position_async(self, position: Position, current_price: float, check_time_limit: bool = False) -> Optional[str]:
+        """Run stop / target / trailing / risk checks for one position; returns the action taken"""
+        # Resting bracket orders execute their stop / target in the broker's matching engine
+        brackets = self.broker.get_bracket_orders(position.id)
+        
+        # Check stop loss
+        if "stop_loss" not in brackets and self._check_stop_loss_hit(position, current_price):
+            if await self.broker.close_position_async(position.id, current_price, "Stop Loss Hit"):
+                return f"Stop Loss: {position.symbol}"
+        
+        # Check target hit
+        if "target" not in brackets and self._check_target_hit(position, current_price):
+            if await self.broker.close_position_async(position.id, current_price, "Target Hit"):
+                return f"Target Hit: {position.symbol}"
+        
+        # Check active trailing stop
+        if self._check_trailing_stop_hit(position, current_price):
+            if await self.broker.close_position_async(position.id, current_price, "Trailing Stop Hit"):
+                return f"Trailing Stop: {position.symbol}"
+        
+        # Check holding time limit
+        if check_time_limit and self._check_time_limit_exceeded(position):
+            if await self.broker.close_position_async(position.id, current_price, "Time Limit Reached"):
+                return f"Time Limit: {position.symbol}"
+        
+        # Advanced risk management - only after grace period
+        risk_metrics = await self.analyze_position_risk_async(position, current_price)
+        if await self.execute_risk_action_async(position, risk_metrics, current_price):
+            return f"Risk Action: {position.symbol}"
+        
+        return None
+    
+    def has_crossed_trigger(self, symbol: str, price: float) -> bool:
+        """Whether a price crosses a stop-loss, target or trailing stop of the symbol's open positions"""
+        self._sync_trigger_index()
+        book = self._trigger_books.get(symbol)
+        if not book:
+            return False
+        return any(kind in (STOP_LOSS, TARGET, TRAILING_STOP) for _, kind, _ in book.crossed(price, advance=False))
+    
+    def _sync_trigger_index(self):
+        """Register/unregister trigger levels when the broker's open positions changed"""
+        version = self.broker.position_index_version
+        if version == self._trigger_index_version:
+            return
+        
+        open_positions = {position.id: position for position in self.broker.get_open_positions()}
+        for position_id in list(self._trigger_symbols):
+            if position_id not in open_positions:
+                self._unregister_triggers(position_id)
+        for position_id, position in open_positions.items():
+            if position_id not in self._trigger_symbols:
+                self._register_triggers(position)
+        
+        self._trigger_index_version = version
+    
+    def _register_triggers(self, position: Position):
+        """(Re)build all price trigger levels for an open position"""
+        book = self._trigger_books.get(position.symbol)
+        if book is None:
+            book = self._trigger_books[position.symbol] = PriceTriggerBook(position.symbol)
+        self._trigger_symbols[position.id] = position.symbol
+        
+        is_long = position.position_type == PositionType.LONG
+        direction = 1.0 if is_long else -1.0
+        
+        # Adverse levels fire below the price for longs, above for shorts; stops and targets
+        # covered by resting bracket orders are left to the matching engine
+        brackets = self.broker.get_bracket_orders(position.id)
+        levels = []
+        if "stop_loss" not in brackets:
+            levels.append((STOP_LOSS, position.stop_loss, is_long))
+        if "target" not in brackets:
+            levels.append((TARGET, position.target, not is_long))
+        
+        trailing_state = self._trailing_states.get(position.id)
+        if trailing_state:
+            levels.append((TRAILING_STOP, trailing_state.get("trailing_price"), is_long))
+            extreme = trailing_state.get("highest_price" if is_long else "lowest_price")
+            if extreme:
+                # Fires only on a new extreme (strictly beyond the current one)
+                levels.append((TRAILING_RATCHET, math.nextafter(extreme, math.inf if is_long else -math.inf), not is_long))
+        
+        # PnL bands used by analyze/execute: trailing start (5%), profit lock (10%) and the
+        # account's loss risk levels
+        config = self.broker.get_account_config(position.account_id)
+        if position.quantity > 0 and position.invested_amount > 0:
+            unit_cost = position.invested_amount / position.quantity
+            for profit_pct in (5.0, 10.0):
+                level = position.entry_price + direction * profit_pct / 100 * unit_cost
+                levels.append((RISK_LEVEL, level, not is_long))
+            for loss_key in ("medium_risk_loss_pct", "high_risk_loss_pct", "critical_risk_loss_pct"):
+                loss_pct = config.get(loss_key)
+                if loss_pct:
+                    level = position.entry_price - direction * loss_pct / 100 * unit_cost
+                    levels.append((RISK_LEVEL, level, is_long))
+        
+        # Liquidation warning (15%) and protection (5%) distance bands
+        liquidation_price = self._calculate_liquidation_price(position)
+        if liquidation_price:
+            for distance_pct in (15.0, 5.0):
+                if is_long:
+                    level = liquidation_price / (1 - distance_pct / 100)
+                else:
+                    level = liquidation_price / (1 + distance_pct / 100)
+                levels.append((RISK_LEVEL, level, is_long))
+        
+        # Unchanged levels keep their state, so a band already crossed does not fire again
+        book.set_levels(position.id, levels)
+    
+    def _unregister_triggers(self, position_id: str):
+        """Remove a position's trigger levels"""
+        symbol = self._trigger_symbols.pop(position_id, None)
+        if symbol and symbol in self._trigger_books:
+            self._trigger_books[symbol].remove_position(position_id)
+        if self._trailing_states.pop(position_id, None) is not None:
+            self.broker.state_store.append("trailing", position_id, None)
+        self._risk_metrics.pop(position_id, None)
+        self._untrack_risk_level(position_id)
+    
+    def _track_risk_level(self, position: Position, risk_level: RiskLevel):
+        """Move a position's contribution to its account's risk-level counts"""
+        if position.status != PositionStatus.OPEN:
+            return
+        self._untrack_risk_level(position.id)
+        counts = self._risk_level_counts.setdefault(position.account_id, {level: 0 for level in RiskLevel})
+        counts[risk_level] += 1
+        self._position_risk_levels[position.id] = (position.account_id, risk_level)
+    
+    def _untrack_risk_level(self, position_id: str):
+        previous = self._position_risk_levels.pop(position_id, None)
+        if previous:
+            account_id, risk_level = previous
+            self._risk_level_counts[account_id][risk_level] -= 1
+    
     # Private methods
     def _determine_risk_level(self, margin_usage: float, pnl_percentage: float, 
-                            holding_time_hours: float, volatility_score: float) -> RiskLevel:
-        """Determine risk level based on configurable thresholds"""
-        # Get configurable thresholds from trading config
-        config = self.trading_config
+                            holding_time_hours: float, volatility_score: float,
+                            config: Dict[str, Any]) -> RiskLevel:
+        """Determine risk level based on the account's configurable thresholds"""
         
         # Critical conditions - Now configurable
         if (margin_usage > config.get("critical_risk_margin_pct", 90.0) or 
@@ -608,9 +928,8 @@ class AsyncRiskManager:
     
     def _generate_risk_recommendation(self, position: Position, risk_level: RiskLevel, 
                                     pnl_percentage: float, holding_time_hours: float, 
-                                    margin_usage: float) -> RiskAction:
-        """Generate risk management recommendation with configurable thresholds"""
-        config = self.trading_config
+                                    margin_usage: float, config: Dict[str, Any]) -> RiskAction:
+        """Generate risk management recommendation with the account's configurable thresholds"""
         
         # Check for emergency close conditions first (configurable)
         if (margin_usage > config.get("emergency_close_margin_pct", 95.0) or
@@ -675,33 +994,35 @@ class AsyncRiskManager:
     
     def _should_send_warning(self, warning_key: str) -> bool:
         """Check if enough time has passed since last warning of this type"""
-        import time
-        current_time = time.time()
-        last_warning = self._last_warning_time.get(warning_key, 0)
-        return (current_time - last_warning) >= self._warning_cooldown
+        return warning_key not in self._recent_warnings
     
     def _mark_warning_sent(self, warning_key: str):
         """Mark that a warning was sent for this type/symbol"""
-        import time
-        self._last_warning_time[warning_key] = time.time()
+        self._recent_warnings.add(warning_key)
+    
+    def _calculate_liquidation_price(self, position: Position) -> Optional[float]:
+        """Liquidation price with a 5% margin buffer (None for non-leveraged positions)"""
+        if position.leverage <= 1 or position.margin_used <= 0 or position.quantity <= 0 or position.entry_price <= 0:
+            return None
+        
+        # Liquidation price = entry_price * (1 -/+ (margin_used / position_value)), 95% of margin (5% buffer)
+        margin_ratio = position.margin_used / (position.quantity * position.entry_price)
+        if position.position_type == PositionType.LONG:
+            # For LONG: liquidation when price drops and margin is exhausted
+            return position.entry_price * (1 - margin_ratio * 0.95)
+        # For SHORT: liquidation when price rises and margin is exhausted
+        return position.entry_price * (1 + margin_ratio * 0.95)
     
     def _calculate_liquidation_distance(self, position: Position, current_price: float) -> float:
         """Calculate how close position is to liquidation (percentage)"""
         try:
-            if position.leverage <= 1 or position.margin_used <= 0:
+            liquidation_price = self._calculate_liquidation_price(position)
+            if liquidation_price is None:
                 return 100.0  # No liquidation risk for non-leveraged positions
             
-            # Calculate liquidation price based on position type and leverage
             if position.position_type == PositionType.LONG:
-                # For LONG: liquidation when price drops and margin is exhausted
-                # Liquidation price = entry_price * (1 - (margin_used / position_value))
-                margin_ratio = position.margin_used / (position.quantity * position.entry_price)
-                liquidation_price = position.entry_price * (1 - margin_ratio * 0.95)  # 95% of margin (5% buffer)
                 distance_pct = ((current_price - liquidation_price) / current_price) * 100
             else:
-                # For SHORT: liquidation when price rises and margin is exhausted
-                margin_ratio = position.margin_used / (position.quantity * position.entry_price)
-                liquidation_price = position.entry_price * (1 + margin_ratio * 0.95)
                 distance_pct = ((liquidation_price - current_price) / current_price) * 100
             
             return max(distance_pct, 0.0)  # Never negative
@@ -753,6 +1074,9 @@ class AsyncRiskManager:
                 position_state["trailing_price"] = new_trailing
         
         self._trailing_states[position.id] = position_state
+        # Ratchets happen per tick: kept in memory and carried by the next periodic snapshot
+        # (a crash restores the last snapshotted, looser stop) instead of an fsynced log record each
+        self.broker.state_store.mark_changed()
     
     def _calculate_tighter_stop_loss(self, position: Position, current_price: float) -> float:
         """Calculate a tighter stop loss for high-risk positions"""
@@ -779,10 +1103,12 @@ class AsyncRiskManager:
                 "trailing_price": current_price * 1.03,
                 "activated_at": datetime.now(timezone.utc).isoformat()
             }
+        self.broker.state_store.append("trailing", position.id, self._trailing_states[position.id])
     
     def _determine_portfolio_risk_level(self, portfolio_margin_usage: float, portfolio_pnl_percentage: float, 
                                        portfolio_return_pct: float, critical_positions: int, 
                                        high_risk_positions: int, total_positions: int, 
+                                       config: Dict[str, Any],
                                        effective_portfolio_risk: float = None) -> RiskLevel:
         """Smart portfolio risk level determination based on CORRECTED thresholds
         
@@ -790,8 +1116,7 @@ class AsyncRiskManager:
         Effective risk is used only when needed for comprehensive analysis.
         """
         try:
-            # Get configurable thresholds
-            config = self.trading_config
+            # Configurable thresholds (the account's config)
             max_portfolio_risk = config.get("max_portfolio_risk_pct", 80.0)
             high_risk_margin = config.get("portfolio_high_risk_margin_pct", 80.0)  # Use portfolio-specific threshold
             
@@ -843,7 +1168,8 @@ class AsyncRiskManager:
     def _generate_portfolio_recommendations(self, overall_risk: RiskLevel, 
                                           risk_distribution: Dict, 
                                           portfolio_margin_usage: float,
-                                          portfolio_pnl_percentage: float) -> List[str]:
+                                          portfolio_pnl_percentage: float,
+                                          config: Dict[str, Any]) -> List[str]:
         """Generate smart portfolio-level recommendations"""
         recommendations = []
         
@@ -881,8 +1207,8 @@ class AsyncRiskManager:
                     recommendations.append("🎯 Good performance - Consider taking partial profits")
             
             # Anti-overtrade recommendations
-            max_portfolio_margin = self.trading_config.get("max_portfolio_risk_pct", 80.0)
-            high_risk_margin = self.trading_config.get("high_risk_margin_pct", 85.0)
+            max_portfolio_margin = config.get("max_portfolio_risk_pct", 80.0)
+            high_risk_margin = config.get("high_risk_margin_pct", 85.0)
             
             if portfolio_margin_usage >= max_portfolio_margin:
                 recommendations.append(f"🚫 ANTI-OVERTRADE ACTIVE: {portfolio_margin_usage:.1f}% >= {max_portfolio_margin}% - New trades blocked")
@@ -915,6 +1241,13 @@ class AsyncRiskManager:
         else:
             return current_price <= position.target
     
+    def _check_trailing_stop_hit(self, position: Position, current_price: float) -> bool:
+        """Check if an active trailing stop is hit"""
+        trailing_price = self._trailing_states.get(position.id, {}).get("trailing_price")
+        if not trailing_price:
+            return False
+        return self._should_trigger_trailing_stop(position, current_price, trailing_price)
+    
     def _check_time_limit_exceeded(self, position: Position) -> bool:
         """Check if holding time exceeded maximum limit"""
         try:
@@ -929,10 +1262,60 @@ class AsyncRiskManager:
         except:
             return False
     
+    def on_price_tick(self, symbol: str, price: float):
+        """Feed a live price into the streaming covariance (event loop thread)"""
+        self.covariance.on_price(symbol, price, time.time())
+    
+    def _warm_start_covariance(self):
+        """Seed the streaming covariance from the candle window once it is available"""
+        if self.covariance.observations:
+            return
+        self.risk_engine.refresh(self.settings.TRADING_SYMBOLS)
+        returns, symbols = self.risk_engine.returns_window()
+        if len(returns):
+            self.covariance.seed(np.log1p(returns), symbols)
+            self.logger.info(f"✅ Covariance warm-started from {len(returns)} candles of {symbols}")
+    
+    def get_correlation_snapshot(self) -> Dict[str, Any]:
+        """Live correlation matrix and EWMA volatilities"""
+        self._warm_start_covariance()
+        return self.covariance.snapshot()
+    
+    def _correlation_sizing_factor(self, symbol: str, signal: str, account_id: str) -> Tuple[float, List[str]]:
+        """Size multiplier for adding same-direction exposure to symbols correlated with an open position"""
+        direction = 1.0 if signal.upper() == "BUY" else -1.0
+        threshold = self.settings.RISK_CORRELATION_THRESHOLD
+        overlap = 0.0
+        correlated = []
+        for position in self.broker.get_open_positions(account_id):
+            if position.symbol == symbol:
+                continue
+            correlation = self.covariance.correlation_between(symbol, position.symbol)
+            if correlation is None or abs(correlation) < threshold:
+                continue
+            position_direction = 1.0 if position.position_type == PositionType.LONG else -1.0
+            same_way = correlation * direction * position_direction
+            if same_way > 0:
+                overlap += same_way
+                correlated.append(f"{position.symbol} (ρ={correlation:.2f})")
+        return 1.0 / (1.0 + overlap), correlated
+    
+    def analyze_value_at_risk(self) -> Dict[str, Any]:
+        """Portfolio VaR/ES and stress scenarios across all accounts' open positions"""
+        exposures, account_ids, symbols = self.broker.get_notional_exposures()
+        self.risk_engine.refresh(sorted(set(self.settings.TRADING_SYMBOLS) | set(symbols)))
+        equity = np.array([
+            self.broker.get_account(account_id).current_balance + self.broker.get_account_exposure(account_id)["unrealized_pnl"]
+            for account_id in account_ids
+        ])
+        return self.risk_engine.evaluate(exposures, symbols, account_ids, equity)
+    
     def get_risk_summary(self) -> Dict[str, Any]:
         """Get comprehensive risk summary"""
         try:
             return {
+                "portfolio_var": self.analyze_value_at_risk(),
+                "correlation": self.get_correlation_snapshot(),
                 "total_positions_monitored": len(self._risk_metrics),
                 "trailing_stops_active": len(self._trailing_states),
                 "risk_decisions_today": len([
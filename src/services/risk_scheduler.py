@@ -0,0 +1,142 @@
+"""
+Debounced risk evaluation scheduler
+Coalesces per-tick risk requests into at most one evaluation in flight, rate-limited,
+with an immediate path when a tick crosses a position's trigger level
+"""
+
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Dict, Any, List, Optional, Set
+
+
+class RiskEvaluationScheduler:
+    """Single-flight, dirty-symbol coalescing scheduler for risk evaluations
+
+    - ``request`` marks a symbol dirty; must be called on the event loop thread
+    - one worker runs ``evaluate(symbols)`` with every symbol dirtied since the last run
+    - runs start at most once per ``min_interval`` seconds unless a request is urgent
+      (``is_urgent(symbol, price)``, e.g. a stop/target/liquidation level was crossed)
+    """
+
+    def __init__(self, evaluate: Callable[[Optional[List[str]]], Awaitable[Any]],
+                 min_interval: float = 0.25,
+                 is_urgent: Optional[Callable[[str, float], bool]] = None):
+        self.evaluate = evaluate
+        self.min_interval = min_interval
+        self.is_urgent = is_urgent
+        self.logger = logging.getLogger("risk_manager.scheduler")
+
+        self._dirty: Set[str] = set()
+        self._full_requested = False
+        self._urgent = False
+        self._in_flight = False
+        self._last_run = 0.0
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._running = False
+
+        # Statistics
+        self.stats = {
+            "requests": 0,
+            "evaluations": 0,
+            "immediate": 0,
+            "coalesced": 0,  # Requests merged into an already pending evaluation
+            "skipped_in_flight": 0,  # Requests that arrived while an evaluation was running
+            "errors": 0,
+            "last_evaluation_ms": 0.0
+        }
+
+    def request(self, symbol: Optional[str] = None, price: float = 0.0):
+        """Mark a symbol (or a full sweep when None) for the next evaluation"""
+        self.stats["requests"] += 1
+        if self._task is None:
+            self._start()
+
+        if self._in_flight:
+            self.stats["skipped_in_flight"] += 1
+        if symbol is None:
+            if self._full_requested:
+                self.stats["coalesced"] += 1
+            self._full_requested = True
+        elif symbol in self._dirty or self._full_requested:
+            self.stats["coalesced"] += 1
+            self._dirty.add(symbol)
+        else:
+            self._dirty.add(symbol)
+
+        if symbol is not None and price > 0 and self.is_urgent and not self._urgent:
+            try:
+                self._urgent = self.is_urgent(symbol, price)
+            except Exception as e:
+                self.logger.error(f"❌ Risk trigger check failed for {symbol}: {e}")
+
+        self._wakeup.set()
+
+    async def stop(self):
+        """Stop the worker (a pending evaluation is dropped)"""
+        self._running = False
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get scheduler statistics"""
+        return {**self.stats, "pending_symbols": len(self._dirty), "in_flight": self._in_flight}
+
+    # Internals
+    def _start(self):
+        self._wakeup = asyncio.Event()
+        self._running = True
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self):
+        while self._running:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+
+            # Rate limit: wait out the interval unless a trigger level was crossed
+            delay = self._last_run + self.min_interval - time.monotonic()
+            if delay > 0 and not self._urgent:
+                try:
+                    await asyncio.wait_for(self._wait_urgent(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+
+            if not self._dirty and not self._full_requested:
+                continue
+
+            symbols = None if self._full_requested else sorted(self._dirty)
+            if self._urgent:
+                self.stats["immediate"] += 1
+            self._dirty = set()
+            self._full_requested = False
+            self._urgent = False
+            self._wakeup.clear()
+
+            self._in_flight = True
+            started = time.monotonic()
+            try:
+                await self.evaluate(symbols)
+            except Exception as e:
+                self.stats["errors"] += 1
+                self.logger.error(f"❌ Risk evaluation failed: {e}")
+            finally:
+                self._in_flight = False
+                self._last_run = time.monotonic()
+                self.stats["evaluations"] += 1
+                self.stats["last_evaluation_ms"] = round((self._last_run - started) * 1000, 2)
+
+            # Requests that arrived during the run are picked up on the next pass
+            if self._dirty or self._full_requested:
+                self._wakeup.set()
+
+    async def _wait_urgent(self):
+        """Return once an urgent request arrives"""
+        while not self._urgent:
+            self._wakeup.clear()
+            await self._wakeup.wait()
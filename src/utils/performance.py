@@ -8,6 +8,7 @@ import logging
 import time
 import threading
 from collections import defaultdict, deque
+from datetime import datetime
 from typing import Any, Callable, Dict, Optional, TypeVar, Union
 from dataclasses import dataclass
 import weakref
@@ -458,8 +459,301 @@ class RateLimiter:
             self.calls.clear()
 
 
+class ExpiringKeyCache:
+    """Thread-safe time-windowed key set for deduplication and throttling
+
+    A hash map of key -> expiry plus one FIFO expiry queue per TTL. Within a
+    queue every entry has the same TTL, so expiry order equals insertion order
+    and insert, lookup and expiry are all amortized O(1) (no heap, no scans).
+    Re-adding a key leaves a stale queue entry that is skipped when it expires.
+    """
+    
+    def __init__(self, default_ttl: float, max_size: Optional[int] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        self.default_ttl = default_ttl
+        self.max_size = max_size
+        self.clock = clock
+        self._entries: Dict[Any, tuple] = {}  # key -> its live (expiry, key) queue entry
+        self._queues: Dict[float, deque] = {}
+        self.lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+    
+    def add(self, key: Any, ttl: Optional[float] = None):
+        """Record key for ttl seconds (default TTL when None), replacing any earlier expiry"""
+        with self.lock:
+            now = self.clock()
+            self._expire(now)
+            self._insert(key, now, self.default_ttl if ttl is None else ttl)
+    
+    def add_if_absent(self, key: Any, ttl: Optional[float] = None) -> bool:
+        """Atomically record key unless it is live; True when it was added (not a duplicate)"""
+        with self.lock:
+            now = self.clock()
+            self._expire(now)
+            if key in self._entries:
+                self.hits += 1
+                return False
+            self.misses += 1
+            self._insert(key, now, self.default_ttl if ttl is None else ttl)
+            return True
+    
+    def __contains__(self, key: Any) -> bool:
+        with self.lock:
+            self._expire(self.clock())
+            if key in self._entries:
+                self.hits += 1
+                return True
+            self.misses += 1
+            return False
+    
+    def remaining(self, key: Any) -> float:
+        """Seconds until key expires (0.0 when absent)"""
+        with self.lock:
+            entry = self._entries.get(key)
+            return max(0.0, entry[0] - self.clock()) if entry is not None else 0.0
+    
+    def discard(self, key: Any) -> bool:
+        """Forget key before it expires"""
+        with self.lock:
+            return self._entries.pop(key, None) is not None
+    
+    def clear(self):
+        """Clear all keys"""
+        with self.lock:
+            self._entries.clear()
+            self._queues.clear()
+    
+    def __len__(self) -> int:
+        with self.lock:
+            self._expire(self.clock())
+            return len(self._entries)
+    
+    def stats(self) -> Dict[str, Union[int, float]]:
+        """Get cache statistics"""
+        with self.lock:
+            return {
+                "size": len(self._entries),
+                "windows": len(self._queues),
+                "hits": self.hits,
+                "misses": self.misses,
+                "expired": self.expired
+            }
+    
+    def _insert(self, key: Any, now: float, ttl: float):
+        entry = (now + ttl, key)
+        self._entries[key] = entry
+        queue = self._queues.get(ttl)
+        if queue is None:
+            queue = self._queues[ttl] = deque()
+        queue.append(entry)
+        while self.max_size is not None and len(self._entries) > self.max_size:
+            # Evict the entry closest to expiry
+            oldest_ttl = min(self._queues, key=lambda t: self._queues[t][0][0])
+            oldest_queue = self._queues[oldest_ttl]
+            evicted = oldest_queue.popleft()
+            if not oldest_queue:
+                del self._queues[oldest_ttl]
+            if self._entries.get(evicted[1]) is evicted:
+                del self._entries[evicted[1]]
+    
+    def _expire(self, now: float):
+        for ttl, queue in list(self._queues.items()):
+            while queue and queue[0][0] <= now:
+                entry = queue.popleft()
+                # Skip stale entries left behind by re-adds
+                if self._entries.get(entry[1]) is entry:
+                    del self._entries[entry[1]]
+                    self.expired += 1
+            if not queue:
+                del self._queues[ttl]
+
+
+class LatencyHistogram:
+    """Thread-safe HDR-style latency histogram (microsecond resolution)
+
+    Values are stored in log-linear buckets: exact below 128us, then 64
+    sub-buckets per power of two, which keeps relative error under ~1.6%
+    with fixed memory regardless of how many samples are recorded.
+    """
+
+    SUB_BUCKET_BITS = 7
+    SUB_BUCKET_COUNT = 1 << SUB_BUCKET_BITS
+    SUB_BUCKET_HALF = SUB_BUCKET_COUNT >> 1
+
+    def __init__(self, max_value_us: int = 60_000_000):
+        self.max_value_us = max_value_us
+        self._bucket_count = self._bucket_index(max_value_us) + 1
+        self._counts = [0] * self._bucket_count
+        self._total = 0
+        self._sum = 0
+        self._min = None
+        self._max = 0
+        self.lock = threading.Lock()
+
+    @classmethod
+    def _bucket_index(cls, value: int) -> int:
+        """Map a value (us) to its bucket index"""
+        if value < cls.SUB_BUCKET_COUNT:
+            return value
+        shift = value.bit_length() - cls.SUB_BUCKET_BITS
+        return cls.SUB_BUCKET_COUNT + (shift - 1) * cls.SUB_BUCKET_HALF + ((value >> shift) - cls.SUB_BUCKET_HALF)
+
+    @classmethod
+    def _bucket_upper_bound(cls, index: int) -> int:
+        """Highest value (us) that maps to a bucket index"""
+        if index < cls.SUB_BUCKET_COUNT:
+            return index
+        offset = index - cls.SUB_BUCKET_COUNT
+        shift = offset // cls.SUB_BUCKET_HALF + 1
+        mantissa = offset % cls.SUB_BUCKET_HALF + cls.SUB_BUCKET_HALF
+        return ((mantissa + 1) << shift) - 1
+
+    def record(self, value_us: float):
+        """Record a latency sample in microseconds"""
+        value = int(value_us)
+        if value < 0:
+            value = 0
+        elif value > self.max_value_us:
+            value = self.max_value_us
+
+        index = self._bucket_index(value)
+        with self.lock:
+            self._counts[index] += 1
+            self._total += 1
+            self._sum += value
+            if self._min is None or value < self._min:
+                self._min = value
+            if value > self._max:
+                self._max = value
+
+    def record_seconds(self, value_s: float):
+        """Record a latency sample given in seconds"""
+        self.record(value_s * 1_000_000)
+
+    def percentile(self, pct: float) -> int:
+        """Get the value (us) at the given percentile (0-100)"""
+        with self.lock:
+            return self._percentile_locked(pct)
+
+    def _percentile_locked(self, pct: float) -> int:
+        if self._total == 0:
+            return 0
+        target = max(1, int(round(self._total * pct / 100.0)))
+        running = 0
+        for index, count in enumerate(self._counts):
+            if count:
+                running += count
+                if running >= target:
+                    return min(self._bucket_upper_bound(index), self._max)
+        return self._max
+
+    @property
+    def count(self) -> int:
+        """Number of recorded samples"""
+        return self._total
+
+    def reset(self):
+        """Clear all recorded samples"""
+        with self.lock:
+            self._counts = [0] * self._bucket_count
+            self._total = 0
+            self._sum = 0
+            self._min = None
+            self._max = 0
+
+    def snapshot(self) -> Dict[str, Union[int, float]]:
+        """Get summary statistics (all values in microseconds)"""
+        with self.lock:
+            return {
+                "count": self._total,
+                "min_us": self._min or 0,
+                "max_us": self._max,
+                "mean_us": round(self._sum / self._total, 1) if self._total else 0.0,
+                "p50_us": self._percentile_locked(50),
+                "p90_us": self._percentile_locked(90),
+                "p99_us": self._percentile_locked(99),
+                "p999_us": self._percentile_locked(99.9)
+            }
+
+
+class LatencyTracker:
+    """Named latency histograms for each hop of the market data pipeline"""
+
+    # Pipeline stages in tick order (exchange -> parse -> strategy -> broker -> client)
+    FEED_STAGES = (
+        "exchange_to_receive",
+        "parse",
+        "market_data_build",
+        "strategy_price_age",
+        "mailbox_wait",
+        "broker_pnl_update",
+        "risk_check",
+        "ws_fanout",
+        "receive_to_client",
+        "exchange_to_client"
+    )
+
+    def __init__(self, max_value_us: int = 60_000_000):
+        self.max_value_us = max_value_us
+        self.histograms: Dict[str, LatencyHistogram] = {
+            stage: LatencyHistogram(max_value_us) for stage in self.FEED_STAGES
+        }
+        self.lock = threading.Lock()
+
+    def get_histogram(self, stage: str) -> LatencyHistogram:
+        """Get (or lazily create) the histogram for a stage"""
+        histogram = self.histograms.get(stage)
+        if histogram is None:
+            with self.lock:
+                histogram = self.histograms.setdefault(stage, LatencyHistogram(self.max_value_us))
+        return histogram
+
+    def record(self, stage: str, value_s: float):
+        """Record a stage latency given in seconds"""
+        self.get_histogram(stage).record_seconds(value_s)
+
+    def snapshot(self) -> Dict[str, Dict[str, Union[int, float]]]:
+        """Get summary statistics for every stage"""
+        return {stage: histogram.snapshot() for stage, histogram in list(self.histograms.items())}
+
+    def reset(self):
+        """Clear all histograms"""
+        for histogram in list(self.histograms.values()):
+            histogram.reset()
+
+
+def parse_exchange_time(value: Any) -> Optional[float]:
+    """Convert an exchange timestamp to epoch seconds
+
+    Delta Exchange sends either an ISO-8601 string or an integer epoch in
+    seconds/milliseconds/microseconds/nanoseconds; the unit is inferred from
+    the magnitude.
+    """
+    if value is None:
+        return None
+    try:
+        if isinstance(value, str):
+            if value.isdigit():
+                value = int(value)
+            else:
+                return datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp()
+        value = float(value)
+        if value > 1e17:
+            return value / 1e9
+        if value > 1e14:
+            return value / 1e6
+        if value > 1e11:
+            return value / 1e3
+        return value
+    except (TypeError, ValueError):
+        return None
+
+
 # Global instances
 memory_optimizer = MemoryOptimizer()
+_latency_tracker = LatencyTracker()
 
 
 def get_performance_monitor() -> PerformanceMonitor:
@@ -472,6 +766,11 @@ def get_memory_optimizer() -> MemoryOptimizer:
     return memory_optimizer
 
 
+def get_latency_tracker() -> LatencyTracker:
+    """Get global feed latency tracker instance"""
+    return _latency_tracker
+
+
 def optimize_pandas_memory(df):
     """Optimize pandas DataFrame memory usage"""
     try:
@@ -0,0 +1,66 @@
+"""Edge-triggered price levels in PriceTriggerBook"""
+
+from src.services.price_triggers import PriceTriggerBook, RISK_LEVEL, STOP_LOSS, TARGET
+
+
+def fired(book, price, **kwargs):
+    return [(pid, kind) for pid, kind, _ in book.crossed(price, **kwargs)]
+
+
+def test_level_fires_once_on_crossing_not_on_next_tick_at_same_price():
+    book = PriceTriggerBook("BTCUSD")
+    book.set_levels("p1", [(RISK_LEVEL, 105.0, False)])
+    assert fired(book, 100.0) == []
+    assert fired(book, 106.0) == [("p1", RISK_LEVEL)]
+    assert fired(book, 106.0) == []
+    assert fired(book, 107.0) == []
+
+
+def test_level_fires_again_after_price_moves_back():
+    book = PriceTriggerBook("BTCUSD")
+    book.set_levels("p1", [(STOP_LOSS, 95.0, True)])
+    fired(book, 100.0)
+    assert fired(book, 94.0) == [("p1", STOP_LOSS)]
+    assert fired(book, 96.0) == []
+    assert fired(book, 95.0) == [("p1", STOP_LOSS)]
+
+
+def test_reregistering_unchanged_levels_does_not_refire():
+    book = PriceTriggerBook("BTCUSD")
+    levels = [(RISK_LEVEL, 105.0, False), (TARGET, 110.0, False)]
+    book.set_levels("p1", levels)
+    fired(book, 100.0)
+    assert fired(book, 106.0) == [("p1", RISK_LEVEL)]
+    book.set_levels("p1", levels)
+    assert fired(book, 106.0) == []
+
+
+def test_new_level_registered_already_past_fires_on_next_check():
+    book = PriceTriggerBook("BTCUSD")
+    fired(book, 100.0)
+    book.set_levels("p1", [(STOP_LOSS, 101.0, True)])
+    assert fired(book, 100.0) == [("p1", STOP_LOSS)]
+    assert fired(book, 100.0) == []
+
+
+def test_first_check_reports_levels_already_past():
+    book = PriceTriggerBook("BTCUSD")
+    book.set_levels("p1", [(STOP_LOSS, 95.0, True), (TARGET, 110.0, False)])
+    assert fired(book, 90.0) == [("p1", STOP_LOSS)]
+
+
+def test_peek_does_not_consume_crossing():
+    book = PriceTriggerBook("BTCUSD")
+    book.set_levels("p1", [(STOP_LOSS, 95.0, True)])
+    fired(book, 100.0)
+    assert fired(book, 94.0, advance=False) == [("p1", STOP_LOSS)]
+    assert fired(book, 94.0) == [("p1", STOP_LOSS)]
+
+
+def test_remove_position_drops_levels():
+    book = PriceTriggerBook("BTCUSD")
+    book.set_levels("p1", [(STOP_LOSS, 95.0, True)])
+    fired(book, 100.0)
+    book.remove_position("p1")
+    assert len(book) == 0
+    assert fired(book, 90.0) == []